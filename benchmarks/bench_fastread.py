@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+bench_fastread.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    metadata.read_fast vs mutagen's EasyMP3 / FLAC on a synthetic corpus.
+
+    python -m benchmarks.bench_fastread [-n COUNT]
+"""
+import os
+import sys
+import time
+import tempfile
+
+from mutagen.mp3 import EasyMP3
+from mutagen.flac import FLAC
+
+from benchmarks.corpus import make_mp3_corpus, make_flac_corpus
+from vlc_analyze.metadata import Metadata, read_fast
+
+
+def via_mutagen(cls):
+    def read(path):
+        audio = cls(path)
+        return {k: v for k, v in audio.items() if k in Metadata.possible_tags}, audio.info.length
+    return read
+
+
+def via_fast(path):
+    meta = read_fast(path)
+    return meta.tags, meta.length
+
+
+def timed(func, files):
+    start = time.perf_counter()
+    for f in files:
+        func(f)
+    return time.perf_counter() - start
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = (('mp3', make_mp3_corpus(os.path.join(tmp, 'mp3'), count, seconds=30), EasyMP3),
+                   ('flac', make_flac_corpus(os.path.join(tmp, 'flac'), count), FLAC),
+                   )
+        for name, files, cls in corpora:
+            # both readers must agree before timing them
+            for f in files[:50]:
+                slow_tags, slow_length = via_mutagen(cls)(f)
+                fast_tags, fast_length = via_fast(f)
+                assert slow_tags == fast_tags, (f, slow_tags, fast_tags)
+                assert abs(slow_length - fast_length) < 0.1, (f, slow_length, fast_length)
+            slow = timed(via_mutagen(cls), files)
+            fast = timed(via_fast, files)
+            sys.stdout.write('{:>5}: mutagen {:>8.1f} files/s | read_fast {:>8.1f} files/s | {:.1f}x\n'.format(
+                name, count / slow, count / fast, slow / fast))
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser('bench_fastread')
+    parser.add_argument('--count', '-n', type=int, default=2000, help='number of synthetic files per format')
+    main(parser.parse_args().count)
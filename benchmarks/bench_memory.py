@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+bench_memory.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Bytes per track held in memory: a list of Metadata objects vs the compact Library model.
+
+    python -m benchmarks.bench_memory [-n COUNT]
+"""
+import gc
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.corpus import make_mp3_corpus
+from vlc_analyze.metadata import Metadata
+from vlc_analyze.library import Library
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, size
+
+
+def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        files = make_mp3_corpus(tmp, count)
+
+        metas, meta_bytes = measure(lambda: [Metadata(f) for f in files])
+        del metas
+
+        def build_library():
+            lib = Library()
+            for f in files:
+                lib.add_metadata(Metadata(f))
+            return lib
+
+        lib, lib_bytes = measure(build_library)
+        assert len(lib) == count
+
+    sys.stdout.write('tracks:            {}\n'.format(count))
+    sys.stdout.write('Metadata objects:  {:>8.1f} bytes/track\n'.format(meta_bytes / count))
+    sys.stdout.write('Library records:   {:>8.1f} bytes/track\n'.format(lib_bytes / count))
+    sys.stdout.write('ratio:             {:>8.1f}x\n'.format(meta_bytes / max(lib_bytes, 1)))
+    return meta_bytes / count, lib_bytes / count
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser('bench_memory')
+    parser.add_argument('--count', '-n', type=int, default=2000, help='number of synthetic tracks')
+    main(parser.parse_args().count)
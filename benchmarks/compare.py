@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+compare.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Compare two benchmarks/run.py result files. Exits non-zero if any benchmark
+    got slower than the allowed threshold.
+
+    python -m benchmarks.compare base.json new.json [--threshold 0.1]
+"""
+import sys
+import json
+
+
+def compare(base, new, threshold=0.1):
+    regressions = []
+    lines = ['{:>20}  {:>12}  {:>12}  {:>8}'.format('benchmark', base.get('revision'), new.get('revision'), 'change')]
+    for name, result in new['results'].items():
+        try:
+            old_rate = base['results'][name]['ops_per_sec']
+        except KeyError:
+            lines.append('{:>20}  {:>12}  {:>12.1f}  {:>8}'.format(name, '-', result['ops_per_sec'], 'new'))
+            continue
+        change = result['ops_per_sec'] / old_rate - 1
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        lines.append('{:>20}  {:>12.1f}  {:>12.1f}  {:>+7.1%}{}'.format(name, old_rate, result['ops_per_sec'],
+                                                                      change, flag))
+    return '\n'.join(lines) + '\n', regressions
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser('compare')
+    parser.add_argument('base', type=str, help='baseline results json')
+    parser.add_argument('new', type=str, help='new results json')
+    parser.add_argument('--threshold', '-t', type=float, default=0.1,
+                        help='allowed slowdown as a fraction of the baseline rate')
+    args = parser.parse_args()
+
+    with open(args.base) as b, open(args.new) as n:
+        report, slower = compare(json.load(b), json.load(n), args.threshold)
+    sys.stdout.write(report)
+    sys.exit(1 if slower else 0)
@@ -0,0 +1,109 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+corpus.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Synthetic media files for benchmarking. Files are silent but valid enough
+    for mutagen (and vlc) to parse.
+"""
+import os
+import random
+
+from mutagen.easyid3 import EasyID3
+from mutagen.flac import FLAC
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding, no crc, joint stereo
+MP3_FRAME_HEADER = b'\xff\xfb\x90\x64'
+MP3_FRAME_SIZE = 144 * 128000 // 44100
+MP3_FRAME = MP3_FRAME_HEADER + bytes(MP3_FRAME_SIZE - len(MP3_FRAME_HEADER))
+MP3_FRAME_SECONDS = 1152 / 44100
+
+WORDS = ('red', 'blue', 'night', 'day', 'river', 'stone', 'echo', 'light', 'dust', 'storm',
+         'glass', 'hollow', 'winter', 'summer', 'ghost', 'ocean', 'fire', 'signal', 'static', 'bloom')
+
+
+def rand_words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count)).title()
+
+
+def rand_tags(rng, track=1):
+    return {'artist': rand_words(rng, 2),
+            'album': rand_words(rng, 3),
+            'title': rand_words(rng, rng.randint(1, 4)),
+            'tracknumber': str(track),
+            }
+
+
+def make_mp3(path, tags=None, seconds=1.0):
+    """write a silent CBR mp3 of roughly `seconds` length, optionally tagged."""
+    with open(path, 'wb') as f:
+        f.write(MP3_FRAME * max(1, int(seconds / MP3_FRAME_SECONDS)))
+    if tags:
+        id3 = EasyID3()
+        id3.update(tags)
+        id3.save(path)
+    return path
+
+
+def make_flac(path, tags=None, seconds=1.0, sample_rate=44100):
+    """
+    write a flac file holding only a STREAMINFO block (plus tags) and a stub payload.
+    mutagen never decodes frames, so this is enough for metadata benchmarks.
+    """
+    total_samples = int(seconds * sample_rate)
+    # sample rate (20 bits) | channels - 1 (3) | bits per sample - 1 (5) | total samples (36)
+    packed = (sample_rate << 44) | (1 << 41) | (15 << 36) | total_samples
+    streaminfo = ((4096).to_bytes(2, 'big') * 2 + bytes(6) + packed.to_bytes(8, 'big') + bytes(16))
+    with open(path, 'wb') as f:
+        f.write(b'fLaC' + b'\x80' + len(streaminfo).to_bytes(3, 'big') + streaminfo)
+        f.write(bytes(max(1, int(seconds * 1024))))
+    if tags:
+        flac = FLAC(path)
+        flac.update(tags)
+        flac.save()
+    return path
+
+
+def make_mp3_corpus(directory, count, seed=0, seconds=1.0):
+    """write `count` tagged mp3 files into `directory` and return their paths."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    return [make_mp3(os.path.join(directory, 'track_{:06d}.mp3'.format(idx)), rand_tags(rng, idx + 1), seconds)
+            for idx in range(count)]
+
+
+def make_flac_corpus(directory, count, seed=0, seconds=1.0):
+    """write `count` tagged flac files into `directory` and return their paths."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    return [make_flac(os.path.join(directory, 'track_{:06d}.flac'.format(idx)), rand_tags(rng, idx + 1), seconds)
+            for idx in range(count)]
+
+
+def make_corpus(root, count, seed=0, formats=('mp3', 'flac'), max_depth=3, max_seconds=10.0):
+    """
+    deterministic mixed corpus: `count` files spread over a random directory tree
+    up to `max_depth` levels deep, with random tags and lengths.
+
+    returns the list of paths written, in creation order.
+    """
+    rng = random.Random(seed)
+    writers = {'mp3': make_mp3, 'flac': make_flac}
+    dirs = [root]
+    files = []
+    for idx in range(count):
+        if rng.random() < 0.1:  # start a new album directory
+            parent = rng.choice([d for d in dirs if d[len(root):].count(os.sep) < max_depth])
+            dirs.append(os.path.join(parent, rand_words(rng, 2).replace(' ', '_') + '_{}'.format(len(dirs))))
+        directory = rng.choice(dirs)
+        os.makedirs(directory, exist_ok=True)
+        ext = rng.choice(formats)
+        path = os.path.join(directory, 'track_{:06d}.{}'.format(idx, ext))
+        files.append(writers[ext](path, rand_tags(rng, idx + 1), rng.uniform(1.0, max_seconds)))
+    return files
@@ -0,0 +1,159 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+run.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Benchmark suite over a deterministic synthetic corpus.
+    Results are written as JSON so runs from different commits can be compared
+    with benchmarks/compare.py.
+
+    python -m benchmarks.run [-n COUNT] [-o results.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import subprocess
+
+from benchmarks.corpus import make_corpus
+from vlc_analyze import utils
+from vlc_analyze.metadata import Metadata, load_metadata
+from vlc_analyze.shells import MetaDataShell
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """register a benchmark: func(corpus_dir, files, work_dir) -> number of operations."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+@benchmark('scan')
+def bench_scan(corpus_dir, files, work_dir):
+    found = list(utils.multiple_file_types(corpus_dir, ['mp3', 'flac'], recursion=True))
+    assert len(found) == len(files)
+    return len(found)
+
+
+@benchmark('metadata_parse')
+def bench_metadata_parse(corpus_dir, files, work_dir):
+    for f in files:
+        Metadata(f).get_audio_metadata(['artist', 'title'])
+    return len(files)
+
+
+@benchmark('metadata_fast_parse')
+def bench_metadata_fast_parse(corpus_dir, files, work_dir):
+    for f in files:
+        load_metadata(f).get_audio_metadata(['artist', 'title'])
+    return len(files)
+
+
+@benchmark('metadata_save')
+def bench_metadata_save(corpus_dir, files, work_dir):
+    copies = os.path.join(work_dir, 'save')
+    shutil.copytree(corpus_dir, copies)
+    count = 0
+    for f in utils.multiple_file_types(copies, ['mp3', 'flac'], recursion=True):
+        meta = Metadata(f)
+        meta.save({'title': ['benchmark {}'.format(count)], 'bogus': ['dropped']})
+        count += 1
+    return count
+
+
+@benchmark('bookmarks')
+def bench_bookmarks(corpus_dir, files, work_dir):
+    path = os.path.join(work_dir, 'bookmarks.txt')
+    open(path, 'w').close()
+    for f in files:
+        utils.bookmark_file(f, path)
+    utils.bookmark_files(files, path)
+    assert len(utils.bookmarks_load(path)) == len(files)
+    removed = files[:50]
+    for f in removed:
+        utils.bookmark_remove(f, path)
+    utils.bookmark_clear_mark(path)
+    return 2 * len(files) + len(removed) + 2
+
+
+@benchmark('shell_dispatch')
+def bench_shell_dispatch(corpus_dir, files, work_dir):
+    commands = ('view artist,title', 'v', 'edit artist::Someone,, title::Something', 'e -c', 'alias', 'a')
+    count = 0
+    for f in files[:100]:
+        shell = MetaDataShell(Metadata(f), view=True, stdout=io.StringIO())
+        for _ in range(10):
+            for line in commands:
+                shell.onecmd(line)
+                count += 1
+    return count
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(count, seed=0, repeat=3, selected=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = os.path.join(tmp, 'corpus')
+        files = make_corpus(corpus_dir, count, seed)
+        for name, func in BENCHMARKS.items():
+            if selected and name not in selected:
+                continue
+            times = []
+            for idx in range(repeat):
+                work_dir = os.path.join(tmp, 'work_{}_{}'.format(name, idx))
+                os.mkdir(work_dir)
+                start = time.perf_counter()
+                ops = func(corpus_dir, files, work_dir)
+                times.append(time.perf_counter() - start)
+                shutil.rmtree(work_dir)
+            best = min(times)
+            results[name] = {'ops': ops, 'seconds': best, 'ops_per_sec': ops / best if best else None,
+                             'runs': times}
+            sys.stderr.write('{:>20}: {:>10.1f} ops/s ({} ops, best of {})\n'.format(name, ops / best, ops, repeat))
+    return {'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': sys.platform,
+            'count': count,
+            'seed': seed,
+            'results': results,
+            }
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser('benchmarks')
+    parser.add_argument('--count', '-n', type=int, default=500, help='number of synthetic media files')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, best is reported')
+    parser.add_argument('--output', '-o', type=str, help='write JSON results here instead of stdout')
+    parser.add_argument('only', nargs='*', help='benchmarks to run (default: all of {})'.format(', '.join(BENCHMARKS)))
+    args = parser.parse_args()
+
+    report = run(args.count, args.seed, args.repeat, set(args.only))
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
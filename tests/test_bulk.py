@@ -0,0 +1,59 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_bulk.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Bulk export / import round trip through a csv sheet, multi-valued cells included.
+"""
+import os
+import csv
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze.bulk import export_metadata, import_metadata, join_values, split_values
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.metadata import Metadata
+
+
+def test_join_split_round_trip():
+    values = ['a;b', 'c\\d', ' e ']
+    assert split_values(join_values(values)) == ['a;b', 'c\\d', 'e']
+    assert split_values('') == []
+
+
+def test_export_edit_import(tmp_path):
+    files = [make_mp3(str(tmp_path / '{}.mp3'.format(idx)), {'artist': ['a', 'b'], 'title': [str(idx)]})
+             for idx in range(3)]
+    sheet = str(tmp_path / 'tags.csv')
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    try:
+        errors = []
+        assert export_metadata(files + [str(tmp_path / 'missing.mp3')], sheet, fields=['artist', 'title'],
+                               index=index, report=lambda *args: errors.append(args)) == 3
+        assert len(errors) == 1
+        with open(sheet, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0] == {'path': os.path.abspath(files[0]), 'artist': 'a;b', 'title': '0'}
+
+        # unchanged sheet: nothing to do
+        assert import_metadata(sheet, index=index)['changed_files'] == 0
+        rows[1]['artist'] = r'x; y\;z'
+        rows[2]['title'] = ''
+        with open(sheet, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, ['path', 'artist', 'title'])
+            writer.writeheader()
+            writer.writerows(rows)
+        assert import_metadata(sheet, index=index, dry_run=True)['changed_cells'] == 2
+        assert Metadata(files[1]).audio['artist'] == ['a', 'b']
+        counts = import_metadata(sheet, index=index)
+        assert (counts['rows'], counts['changed_files'], counts['changed_cells']) == (3, 2, 2)
+        assert Metadata(files[1]).audio['artist'] == ['x', 'y;z']
+        assert 'title' not in Metadata(files[2]).audio
+        assert import_metadata(sheet, index=index)['changed_files'] == 0
+    finally:
+        index.close()
@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_index.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    MetadataIndex on a temporary database: per file rows removed and restored, sort keys
+    by directory, and the Bloom filter backed unreviewed() filter.
+"""
+import os
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze.bloom import BloomFilter
+from vlc_analyze.index import MetadataIndex, PLAY_FINISHED, review_key
+from vlc_analyze.metadata import load_metadata
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    yield index
+    index.close()
+
+
+def test_file_rows_remove_and_restore(tmp_path, index):
+    path = make_mp3(str(tmp_path / 'a.mp3'), {'artist': ['a']})
+    index.record(load_metadata(path))
+    index.record_sort_keys([(path, 1, 2.0, 'album', 1, 3)])
+    index.record_integrity([(path, 1, 2.0, 'a' * 64, 'b' * 64, 3.0)])
+    saved = index.file_rows(path)
+    assert sorted(saved) == ['integrity', 'sort_keys', 'tracks']
+    index.remove([path])
+    assert index.file_rows(path) == {}
+    index.restore_file_rows(saved)
+    assert index.file_rows(path) == saved
+    assert index.get(path)['tags'] == {'artist': ['a']}
+
+
+def test_nested_transactions_commit_together(index):
+    with pytest.raises(RuntimeError):
+        with index.transaction():
+            index.record_sort_keys([('/x/a.mp3', 1, 2.0, '', 0, 0)])
+            raise RuntimeError
+    assert index.sort_keys('/x') == {}
+
+
+def test_sort_keys_by_directory(index):
+    index.record_sort_keys([('/music/a/1.mp3', 1, 2.0, 'x', 1, 1), ('/music/a/b/2.mp3', 1, 2.0, 'y', 1, 2)])
+    assert index.sort_keys('/music/a') == {'/music/a/1.mp3': (1, 2.0, 'x', 1, 1)}
+    assert list(index.sort_keys('/music/a/b')) == ['/music/a/b/2.mp3']
+
+
+def test_bloom_filter_has_no_false_negatives():
+    keys = [str(idx).encode() for idx in range(1000)]
+    bloom = BloomFilter.from_keys(keys, error_rate=0.01)
+    assert all(key in bloom for key in keys)
+    assert len(bloom) == 1000
+    false_hits = sum(str(idx).encode() in bloom for idx in range(1000, 11000))
+    assert false_hits < 300
+
+
+def test_unreviewed_skips_played_files_until_they_change(tmp_path, index):
+    files = [make_mp3(str(tmp_path / '{}.mp3'.format(idx))) for idx in range(4)]
+    for file in files[:2]:
+        index.log_play(file, os.stat(file).st_mtime, 10, PLAY_FINISHED)
+    assert review_key(files[0], os.stat(files[0]).st_mtime) in index.reviewed_filter()
+    assert list(index.unreviewed(files, batch_size=2)) == files[2:]
+    stat = os.stat(files[0])
+    os.utime(files[0], (stat.st_atime, stat.st_mtime + 10))
+    assert list(index.unreviewed(files)) == [files[0]] + files[2:]
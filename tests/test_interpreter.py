@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_interpreter.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Per command output buffering and ';' pipelines of AliasCmdInterpreter.
+"""
+import io
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze.interpreter import AliasCmdInterpreter, split_commands
+from vlc_analyze.metadata import Metadata
+from vlc_analyze.shells import MetaDataShell
+
+
+class Shell(AliasCmdInterpreter):
+    mdatashell = None
+
+    def do_say(self, args):
+        self.stdout.write(args + '\n')
+
+    def do_edit(self, args):
+        if args:
+            self.mdatashell.onecmd(args)  # like AudioShell.do_edit
+        else:
+            self.stdout.write('opened\n')
+
+    def do_fail(self, args):
+        raise RuntimeError(args)
+
+    def do_quit(self, args):
+        return True
+
+    alias_e = do_edit
+
+
+def run(shell, line):
+    line = shell.precmd(line)
+    return shell.postcmd(shell.onecmd(line), line)
+
+
+def test_split_commands():
+    assert split_commands('n; e;v artist') == ['n', 'e', 'v artist']
+    assert split_commands(r'say a\; b; say c') == ['say a; b', 'say c']
+
+
+def test_split_commands_leaves_free_text_whole():
+    free_text = lambda command: command.startswith('edit')
+    assert split_commands('n; edit artist::A; B', free_text) == ['n', 'edit artist::A; B']
+    assert split_commands('edit a;b; n', free_text) == ['edit a;b; n']
+
+
+def test_batch_output_is_held_until_the_batch_ends():
+    out = io.StringIO()
+    shell = Shell(stdout=out)
+    line = shell.precmd('say one; say two')
+    shell.onecmd(line)
+    assert out.getvalue() == ''
+    shell.postcmd(None, line)
+    assert out.getvalue() == 'one\ntwo\n'
+
+
+def test_batch_stops_at_a_stopping_command():
+    out = io.StringIO()
+    assert run(Shell(stdout=out), 'say one; quit; say two')
+    assert out.getvalue() == 'one\n'
+
+
+def test_failing_command_releases_held_output():
+    out = io.StringIO()
+    shell = Shell(stdout=out)
+    with pytest.raises(RuntimeError):
+        run(shell, 'say one; fail broken; say two')
+    assert out.getvalue() == 'one\n'
+    shell.stdout.write('later\n')
+    assert out.getvalue() == 'one\nlater\n'
+
+
+def test_edit_value_keeps_its_semicolon(tmp_path):
+    path = str(tmp_path / 'a.mp3')
+    make_mp3(path, {'artist': ['a'], 'title': ['t']})
+    out = io.StringIO()
+    shell = Shell(stdout=out)
+    shell.mdatashell = MetaDataShell(Metadata(path), stdout=io.StringIO())
+    run(shell, 'say one; e; e edit artist::A; B,, title::x;y')
+    assert out.getvalue() == 'one\nopened\n'
+    assert shell.mdatashell.tmp_dict['artist'] == ['A; B']
+    assert shell.mdatashell.tmp_dict['title'] == ['x;y']
+    shell.mdatashell.onecmd('edit album::C; D')  # typed into the metadata shell itself
+    assert shell.mdatashell.tmp_dict['album'] == ['C; D']
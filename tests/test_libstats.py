@@ -0,0 +1,44 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_libstats.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    library_stats over generated files: totals from the index, and only new or modified files parsed.
+"""
+import os
+
+from benchmarks.corpus import make_mp3, make_flac
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.libstats import format_stats, library_stats
+
+
+def test_library_stats(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    files = [make_mp3(str(tmp_path / 'a' / '{}.mp3'.format(idx)), {'artist': ['x'], 'title': [str(idx)]}, 2.0)
+             for idx in range(3)]
+    files.append(make_flac(str(tmp_path / 'b' / 'c.flac'), {'title': ['c']}))
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    try:
+        stats = library_stats(files + [str(tmp_path / 'missing.mp3')], index)
+        assert (stats['tracks'], stats['indexed'], stats['parsed'], stats['errors']) == (4, 0, 4, 1)
+        assert stats['formats'] == {'mp3': 3, 'flac': 1}
+        assert stats['missing_tags']['artist'] == 1 and stats['missing_tags']['title'] == 0
+        assert [(f['folder'], f['tracks']) for f in stats['folders']] == [
+            (str(tmp_path / 'a'), 3), (str(tmp_path / 'b'), 1)]
+        assert stats['bytes'] == sum(os.path.getsize(file) for file in files)
+        assert stats['largest'][0]['bytes'] == max(os.path.getsize(file) for file in files)
+
+        stat = os.stat(files[0])
+        os.utime(files[0], (stat.st_atime, stat.st_mtime + 10))  # stale index row
+        stats = library_stats(files, index)
+        assert (stats['tracks'], stats['indexed'], stats['parsed']) == (4, 3, 1)
+        assert '4 tracks' in format_stats(stats)
+    finally:
+        index.close()
@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_lineedit.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    LineEditor on piped (non-tty) input: line splitting, timeouts, wake-ups, EOF and the shared editor.
+"""
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+from vlc_analyze import lineedit
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='posix line editor')
+
+
+@pytest.fixture
+def pipe():
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, 'rb', buffering=0) as reader:
+        yield reader, write_fd
+    try:
+        os.close(write_fd)
+    except OSError:
+        pass
+
+
+def test_piped_lines_are_read_one_by_one(pipe):
+    reader, write_fd = pipe
+    editor = lineedit.LineEditor(reader)
+    os.write(write_fd, 'n\nedit artist::Ä\r\n\ny'.encode('utf-8'))
+    os.close(write_fd)
+    out = io.StringIO()
+    lines = [editor.readline('> ', stream=out, default='-') for _ in range(4)]
+    assert lines == ['n', 'edit artist::Ä', '-', 'y']
+    assert out.getvalue() == '> ' * 4
+    with pytest.raises(EOFError):
+        editor.readline(stream=out)
+
+
+def test_timeout_and_wake(pipe):
+    reader, write_fd = pipe
+    editor = lineedit.LineEditor(reader)
+    out = io.StringIO()
+    assert editor.readline('> ', timeout=0.01, default='late', stream=out, timeout_msg='!') == 'late'
+    assert out.getvalue() == '> !\n'
+    threading.Timer(0.05, editor.wake).start()
+    assert editor.readline(timeout=10, default='woken', stream=out) == 'woken'
+    os.write(write_fd, b'after\n')
+    assert editor.readline(timeout=10, stream=out) == 'after'
+
+
+def test_shared_editor_is_created_once_across_threads(monkeypatch, pipe):
+    reader, _ = pipe
+    monkeypatch.setattr(lineedit, '_EDITOR', None)
+    monkeypatch.setattr(sys, 'stdin', reader)
+    assert lineedit.current_editor() is None
+    editors = []
+    threads = [threading.Thread(target=lambda: editors.append(lineedit.get_editor())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(editor) for editor in editors}) == 1
+    assert lineedit.current_editor() is editors[0]
@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_metadata.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    metadata.read_fast against mutagen on generated mp3 (ID3v2.3 / v2.4, every text encoding, ID3v1)
+    and flac files; damaged files must fall back (None), never raise or return wrong tags.
+"""
+import os
+
+import pytest
+from mutagen.mp3 import EasyMP3
+from mutagen.flac import FLAC
+from mutagen.id3 import ID3, TPE1, TIT2, TALB, TRCK, TCON
+
+from benchmarks.corpus import make_mp3, make_flac
+from vlc_analyze.metadata import Metadata, read_fast, load_metadata
+
+
+def via_mutagen(path):
+    audio = (FLAC if path.endswith('.flac') else EasyMP3)(path)
+    return {k: list(v) for k, v in audio.items() if k in Metadata.possible_tags}, audio.info.length
+
+
+def assert_same(path):
+    fast = read_fast(path)
+    assert fast is not None
+    tags, length = via_mutagen(path)
+    assert fast.tags == tags
+    assert fast.length == pytest.approx(length, abs=0.1)
+    return fast
+
+
+def id3_mp3(path, version, encoding, frames=None):
+    make_mp3(path, seconds=2.0)
+    tags = ID3()
+    for frame in frames or (TPE1(encoding=encoding, text=['Ärtist ★']),
+                            TIT2(encoding=encoding, text=['Títle']),
+                            TALB(encoding=encoding, text=['Album']),
+                            TRCK(encoding=encoding, text=['3/12'])):
+        tags.add(frame)
+    tags.save(path, v2_version=version)
+    return path
+
+
+@pytest.mark.parametrize('version', [3, 4])
+@pytest.mark.parametrize('encoding', [0, 1, 2, 3])
+def test_id3v2_text_encodings(tmp_path, version, encoding):
+    if encoding == 0:  # latin-1 cannot hold the star
+        frames = (TPE1(encoding=0, text=['Ärtist']), TIT2(encoding=0, text=['Títle']))
+    else:
+        frames = None
+    path = id3_mp3(str(tmp_path / 'a.mp3'), version, encoding, frames)
+    assert_same(path)
+
+
+def test_id3v24_multiple_values(tmp_path):
+    path = id3_mp3(str(tmp_path / 'a.mp3'), 4, 3, (TPE1(encoding=3, text=['One', 'Two']),))
+    assert assert_same(path).tags['artist'] == ['One', 'Two']
+
+
+def test_unmapped_frames_are_ignored(tmp_path):
+    path = id3_mp3(str(tmp_path / 'a.mp3'), 4, 3, (TCON(encoding=3, text=['Rock']), TIT2(encoding=3, text=['t'])))
+    assert assert_same(path).tags == {'title': ['t']}
+
+
+def test_untagged_and_id3v1(tmp_path):
+    path = make_mp3(str(tmp_path / 'plain.mp3'), seconds=2.0)
+    assert assert_same(path).tags == {}
+    with open(path, 'ab') as f:
+        f.write(b'TAG' + b'Title'.ljust(30, b'\0') + b'Artist'.ljust(30, b'\0') + b'Album'.ljust(30, b'\0')
+                + b'2001' + bytes(28) + b'\0\x07' + b'\xff')
+    fast = read_fast(path)
+    assert fast.tags == {'title': ['Title'], 'artist': ['Artist'], 'album': ['Album'], 'tracknumber': ['7']}
+    assert fast.audio_end == os.path.getsize(path) - 128
+
+
+def test_flac(tmp_path):
+    path = make_flac(str(tmp_path / 'a.flac'), {'artist': ['One', 'Two'], 'title': 'Títle', 'tracknumber': '1'},
+                     seconds=3.0)
+    fast = assert_same(path)
+    assert fast.tags['artist'] == ['One', 'Two']
+    assert fast.length == pytest.approx(3.0)
+
+
+def test_unsynchronised_tag_falls_back_to_mutagen(tmp_path):
+    path = id3_mp3(str(tmp_path / 'a.mp3'), 3, 0, (TPE1(encoding=0, text=['x']),))
+    with open(path, 'r+b') as f:
+        f.seek(5)
+        f.write(b'\x80')  # whole-tag unsynchronisation flag (nothing needs unsynchronising here)
+    assert read_fast(path) is None
+    assert isinstance(load_metadata(path), Metadata)
+
+
+@pytest.mark.parametrize('damage', ['truncated tag', 'truncated frame', 'garbage after tag', 'garbage',
+                                    'empty', 'flac garbage blocks', 'flac truncated'])
+def test_damaged_files_fall_back(tmp_path, damage):
+    if damage.startswith('flac'):
+        path = make_flac(str(tmp_path / 'a.flac'), {'artist': 'x'})
+    else:
+        path = id3_mp3(str(tmp_path / 'a.mp3'), 4, 3)
+    with open(path, 'rb') as f:
+        data = f.read()
+    tag_end = 10 + sum(byte << (7 * (3 - idx)) for idx, byte in enumerate(data[6:10]))  # syncsafe size
+    data = {'truncated tag': data[:20],
+            'truncated frame': data[:14],
+            'garbage after tag': data[:tag_end] + b'\x00\x01garbage' * 64,
+            'garbage': b'\x17not an mp3' * 100,
+            'empty': b'',
+            'flac garbage blocks': b'fLaC' + b'\x04\xff\xff\xff' + b'\x00' * 32,
+            'flac truncated': data[:30],
+            }[damage]
+    with open(path, 'wb') as f:
+        f.write(data)
+    assert read_fast(path) is None
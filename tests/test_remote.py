@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_remote.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    RemoteServer driven by the blocking client (send / connect) over a temporary unix socket,
+    with a stub shell standing in for AudioShell.
+"""
+import os
+import cmd
+import socket
+import threading
+
+import pytest
+
+from vlc_analyze.remote import RemoteServer, send, connect
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='needs unix sockets')
+
+
+class StubShell(cmd.Cmd):
+    def __init__(self, server=None):
+        super(StubShell, self).__init__()
+        self.server = server
+        self.ran = []
+
+    def do_echo(self, args):
+        self.ran.append(args)
+        self.stdout.write(args + '\n')
+
+    def do_announce(self, args):
+        self.server.publish('now_playing', path=args)
+
+    def do_fail(self, args):
+        raise RuntimeError(args)
+
+    def do_quit(self, args):
+        return True
+
+
+@pytest.fixture
+def server(tmp_path):
+    woken = threading.Event()
+    server = RemoteServer(str(tmp_path / 'remote.sock'), wakeup=woken.set).start()
+    server.woken = woken
+    yield server
+    server.close()
+
+
+def run_client(server, shell, commands, **kwargs):
+    """send commands from a client thread while this thread plays the shell; returns the replies."""
+    result = {}
+
+    def client():
+        try:
+            result['replies'] = send(commands, server.address, timeout=5.0, **kwargs)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    while thread.is_alive():
+        if server.woken.wait(0.05):
+            server.woken.clear()
+        server.dispatch(shell)
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['replies']
+
+
+def test_commands_run_in_order_with_captured_output(server):
+    shell = StubShell()
+    stdout = shell.stdout
+    replies = run_client(server, shell, ['echo one', 'echo two'])
+    assert shell.ran == ['one', 'two']
+    assert [(r['reply'], r['ok'], r['output'], r['stop']) for r in replies] == [
+        ('echo one', True, 'one\n', False), ('echo two', True, 'two\n', False)]
+    assert shell.stdout is stdout
+
+
+def test_stop_flag_and_errors(server):
+    shell = StubShell()
+    replies = run_client(server, shell, ['fail broken', 'quit'])
+    assert replies[0]['ok'] is False
+    assert replies[0]['error'] == 'RuntimeError: broken'
+    assert replies[1]['ok'] is True and replies[1]['stop'] is True
+
+
+def test_events_reach_the_client(server):
+    shell = StubShell(server)
+    events = []
+    replies = run_client(server, shell, ['announce /music/a.mp3'], on_event=events.append)
+    assert replies[0]['ok'] is True
+    assert events == [{'event': 'now_playing', 'path': '/music/a.mp3'}]
+
+
+def test_close_fails_queued_commands_and_removes_socket(server):
+    with connect(server.address, timeout=5.0) as sock, sock.makefile('rwb') as stream:
+        stream.write(b'echo never\n')
+        stream.flush()
+        assert server.woken.wait(5.0)
+        server.close()
+        reply = stream.readline()
+    assert b'ConnectionAbortedError' in reply
+    assert not os.path.exists(server.address)
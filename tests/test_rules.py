@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_rules.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Tag normalization rules: compiled configs, and fix_tags writing only files that changed.
+"""
+import json
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze.metadata import Metadata
+from vlc_analyze.rules import compile_rules, fix_tags, load_rules
+
+CONFIG = {'rules': [
+    {'rule': 'strip'},
+    {'rule': 'filename_split', 'pattern': '{artist} - {title}'},
+    {'rule': 'zero_pad', 'fields': ['tracknumber'], 'width': 2},
+]}
+
+
+def test_compiled_rules():
+    rules = compile_rules(CONFIG)
+    tags = {'title': ['  kept '], 'tracknumber': ['3/12']}
+    assert rules(tags, '/music/Someone - Other.mp3') == {
+        'title': ['kept'], 'tracknumber': ['03/12'], 'artist': ['Someone']}
+    assert tags == {'title': ['  kept '], 'tracknumber': ['3/12']}  # input left alone
+    with pytest.raises(ValueError):
+        compile_rules([{'rule': 'nope'}])
+
+
+def test_fix_tags_is_idempotent(tmp_path):
+    config = tmp_path / 'rules.json'
+    config.write_text(json.dumps(CONFIG))
+    rules = load_rules(str(config))
+    changed = make_mp3(str(tmp_path / 'Someone - Song.mp3'), {'title': ['Song '], 'tracknumber': ['1']})
+    clean = make_mp3(str(tmp_path / 'clean.mp3'), {'title': ['Clean'], 'tracknumber': ['02']})
+    assert fix_tags([changed, clean], rules, dry_run=True)['changed_files'] == 1
+    assert Metadata(changed).audio['title'] == ['Song ']
+    reported = []
+    counts = fix_tags([changed, clean], rules, report=lambda *args: reported.append(args))
+    assert (counts['files'], counts['changed_files'], counts['changed_cells'], counts['errors']) == (2, 1, 3, 0)
+    assert [path for path, _, _ in reported] == [changed]
+    audio = Metadata(changed).audio
+    assert (audio['artist'], audio['title'], audio['tracknumber']) == (['Someone'], ['Song'], ['01'])
+    assert fix_tags([changed, clean], rules)['changed_files'] == 0
@@ -0,0 +1,68 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_scan.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    scan_roots ordering on a generated tree: natural path order, mtime order and tag order,
+    the latter served from the index once its sort keys are cached.
+"""
+import os
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.scan import natural_key, scan_roots
+
+
+def test_natural_key():
+    names = ['Track 10.mp3', 'track 9.mp3', 'Track 1.mp3', 'b.mp3']
+    assert sorted(names, key=natural_key) == ['b.mp3', 'Track 1.mp3', 'track 9.mp3', 'Track 10.mp3']
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'music'
+    (root / 'disc').mkdir(parents=True)
+    files = {
+        'track 10.mp3': {'album': ['b'], 'tracknumber': ['1']},
+        'track 9.mp3': {'album': ['a'], 'tracknumber': ['2/12']},
+        'track 1.mp3': {'album': ['a'], 'tracknumber': ['10']},
+        os.path.join('disc', 'x.mp3'): {'album': ['c']},
+    }
+    for idx, (name, tags) in enumerate(sorted(files.items())):
+        path = make_mp3(str(root / name), tags)
+        os.utime(path, (1000 + idx, 1000 + idx))
+    (root / 'notes.txt').write_text('skipped')
+    return str(root)
+
+
+def names(paths, root):
+    return [os.path.relpath(path, root) for path in paths]
+
+
+def test_scan_orders(tree):
+    assert names(scan_roots(tree, ['mp3'], order='path'), tree) == ['track 1.mp3', 'track 9.mp3', 'track 10.mp3']
+    assert names(scan_roots(tree, ['mp3'], recursive=True, order='mtime'), tree) == [
+        'track 1.mp3', 'track 10.mp3', 'track 9.mp3', os.path.join('disc', 'x.mp3')]
+    assert sorted(names(scan_roots(tree, ['mp3'], recursive=True), tree)) == sorted(
+        ['track 1.mp3', 'track 9.mp3', 'track 10.mp3', os.path.join('disc', 'x.mp3')])
+    with pytest.raises(ValueError):
+        list(scan_roots(tree, ['mp3'], order='size'))
+
+
+def test_tag_order_is_cached_in_the_index(tree, tmp_path):
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    try:
+        expected = ['track 9.mp3', 'track 1.mp3', 'track 10.mp3']  # album a: 2, 10; then album b
+        assert names(scan_roots(tree, ['mp3'], order='tags', index=index), tree) == expected
+        assert len(index.sort_keys(tree)) == 3
+        assert names(scan_roots(tree, ['mp3'], order='tags', index=index), tree) == expected
+    finally:
+        index.close()
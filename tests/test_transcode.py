@@ -0,0 +1,92 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_transcode.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    transcode() on synthetic tones from write_tone(). Runs that need libvlc are skipped without it.
+"""
+import os
+
+import vlc
+import pytest
+
+from vlc_analyze import transcode
+
+
+def _libvlc_available():
+    try:
+        instance = vlc.Instance(*transcode.INSTANCE_ARGS)
+    except Exception:
+        return False
+    if instance is None:
+        return False
+    instance.release()
+    return True
+
+
+needs_libvlc = pytest.mark.skipif(not _libvlc_available(), reason='libvlc is not available')
+
+
+@pytest.fixture
+def library(tmp_path):
+    src = tmp_path / 'src'
+    (src / 'album').mkdir(parents=True)
+    transcode.write_tone(str(src / 'album' / 'tone.wav'), seconds=0.5)
+    return src
+
+
+def all_files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), str(root)) for d, _, files in os.walk(str(root)) for f in files)
+
+
+@needs_libvlc
+def test_transcode_then_skip_up_to_date(library, tmp_path):
+    out = tmp_path / 'out'
+    files = [str(library / 'album' / 'tone.wav')]
+    counts = transcode.transcode(files, [str(library)], str(out), 'mp3', workers=1)
+    assert (counts['transcoded'], counts['errors']) == (1, 0)
+    dst = out / 'album' / 'tone.mp3'
+    assert dst.is_file() and dst.stat().st_size > 0
+    counts = transcode.transcode(files, [str(library)], str(out), 'mp3', workers=1)
+    assert (counts['transcoded'], counts['skipped'], counts['errors']) == (0, 1, 0)
+
+
+@needs_libvlc
+def test_failed_transcode_leaves_no_temp_file(library, tmp_path):
+    out = tmp_path / 'out'
+    broken = library / 'album' / 'broken.wav'
+    broken.write_bytes(b'RIFF\x00\x00\x00\x00WAVE' + b'\x00' * 64)
+    counts = transcode.transcode([str(broken)], [str(library)], str(out), 'mp3', workers=1)
+    assert (counts['transcoded'], counts['errors']) == (0, 1)
+    assert not out.exists() or all_files(out) == []  # neither the output nor its hidden temporary copy
+
+
+def test_outputs_below_a_scanned_root_are_not_sources(library):
+    out = library / 'mp3'
+    (out / 'album').mkdir(parents=True)
+    transcode.write_tone(str(out / 'album' / 'old.wav'), seconds=0.1)
+    converted = []
+    counts = transcode.transcode([str(library / 'album' / 'tone.wav'), str(out / 'album' / 'old.wav')],
+                                 [str(library)], str(out), 'mp3', dry_run=True,
+                                 report=lambda src, dst, error: converted.append((src, dst, error)))
+    assert counts['files'] == 1
+    assert converted == [(str(library / 'album' / 'tone.wav'), str(out / 'album' / 'tone.mp3'), None)]
+
+
+def test_unknown_format(library, tmp_path):
+    with pytest.raises(ValueError):
+        transcode.transcode([], [str(library)], str(tmp_path / 'out'), 'ogg')
+
+
+def test_write_tone(tmp_path):
+    import wave
+    path = str(tmp_path / 'tone.wav')
+    transcode.write_tone(path, seconds=0.25, rate=8000, channels=1)
+    with wave.open(path, 'rb') as f:
+        assert (f.getnchannels(), f.getsampwidth(), f.getframerate(), f.getnframes()) == (1, 2, 8000, 2000)
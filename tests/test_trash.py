@@ -0,0 +1,95 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_trash.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Trash on a temporary directory: batched moves, undo, purge, and the index / bookmark /
+    write-back state that goes away with a trashed file and comes back with undo.
+"""
+import os
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze import utils
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.metadata import load_metadata
+from vlc_analyze.trash import Trash
+from vlc_analyze.writeback import WriteBack
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    yield index
+    index.close()
+
+
+def make_files(tmp_path, count):
+    music = tmp_path / 'music'
+    music.mkdir()
+    return [make_mp3(str(music / 'track {}.mp3'.format(idx)), {'title': [str(idx)]}) for idx in range(count)]
+
+
+def test_undo_after_a_batched_move(tmp_path, index):
+    files = make_files(tmp_path, 3)
+    bookmarks = str(tmp_path / 'bookmarks')
+    for file in files:
+        index.record(load_metadata(file))
+    index.record_integrity([(files[1], 1, 2.0, 'a' * 64, 'b' * 64, 3.0)])
+    utils.bookmark_file(files[1], bookmarks)
+    saved = index.file_rows(files[1])
+    trash = Trash(str(tmp_path / 'trash'), index=index, bookmark_path=bookmarks, batch_size=8, batch_delay=0)
+    try:
+        for file in files[:2]:
+            trash.delete(file)
+        trash.flush()
+        assert not any(os.path.exists(file) for file in files[:2])
+        assert len(os.listdir(str(tmp_path / 'trash'))) == 2
+        assert files[1] not in index and index.integrity(files[1]) is None
+        assert utils.bookmarks_load(bookmarks) == set()
+
+        assert trash.undo() == files[1]  # most recent first
+        assert os.path.exists(files[1]) and not os.path.exists(files[0])
+        assert index.file_rows(files[1]) == saved
+        assert utils.bookmarks_load(bookmarks) == {files[1]}
+    finally:
+        trash.close()
+    assert os.listdir(str(tmp_path / 'trash')) == []  # files[0] purged on close
+    assert os.path.exists(files[1]) and os.path.exists(files[2])
+    assert trash.errors == []
+
+
+def test_undo_of_a_queued_delete_never_moves_the_file(tmp_path):
+    files = make_files(tmp_path, 1)
+    trash = Trash(str(tmp_path / 'trash'), bookmark_path=None, batch_delay=60)
+    try:
+        trash.delete(files[0])
+        assert trash.undo() == files[0]
+        assert trash.undo() is None
+    finally:
+        trash.close()
+    assert os.path.exists(files[0])
+
+
+def test_trashing_drops_queued_edits(tmp_path):
+    files = make_files(tmp_path, 1)
+    journal = str(tmp_path / 'journal.jsonl')
+    writer = WriteBack(journal, batch_delay=60)
+    trash = Trash(str(tmp_path / 'trash'), bookmark_path=None, batch_delay=0, writeback=writer)
+    try:
+        writer.submit(files[0], {'artist': ['someone']})
+        trash.delete(files[0])
+        trash.flush()
+        assert writer.pending() == {}
+    finally:
+        trash.close()
+        writer.close()
+    assert not os.path.exists(files[0])
+    assert writer.errors == []
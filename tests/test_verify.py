@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_verify.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    verify_files on generated files, with thread and process pools: new / ok / retagged /
+    corrupt outcomes against the digests kept in the index.
+"""
+import os
+
+import pytest
+
+from benchmarks.corpus import make_mp3
+from vlc_analyze import verify
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.metadata import Metadata
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    yield index
+    index.close()
+
+
+def outcomes(counts):
+    return {result: n for result, n in counts.items() if n and result in verify.RESULTS}
+
+
+def test_hash_file_splits_audio_from_tags(tmp_path):
+    path = make_mp3(str(tmp_path / 'a.mp3'), {'artist': ['a']})
+    audio, tags, size = verify.hash_file(path)
+    assert size == os.path.getsize(path)
+    Metadata(path).save({'artist': ['b']})
+    assert verify.hash_file(path)[:2] != (audio, tags)
+    assert verify.hash_file(path)[0] == audio
+
+
+@pytest.mark.parametrize('processes', [0, 2])
+def test_verify_outcomes(tmp_path, index, monkeypatch, processes):
+    monkeypatch.setattr(verify, 'PROCESS_BATCH', 3)  # several double buffered batches
+    files = [make_mp3(str(tmp_path / '{}.mp3'.format(idx)), {'title': [str(idx)]}) for idx in range(7)]
+    checkpoint = str(tmp_path / 'verify.json')
+    run = lambda **kwargs: verify.verify_files(files, index, checkpoint_path=checkpoint, processes=processes,
+                                               **kwargs)
+    assert outcomes(run()) == {verify.NEW: 7}
+    assert outcomes(run()) == {verify.UNCHANGED: 7}
+
+    Metadata(files[0]).save({'artist': ['b']})
+    stat = os.stat(files[1])
+    with open(files[1], 'rb+') as f:  # bit rot behind an unchanged mtime
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\xff')
+    os.utime(files[1], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    reported = []
+    counts = run(full=True, report=lambda path, result, error: reported.append((path, result)))
+    assert outcomes(counts) == {verify.OK: 5, verify.RETAGGED: 1, verify.CORRUPT: 1}
+    assert sorted(reported) == sorted([(files[0], verify.RETAGGED), (files[1], verify.CORRUPT)])
+    assert not os.path.exists(checkpoint)
@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+test_writeback.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    WriteBack and recover() on generated files: coalesced background writes, in place tag
+    rewrites, journal replay after a torn line or an interrupted write, and failed edits
+    kept for the next run.
+"""
+import os
+import json
+
+import pytest
+
+from benchmarks.corpus import make_mp3, make_flac
+from vlc_analyze import writeback
+from vlc_analyze.metadata import Metadata, read_fast
+from vlc_analyze.writeback import WriteBack, read_journal, recover, write_file
+
+
+def tags(path):
+    return {k: list(v) for k, v in Metadata(path).audio.items() if k in Metadata.possible_tags}
+
+
+@pytest.mark.parametrize('make, name', [(make_mp3, 'a.mp3'), (make_flac, 'a.flac')])
+def test_write_file_in_place_and_by_copy(tmp_path, make, name):
+    path = make(str(tmp_path / name), {'artist': ['a'], 'title': ['t']})
+    Metadata(path).save({'album': ['x']})  # leaves mutagen's default padding behind
+    size = os.path.getsize(path)
+    write_file(path, {'artist': ['b'], 'album': []})
+    assert tags(path) == {'artist': ['b'], 'title': ['t']}
+    assert os.path.getsize(path) == size  # fit into the padding
+    write_file(path, {'title': ['x' * 20000]})  # does not: rewritten through a copy
+    assert tags(path)['title'] == ['x' * 20000]
+    assert sorted(os.listdir(str(tmp_path))) == [name]
+
+
+def test_submitted_edits_are_coalesced_and_journal_compacted(tmp_path):
+    path = make_mp3(str(tmp_path / 'a.mp3'), {'artist': ['a']})
+    journal = str(tmp_path / 'journal.jsonl')
+    writer = WriteBack(journal, batch_delay=60)
+    writer.submit(path, {'artist': ['b']})
+    writer.submit(path, {'title': ['t'], 'artist': ['c']})
+    assert writer.pending(path) == {'artist': ['c'], 'title': ['t']}
+    writer.close()
+    assert writer.errors == []
+    assert tags(path) == {'artist': ['c'], 'title': ['t']}
+    assert os.path.getsize(journal) == 0
+
+
+def test_journal_replay_after_a_torn_line(tmp_path):
+    first = make_mp3(str(tmp_path / 'a.mp3'), {'artist': ['a']})
+    second = make_mp3(str(tmp_path / 'b.mp3'), {'artist': ['a']})
+    journal = str(tmp_path / 'journal.jsonl')
+    with open(journal, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 1, 'path': first, 'changes': {'artist': ['done']}}) + '\n')
+        f.write(json.dumps({'id': 2, 'path': second, 'changes': {'artist': ['b']}}) + '\n')
+        f.write(json.dumps({'done': [1]}) + '\n')
+        f.write('{"id": 3, "path": "' + first[:5])  # killed mid-append
+    assert read_journal(journal) == {second: {'artist': ['b']}}
+    assert recover(journal) == ({second: {'artist': ['b']}}, [])
+    assert tags(first) == {'artist': ['a']} and tags(second) == {'artist': ['b']}
+    assert read_journal(journal) == {}
+
+
+def test_recover_restores_an_interrupted_in_place_write(tmp_path):
+    path = make_mp3(str(tmp_path / 'a.mp3'), {'artist': ['a']})
+    with open(path, 'rb') as f:
+        region = f.read(read_fast(path).audio_start)
+    with open(writeback.backup_path(path), 'wb') as f:
+        f.write(region)
+    with open(path, 'rb+') as f:  # torn: the tag region is garbage
+        f.write(bytes(len(region)))
+    journal = str(tmp_path / 'journal.jsonl')
+    with open(journal, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'id': 1, 'path': path, 'changes': {'title': ['t']}}) + '\n')
+    recover(journal, replay=False)
+    assert tags(path) == {'artist': ['a']}
+    assert not os.path.exists(writeback.backup_path(path))
+
+
+def test_failed_edits_stay_journaled(tmp_path):
+    path = str(tmp_path / 'gone' / 'a.mp3')
+    journal = str(tmp_path / 'journal.jsonl')
+    writer = WriteBack(journal, batch_delay=0)
+    writer.submit(path, {'artist': ['b']})
+    writer.close()
+    assert [p for p, _ in writer.errors] == [path]
+    assert read_journal(journal) == {path: {'artist': ['b']}}
+    pending, failed = recover(journal)
+    assert [p for p, _ in failed] == [path]
+    os.mkdir(str(tmp_path / 'gone'))
+    make_mp3(path, {'artist': ['a']})
+    assert recover(journal) == ({path: {'artist': ['b']}}, [])
+    assert tags(path) == {'artist': ['b']}
+
+
+def test_discard_drops_journaled_edits(tmp_path):
+    path = str(tmp_path / 'gone.mp3')
+    journal = str(tmp_path / 'journal.jsonl')
+    writer = WriteBack(journal, batch_delay=0)
+    writer.submit(path, {'artist': ['b']})
+    writer.flush()  # fails: kept as leftover
+    writer.discard(path)
+    assert read_journal(journal) == {}
+    writer.close()
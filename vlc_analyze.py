@@ -17,11 +17,182 @@ import os
 import sys
 import vlc
 import time
-from itertools import chain
+from itertools import chain, dropwhile
+from contextlib import ExitStack
 
 from vlc_analyze import utils
-from vlc_analyze.shells import AudioShell
-from vlc_analyze import metadata
+from vlc_analyze import scan
+from vlc_analyze.shells import AudioShell, SAMPLE_SEGMENTS
+from vlc_analyze import telemetry
+from vlc_analyze.index import MetadataIndex
+from vlc_analyze.trash import Trash
+from vlc_analyze.instrument import STATS
+from vlc_analyze import bulk
+from vlc_analyze import rules
+from vlc_analyze import art
+from vlc_analyze.remote import RemoteServer
+from vlc_analyze import writeback
+from vlc_analyze import verify
+from vlc_analyze import transcode
+from vlc_analyze import libstats
+
+
+def iter_media(args, extensions, index=None, merge=None):
+    """
+    every media file named on the command line: directories are searched, files are passed through.
+    all roots are scanned concurrently, within the per-device --io-limit.
+    """
+    return scan.scan_roots(args.path, extensions, recursive=args.recursive, limits=scan.IOLimits.parse(args.io_limit),
+                           workers=args.workers, merge=merge or args.merge, order=args.order, index=index)
+
+
+def report_change(path, changes, error):
+    if error is not None:
+        sys.stdout.write('failed: {} ({})\n'.format(path, error))
+    else:
+        sys.stdout.write('{}: {}\n'.format(path, ', '.join(sorted(changes))))
+
+
+def report_art(path, error):
+    if error is not None:
+        sys.stdout.write('failed: {} ({})\n'.format(path, error))
+    else:
+        sys.stdout.write('{}\n'.format(path))
+
+
+def report_verify(path, result, error):
+    if error is not None:
+        sys.stdout.write('failed: {} ({})\n'.format(path, error))
+    else:
+        sys.stdout.write('{}: {}\n'.format(result, path))
+
+
+def report_transcode(path, output, error):
+    if error is not None:
+        sys.stdout.write('failed: {} ({})\n'.format(path, error))
+    else:
+        sys.stdout.write('{} -> {}\n'.format(path, output))
+
+
+def run_batch(args, index, extensions):
+    """
+    run the headless batch mode selected on the command line.
+    returns False if no batch mode was requested.
+    """
+    if args.export:
+        fields = utils.split_comma_str(args.fields) if args.fields else None
+        files = iter_media(args, extensions, index)  # sheet rows follow --order / --interleave
+        count = bulk.export_metadata(files, args.export, fields, index=index, report=report_change)
+        sys.stdout.write('exported {} files to {}\n'.format(count, args.export))
+    elif args.import_sheet:
+        counts = bulk.import_metadata(args.import_sheet, index=index, workers=args.workers,
+                                      dry_run=args.dry_run, report=report_change)
+        sys.stdout.write('{rows} rows, {changed_files} files / {changed_cells} cells changed, '
+                         '{errors} errors{dry}\n'.format(dry=' (dry run)' if args.dry_run else '', **counts))
+    elif args.fix_tags:
+        files = iter_media(args, extensions, index, merge='interleave')
+        counts = rules.fix_tags(files, rules.load_rules(args.fix_tags), index=index, workers=args.workers,
+                                dry_run=args.dry_run, report=report_change)
+        sys.stdout.write('{files} files, {changed_files} files / {changed_cells} tags changed, '
+                         '{errors} errors{dry}\n'.format(dry=' (dry run)' if args.dry_run else '', **counts))
+    elif args.extract_art or args.strip_art or args.restore_art:
+        cache = art.ArtCache(max_bytes=int(args.art_cache_size * 2 ** 20), pinned=index.stripped_art())
+        files = iter_media(args, extensions, index, merge='interleave')
+        if args.strip_art:
+            files = list(files)  # extracted first, then stripped
+        if args.restore_art:
+            counts = art.restore_art(files, cache, index, workers=args.workers, report=report_art)
+            sys.stdout.write('{files} files, {restored} restored, {errors} errors\n'.format(**counts))
+        else:
+            counts = art.extract_art(files, cache, index, workers=args.workers, report=report_art)
+            sys.stdout.write('{files} files, {pictures} pictures: {stored} new images ({stored_bytes} bytes), '
+                             '{saved_bytes} bytes deduplicated, {errors} errors\n'.format(**counts))
+            if args.strip_art:
+                counts = art.strip_duplicates(files, cache, index, workers=args.workers, dry_run=args.dry_run,
+                                              report=report_art)
+                sys.stdout.write('stripped shared art from {files} files ({stripped_bytes} bytes), {skipped} skipped, '
+                                 '{errors} errors{dry}\n'.format(dry=' (dry run)' if args.dry_run else '', **counts))
+    elif args.verify or args.full_audit:
+        rates = verify.WorkerRates()
+        files = iter_media(args, extensions, index, merge='interleave')
+        start = time.perf_counter()
+        counts = verify.verify_files(files, index, full=args.full_audit, workers=args.workers,
+                                     report=report_verify, rates=rates, processes=args.processes)
+        elapsed = time.perf_counter() - start
+        sys.stdout.write('{files} files, {bytes} bytes hashed in {elapsed:.1f}s: {new} new, {ok} ok, '
+                         '{unchanged} unchanged, {retagged} retagged, {modified} modified, {corrupt} corrupt, '
+                         '{resumed} resumed, {errors} errors\n'.format(elapsed=elapsed, **counts))
+        for worker, nbytes, rate in rates.rates():
+            sys.stdout.write('  {}: {} bytes, {:.1f} MB/s\n'.format(worker, nbytes, rate / 2 ** 20))
+    elif args.stats:
+        files = iter_media(args, extensions, index, merge='interleave')
+        stats = libstats.library_stats(files, index, workers=args.workers)
+        sys.stdout.write(libstats.format_stats(stats, args.stats_format))
+    elif args.transcode:
+        roots = [args.path] if isinstance(args.path, str) else args.path
+        files = iter_media(args, extensions, index, merge='interleave')
+        counts = transcode.transcode(files, roots, args.transcode, f_type=args.transcode_format,
+                                     bitrate=args.bitrate, workers=args.workers, dry_run=args.dry_run,
+                                     report=report_transcode)
+        sys.stdout.write('{files} files, {transcoded} transcoded ({bytes} bytes), {skipped} up to date, '
+                         '{errors} errors{dry}\n'.format(dry=' (dry run)' if args.dry_run else '', **counts))
+    else:
+        return False
+    sys.stdout.flush()
+    return True
+
+
+def run_shells(args, index, extensions):
+    """interactive mode: play / review everything named on the command line."""
+    BASE_PATH = os.getcwd()
+    bookmarks = set()
+    if args.clear:
+        utils.bookmark_clear_mark()
+        sys.stdout.write('\nCleared Bookmarks!\n')
+        sys.stdout.flush()
+    else:
+        bookmarks = utils.bookmarks_load()
+        if bookmarks:
+            for bookmark in bookmarks:
+                comm_path = os.path.commonprefix([BASE_PATH, bookmark])
+                relpath = bookmark[len(comm_path):]
+                base_name = os.path.basename(bookmark)
+                bk_msg = '\nExisting bookmark found: {}\nRelativePath: .{}\n'
+                sys.stdout.write(bk_msg.format(base_name, relpath))
+            sys.stdout.write('\nRun again with the -c flag to clear bookmarks\n')
+    sys.stdout.write('Using vlc: {}\n'.format(str(vlc.libvlc_get_version(), 'utf-8')))
+    sys.stdout.flush()
+    writer = writeback.WriteBack(index=index)
+    trash = Trash(index=index, writeback=writer)
+    remote = None
+    try:
+        if args.remote is not None:
+            remote = RemoteServer(args.remote or None).start()
+            sys.stdout.write('remote control on {}\n'.format(remote))
+        roots = [args.path] if isinstance(args.path, str) else args.path
+        sys.stdout.write('\nnow searching in: {} {}\n'.format(', '.join(os.path.abspath(path) for path in roots),
+                                                             '(recursive)' if args.recursive else ''))
+        sys.stdout.flush()
+        files = iter_media(args, extensions, index)
+        if args.unreviewed:
+            files = index.unreviewed(files)
+        if bookmarks:
+            files = dropwhile(lambda file: file not in bookmarks, files)  # resume at the first bookmark
+        first = next(files, None)
+        if first is None:
+            sys.stdout.write('No Files Found.\n')
+            sys.stdout.flush()
+            return
+        shell = AudioShell(media_files=chain([first], files), interact=args.interact, index=index, trash=trash,
+                           remote=remote, writeback=writer, sample=args.sample, segments=args.segments)
+        shell.cmdloop()
+    finally:
+        if remote is not None:
+            remote.close()
+        trash.close()  # before the writer: trashed files drop their queued edits
+        writer.close()
+        for path, error in writer.errors:
+            sys.stdout.write('failed to save tags: {} ({}), kept in the journal\n'.format(path, error))
 
 
 if __name__ == '__main__':
@@ -44,58 +215,108 @@ if __name__ == '__main__':
                         )
     parser.add_argument('--recursive', '-r', action='store_true', help='flag that sets recursive file search')
     parser.add_argument('--clear', '-c', action='store_true', help='clears bookmarks')
+    parser.add_argument('--unreviewed', '-u', action='store_true',
+                        help='only queue files that were never played, or changed since they were last played.')
+    parser.add_argument('--timing', action='store_true',
+                        help='record command/track timings. view them with the "stats" shell command.')
+    parser.add_argument('--profile', type=str, metavar='PSTATS_FILE',
+                        help='profile the whole session with cProfile and dump pstats data to this file.')
+    parser.add_argument('--telemetry', type=str, metavar='FILE',
+                        help=('periodically write progress metrics to this file. '
+                              'files ending in .prom are written for a prometheus textfile collector, '
+                              'anything else gets JSON lines.'))
+    parser.add_argument('--telemetry-interval', type=float, default=10.0, metavar='SECONDS',
+                        help='seconds between telemetry writes.')
+    parser.add_argument('--remote', type=str, nargs='?', const='', metavar='ADDRESS',
+                        help=('accept shell commands from local clients (python -m vlc_analyze.remote) '
+                              'on a unix socket path or localhost host:port.'))
+    parser.add_argument('--io-limit', action='append', metavar='N | PATH=N',
+                        help=('directories listed at once per device while scanning; PATH=N sets the device '
+                              'holding PATH only. may be repeated. default: 1 on spinning disks, '
+                              'otherwise unlimited.'))
+    parser.add_argument('--interleave', dest='merge', action='store_const', const='interleave', default='ordered',
+                        help='queue files from all paths as they are found instead of path by path.')
+    parser.add_argument('--order', type=str, choices=scan.ORDERS,
+                        help=('play / process files in a deterministic order, directory by directory: '
+                              'path (natural sort), tags (album, disc, track) or mtime. '
+                              'default: the order files are found in.'))
+    parser.add_argument('--discard-journal', action='store_true',
+                        help='drop tag edits an interrupted session left unsaved instead of replaying them.')
+    parser.add_argument('--sample', type=float, metavar='SECONDS',
+                        help='review mode: only play SECONDS long snippets of each track (see --segments).')
+    parser.add_argument('--segments', type=str, default=','.join(SAMPLE_SEGMENTS),
+                        help='comma separated snippets played with --sample: any of {}.'.format(
+                            ', '.join(SAMPLE_SEGMENTS)))
+    parser.add_argument('--workers', '-w', type=int, default=4,
+                        help='worker threads for scanning and batch modes.')
+    parser.add_argument('--export', type=str, metavar='SHEET',
+                        help='export tags of the selected files to a .csv (or .parquet) sheet and exit.')
+    parser.add_argument('--import', dest='import_sheet', type=str, metavar='SHEET',
+                        help='apply edited cells of an exported sheet back onto the files and exit.')
+    parser.add_argument('--fix-tags', type=str, metavar='RULES_JSON',
+                        help='run the tag normalization rules in this json config over the selected files and exit.')
+    parser.add_argument('--extract-art', action='store_true',
+                        help='copy embedded cover art of the selected files into the art cache and exit.')
+    parser.add_argument('--strip-art', action='store_true',
+                        help=('like --extract-art, then strip art shared by several files from those files. '
+                              'the cache keeps a copy; undo with --restore-art.'))
+    parser.add_argument('--restore-art', action='store_true',
+                        help='re-embed art stripped by --strip-art into the selected files and exit.')
+    parser.add_argument('--art-cache-size', type=float, default=art.DEFAULT_MAX_BYTES / 2 ** 20, metavar='MB',
+                        help='size limit of the art cache; least recently used images are evicted first.')
+    parser.add_argument('--verify', action='store_true',
+                        help=('hash the audio and tags of the selected files into the index, re-hashing only files '
+                              'whose size/mtime changed, report changes and exit. interrupted runs resume.'))
+    parser.add_argument('--full-audit', action='store_true',
+                        help='like --verify, but re-hash every file to catch content that changed behind its mtime.')
+    parser.add_argument('--processes', type=int, default=0, metavar='N',
+                        help=('with --verify / --full-audit: hash in N worker processes sharing one library '
+                              'snapshot instead of --workers threads.'))
+    parser.add_argument('--stats', action='store_true',
+                        help=('report track counts / durations per folder, formats, bitrates, missing tags and the '
+                              'largest files of the selected files from the index and exit. '
+                              'files not indexed yet are parsed and indexed.'))
+    parser.add_argument('--stats-format', type=str, default='text', choices=('text', 'json'),
+                        help='output format of --stats.')
+    parser.add_argument('--transcode', type=str, metavar='OUT_DIR',
+                        help=('convert the selected files with libvlc into the same directory tree below OUT_DIR, '
+                              'copying their tags, and exit. outputs newer than their source are skipped.'))
+    parser.add_argument('--transcode-format', type=str, default='mp3', choices=sorted(transcode.FORMATS),
+                        help='output format of --transcode.')
+    parser.add_argument('--bitrate', type=int, default=transcode.DEFAULT_BITRATE, metavar='KBPS',
+                        help='audio bitrate of --transcode outputs.')
+    parser.add_argument('--fields', type=str,
+                        help='comma separated tag fields to export (default: all known fields).')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='with batch modes that modify files: report what would change without writing.')
     # parser.add_argument('--verbose', '-v', action="store_true", help='prints a more detailed output.')
     # parser.add_argument('--quiet', '-q', action="store_true", help='supresses console output.')
 
-    BASE_PATH = os.getcwd()
     args = parser.parse_args()
-    # print(vars(args))
-    if args.clear:
-        utils.bookmark_clear_mark()
-        sys.stdout.write('\nCleared Bookmarks!\n')
+    args.segments = tuple(utils.split_comma_str(args.segments))
+    if set(args.segments) - set(SAMPLE_SEGMENTS):
+        parser.error('unknown segments: {}'.format(', '.join(sorted(set(args.segments) - set(SAMPLE_SEGMENTS)))))
+    extensions = utils.split_comma_str(','.join(args.extension) if isinstance(args.extension, list)
+                                       else args.extension)
+
+    STATS.enabled = args.timing
+    index = MetadataIndex()
+    recovered, failed = writeback.recover(replay=not args.discard_journal, index=index)
+    if recovered:
+        sys.stdout.write('{} {} unsaved tag edits from an interrupted session\n'.format(
+            'discarded' if args.discard_journal else 'replayed', len(recovered) - len(failed)))
+        for path, error in failed:
+            sys.stdout.write('could not replay tags of {} ({}); kept for the next run\n'.format(path, error))
+        sys.stdout.flush()
+    with ExitStack() as session:
+        session.callback(index.close)
+        if args.profile:
+            session.enter_context(STATS.profile(args.profile))
+        if args.telemetry:
+            session.enter_context(telemetry.emitting(args.telemetry, interval=args.telemetry_interval))
+        if not run_batch(args, index, extensions):
+            run_shells(args, index, extensions)
+    if args.timing:
+        sys.stdout.write(STATS.report())
         sys.stdout.flush()
-    else:
-        bookmarks = utils.bookmarks_load()
-        if bookmarks:
-            for bookmark in bookmarks:
-                comm_path = os.path.commonprefix([BASE_PATH, bookmark])
-                relpath = bookmark[len(comm_path):]
-                base_name = os.path.basename(bookmark)
-                bk_msg = '\nExisting bookmark found: {}\nRelativePath: .{}\n'
-                sys.stdout.write(bk_msg.format(base_name, relpath))
-            sys.stdout.write('\nRun again with the -c flag to clear bookmarks\n')
-        else:
-            del bookmarks
-    sys.stdout.write('Using vlc: {}\n'.format(str(vlc.libvlc_get_version(), 'utf-8')))
-    sys.stdout.flush()
-    # print(vars(args))
-    # print(bookmarks)
-    for path in args.path:
-        if os.path.isdir(path):
-            sys.stdout.write('\nnow searching in: {} {}\n'.format(os.path.abspath(path), '(recursive)' if args.recursive else ''))
-            sys.stdout.flush()
-            files = utils.multiple_file_types(path, utils.split_comma_str(args.extension),
-                                              recursion=args.recursive)
-            shell = AudioShell(media_files=files, interact=args.interact)
-            try:
-                while bookmarks:
-                    try:
-                        file = next(files)
-                        if file in bookmarks:
-                            shell.file_list = chain([file], files)
-                            shell.cmdloop()
-                            bookmarks.discard(file)
-                    except StopIteration:
-                        break
-            except NameError:
-                try:
-                    shell.cmdloop()
-                except (NameError, StopIteration):
-                    sys.stdout.write('No Files Found.\n')
-                    sys.stdout.flush()
-        else:
-            sys.stdout.write(path+'\n')
-            sys.stdout.flush()
-            shell = AudioShell([path], interact=args.interact)
-            shell.cmdloop()
     sys.exit(0)
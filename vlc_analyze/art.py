@@ -0,0 +1,446 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+art.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Embedded cover art: extraction, a content-addressed on-disk cache and
+    optional stripping of duplicated art from the files themselves.
+
+    Pictures are sliced straight out of a memory map of the tag block, so only the
+    pages holding the image are read and nothing is copied until a new image is
+    written to the cache. Each unique image (by blake2b digest) is stored once;
+    the index remembers which file referenced which image, which is what lets
+    stripped art be put back later.
+"""
+import os as _os
+import mmap as _mmap
+import threading as _threading
+from hashlib import blake2b as _blake2b
+from collections import namedtuple as _namedtuple, OrderedDict as _OrderedDict
+from contextlib import contextmanager as _contextmanager
+
+from . import utils
+from .metadata import file_type, load_metadata, _syncsafe, _ID3_ENCODINGS, _FAST_ERRORS
+
+ART_DIRNAME = '.vlc_analyze_art'
+ART_DIR = _os.path.join(utils.BOOKMARK_PATH, ART_DIRNAME)
+DEFAULT_MAX_BYTES = 512 * 2 ** 20
+
+_EXTENSIONS = {'image/jpeg': '.jpg',
+               'image/jpg': '.jpg',
+               'image/png': '.png',
+               'image/gif': '.gif',
+               'image/bmp': '.bmp',
+               'image/webp': '.webp',
+               }
+
+# data is a memoryview into the file while inside pictures(), bytes otherwise
+Picture = _namedtuple('Picture', 'mime ptype desc data')
+
+
+def digest(data):
+    return _blake2b(data, digest_size=20).hexdigest()
+
+
+# extraction
+def _terminator(buf, pos, encoding):
+    """offset of the string terminator at or after pos (two aligned NULs for utf-16)."""
+    if encoding in (1, 2):
+        start = pos
+        while True:
+            pos = buf.find(b'\x00\x00', pos)
+            if pos < 0 or not (pos - start) % 2:
+                return pos
+            pos += 1
+    return buf.find(b'\x00', pos)
+
+
+def _apic(mv):
+    """Picture from the body of an APIC frame."""
+    encoding = mv[0]
+    head = bytes(mv[:min(len(mv), 1024)])  # mime + description live in the first few bytes
+    mime_end = head.index(b'\x00', 1)
+    mime = str(head[1:mime_end], 'latin-1')
+    ptype = head[mime_end + 1]
+    desc_start = mime_end + 2
+    desc_end = _terminator(head, desc_start, encoding)
+    if desc_end < 0:
+        raise ValueError('unterminated APIC description')
+    desc = str(head[desc_start:desc_end], _ID3_ENCODINGS[encoding])
+    return Picture(mime, ptype, desc, mv[desc_end + (2 if encoding in (1, 2) else 1):])
+
+
+def _id3_pictures(mv):
+    if mv[:3] != b'ID3':
+        return []
+    version, flags = mv[3], mv[5]
+    if version not in (3, 4) or flags & 0x80:
+        return None
+    end = 10 + _syncsafe(mv[6:10])
+    pos = 10
+    if flags & 0x40:
+        pos += _syncsafe(mv[10:14]) if version == 4 else 4 + int.from_bytes(mv[10:14], 'big')
+    pictures = []
+    while pos + 10 <= end and mv[pos] != 0:
+        frame_id = bytes(mv[pos:pos + 4])
+        size = _syncsafe(mv[pos + 4:pos + 8]) if version == 4 else int.from_bytes(mv[pos + 4:pos + 8], 'big')
+        fmt_flags = mv[pos + 9]
+        pos += 10
+        if frame_id == b'APIC' and size:
+            if fmt_flags & (0x4f if version == 4 else 0xe0):
+                return None
+            pictures.append(_apic(mv[pos:pos + size]))
+        pos += size
+    return pictures
+
+
+def _flac_pictures(mv):
+    if mv[:4] != b'fLaC':
+        return None
+    pictures = []
+    pos = 4
+    last = False
+    while not last:
+        last = bool(mv[pos] & 0x80)
+        block_type = mv[pos] & 0x7f
+        block_size = int.from_bytes(mv[pos + 1:pos + 4], 'big')
+        pos += 4
+        if block_type == 6:  # PICTURE
+            cursor = pos
+            ptype = int.from_bytes(mv[cursor:cursor + 4], 'big')
+            size = int.from_bytes(mv[cursor + 4:cursor + 8], 'big')
+            mime = str(mv[cursor + 8:cursor + 8 + size], 'ascii')
+            cursor += 8 + size
+            size = int.from_bytes(mv[cursor:cursor + 4], 'big')
+            desc = str(mv[cursor + 4:cursor + 4 + size], 'utf-8')
+            cursor += 4 + size + 16  # width, height, depth, colors
+            size = int.from_bytes(mv[cursor:cursor + 4], 'big')
+            pictures.append(Picture(mime, ptype, desc, mv[cursor + 4:cursor + 4 + size]))
+        pos += block_size
+    return pictures
+
+
+_PICTURE_PARSERS = {'mp3': _id3_pictures,
+                    'flac': _flac_pictures,
+                    }
+
+
+def _mutagen_pictures(path, f_type):
+    if f_type == 'flac':
+        from mutagen.flac import FLAC
+        return [Picture(p.mime, int(p.type), p.desc, p.data) for p in FLAC(path).pictures]
+    from mutagen.id3 import ID3, ID3NoHeaderError
+    try:
+        frames = ID3(path).getall('APIC')
+    except ID3NoHeaderError:
+        return []
+    return [Picture(p.mime, int(p.type), p.desc, p.data) for p in frames]
+
+
+def _release(pictures):
+    for picture in pictures:
+        if isinstance(picture.data, memoryview):
+            picture.data.release()
+
+
+@_contextmanager
+def pictures(path, f_type=None):
+    """
+    embedded pictures of path, valid inside the with block.
+    picture data is a zero-copy view into the file where the fast path applies;
+    unusual tag layouts are read through mutagen instead.
+    """
+    if f_type is None:
+        f_type = file_type(path)
+    parser = _PICTURE_PARSERS.get(f_type)
+    if parser is None:
+        yield []
+        return
+    with open(path, 'rb') as f:
+        try:
+            mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            yield []
+            return
+    with mm, memoryview(mm) as mv:
+        try:
+            found = parser(mv)
+        except _FAST_ERRORS:
+            found = None
+        if found is None:
+            found = _mutagen_pictures(path, f_type)
+        try:
+            yield found
+        finally:
+            _release(found)
+
+
+# cache
+class ArtCache:
+    """
+    Content-addressed image store: <cache_dir>/<digest[:2]>/<digest><ext>.
+    Least recently used images are evicted once the cache grows past max_bytes;
+    pinned digests (art stripped from files, see MetadataIndex.stripped_art) are never evicted.
+    The last-use order survives restarts through the files' mtimes.
+    """
+
+    def __init__(self, cache_dir=ART_DIR, max_bytes=DEFAULT_MAX_BYTES, pinned=()):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.pinned = set(pinned)
+        self._lock = _threading.Lock()
+        self._entries = _OrderedDict()  # digest -> (path, size), least recently used first
+        _os.makedirs(cache_dir, exist_ok=True)
+        found = []
+        for shard in _os.scandir(cache_dir):
+            if shard.is_dir():
+                for entry in _os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        found.append((stat.st_mtime, _os.path.splitext(entry.name)[0], entry.path, stat.st_size))
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self.size += size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def path(self, key):
+        """file holding the image, or None if it is not cached. counts as a use."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            _os.utime(entry[0])
+        except OSError:
+            pass
+        return entry[0]
+
+    def get(self, key):
+        path = self.path(key)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def put(self, data, mime=None):
+        """store data (any buffer) unless already cached; returns (digest, True if newly stored)."""
+        key = digest(data)
+        if self.path(key) is not None:
+            return key, False
+        shard = _os.path.join(self.cache_dir, key[:2])
+        _os.makedirs(shard, exist_ok=True)
+        path = _os.path.join(shard, key + _EXTENSIONS.get((mime or '').lower(), '.img'))
+        tmp = '{}.{}.tmp'.format(path, _threading.get_ident())
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        _os.replace(tmp, path)
+        with self._lock:
+            if key in self._entries:
+                return key, False
+            self._entries[key] = (path, len(data))
+            self.size += len(data)
+        self.evict()
+        return key, True
+
+    def pin(self, keys):
+        with self._lock:
+            self.pinned.update(keys)
+
+    def evict(self):
+        """drop least recently used, unpinned images until the cache fits max_bytes."""
+        removed = []
+        with self._lock:
+            for key in list(self._entries):
+                if self.size <= self.max_bytes:
+                    break
+                if key in self.pinned:
+                    continue
+                path, size = self._entries.pop(key)
+                self.size -= size
+                removed.append(path)
+        for path in removed:
+            try:
+                _os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(removed)
+
+
+# batch operations
+def extract_file(path, cache, index=None):
+    """cache every picture of path and record the references; returns [(digest, newly stored, size)]."""
+    stored = []
+    with pictures(path) as found:
+        for picture in found:
+            key, new = cache.put(picture.data, picture.mime)
+            stored.append((key, new, len(picture.data), picture))
+        refs = [(key, picture.mime, picture.ptype, picture.desc) for key, _, _, picture in stored]
+    if index is not None:
+        index.record_art(path, refs)
+    return [(key, new, size) for key, new, size, _ in stored]
+
+
+def extract_art(files, cache, index=None, workers=4, report=None):
+    """
+    extract embedded art of files into the cache in parallel.
+
+    :param report: optional callable(path, exception) for failed files.
+    returns a dict of counters; saved_bytes is the embedded size that deduplicated onto cached images.
+    """
+    counts = {'files': 0, 'pictures': 0, 'stored': 0, 'stored_bytes': 0, 'saved_bytes': 0, 'errors': 0}
+
+    def process(file):
+        return extract_file(_os.path.abspath(file), cache, index)
+
+    for file, stored, error in utils.parallel_imap(process, files, workers):
+        counts['files'] += 1
+        if error is not None:
+            counts['errors'] += 1
+            if report is not None:
+                report(file, error)
+            continue
+        for _, new, size in stored:
+            counts['pictures'] += 1
+            if new:
+                counts['stored'] += 1
+                counts['stored_bytes'] += size
+            else:
+                counts['saved_bytes'] += size
+    return counts
+
+
+def _strip_file(path, keys, save=True):
+    """
+    remove the embedded pictures of path whose digest is in keys; pictures added since they were
+    cached (any other digest) are left alone. returns the digests removed, the file is only saved if any were.
+    """
+    removed = set()
+    if file_type(path) == 'flac':
+        from mutagen.flac import FLAC
+        audio = FLAC(path)
+        kept = []
+        for picture in audio.pictures:
+            key = digest(picture.data)
+            if key in keys:
+                removed.add(key)
+            else:
+                kept.append(picture)
+        if removed and save:
+            audio.clear_pictures()
+            for picture in kept:
+                audio.add_picture(picture)
+            audio.save()
+    else:
+        from mutagen.id3 import ID3
+        tags = ID3(path)
+        for frame_key, frame in list(tags.items()):
+            if frame.FrameID == 'APIC':
+                key = digest(frame.data)
+                if key in keys:
+                    removed.add(key)
+                    del tags[frame_key]
+        if removed and save:
+            tags.save(v2_version=4 if tags.version[1] == 4 else 3)
+    return removed
+
+
+def _embed_file(path, refs, cache):
+    if file_type(path) == 'flac':
+        from mutagen.flac import FLAC, Picture as _FlacPicture
+        audio = FLAC(path)
+        for ref in refs:
+            picture = _FlacPicture()
+            picture.type, picture.mime, picture.desc = ref['ptype'], ref['mime'], ref['desc']
+            picture.data = cache.get(ref['digest'])
+            audio.add_picture(picture)
+        audio.save()
+    else:
+        from mutagen.id3 import ID3, APIC, ID3NoHeaderError
+        try:
+            tags = ID3(path)
+        except ID3NoHeaderError:
+            tags = ID3()
+        for ref in refs:
+            tags.add(APIC(encoding=3, mime=ref['mime'], type=ref['ptype'], desc=ref['desc'],
+                          data=cache.get(ref['digest'])))
+        tags.save(path, v2_version=4 if tags.version[1] == 4 else 3)
+
+
+def strip_duplicates(files, cache, index, min_refs=2, workers=4, dry_run=False, report=None):
+    """
+    strip embedded art from those of files whose images are shared by at least min_refs indexed files.
+    only pictures still matching a cached image are removed; they stay pinned in the cache and
+    referenced in the index, see restore_art. the files' mtimes advance like for any other edit.
+
+    :param report: optional callable(path, exception) per stripped / failed file.
+    """
+    counts = {'files': 0, 'skipped': 0, 'stripped_bytes': 0, 'errors': 0}
+    wanted = {_os.path.abspath(file) for file in files}
+    candidates = [(path, keys) for path, keys in index.shared_art(min_refs) if path in wanted]
+    cache.pin(key for _, keys in candidates for key in keys)
+
+    def process(item):
+        path, keys = item
+        size = _os.path.getsize(path)
+        removed = _strip_file(path, {key for key in keys if key in cache}, save=not dry_run)
+        if not removed or dry_run:
+            return removed, 0
+        index.mark_art_stripped(path, True, removed)
+        index.record(load_metadata(path))
+        return removed, size - _os.path.getsize(path)
+
+    for (path, _), result, error in utils.parallel_imap(process, candidates, workers):
+        if error is None and not result[0]:
+            counts['skipped'] += 1  # its art changed since it was cached
+            continue
+        counts['files'] += 1
+        if error is not None:
+            counts['errors'] += 1
+        else:
+            counts['stripped_bytes'] += result[1]
+        if report is not None:
+            report(path, error)
+    return counts
+
+
+def restore_art(files, cache, index, workers=4, report=None):
+    """re-embed art previously stripped from files, from the cache."""
+    counts = {'files': 0, 'restored': 0, 'errors': 0}
+
+    def process(file):
+        path = _os.path.abspath(file)
+        refs = [ref for ref in index.art(path) if ref['stripped']]
+        if not refs:
+            return 0
+        missing = [ref['digest'] for ref in refs if ref['digest'] not in cache]
+        if missing:
+            raise LookupError('cached art {} of {} was lost'.format(', '.join(missing), path))
+        _embed_file(path, refs, cache)
+        index.mark_art_stripped(path, False)
+        index.record(load_metadata(path))
+        return 1
+
+    for file, restored, error in utils.parallel_imap(process, files, workers):
+        counts['files'] += 1
+        if error is not None:
+            counts['errors'] += 1
+        else:
+            counts['restored'] += restored
+        if report is not None and (error is not None or restored):
+            report(file, error)
+    return counts
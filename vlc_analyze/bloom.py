@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+bloom.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Minimal Bloom filter for fast "definitely not seen" membership tests.
+"""
+import math as _math
+from hashlib import blake2b as _blake2b
+
+
+class BloomFilter:
+    """
+    Bloom filter over bytes keys. A miss is exact; a hit may be a false positive
+    (at roughly `error_rate` once `capacity` keys were added), so back it with an exact lookup.
+    """
+    __slots__ = ('size', 'hashes', 'bits', 'count')
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * _math.log(error_rate) / _math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * _math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_keys(cls, keys, capacity=None, error_rate=0.01):
+        keys = list(keys) if capacity is None else keys
+        bloom = cls(len(keys) if capacity is None else capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key):
+        digest = _blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return ((h1 + idx * h2) % size for idx in range(self.hashes))
+
+    def add(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        return self.count
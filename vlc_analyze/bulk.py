@@ -0,0 +1,199 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+bulk.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Bulk metadata export / import for round-tripping tags through spreadsheets.
+    Both directions stream row by row (csv) or batch by batch (parquet, needs pyarrow),
+    so the sheet never has to fit in memory. Multi-valued tags share one cell, values
+    separated by ';'.
+"""
+import os as _os
+import csv as _csv
+import itertools as _it
+
+from . import utils
+from .metadata import Metadata, load_metadata
+
+PATH_COLUMN = 'path'
+EXPORT_FIELDS = tuple(sorted(Metadata.possible_tags))
+PARQUET_BATCH = 4096
+VALUE_SEPARATOR = ';'  # between the values of a multi-valued tag in one cell
+
+
+def file_format(path, fmt=None):
+    if fmt is not None:
+        return fmt
+    return 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def current_tags(path, index=None):
+    """
+    tags of path as {field: [values]}: from the index when its entry is still fresh,
+    otherwise parsed (fast path first) and written back to the index.
+    """
+    stat = _os.stat(path)
+    if index is not None:
+        entry = index.get_fresh(path, stat)
+        if entry is not None:
+            return entry['tags']
+    meta = load_metadata(path)
+    if index is not None:
+        index.record(meta, stat)
+    return {k: list(v) for k, v in meta.get_audio_metadata() if k in Metadata.possible_tags}
+
+
+def join_values(values):
+    """one sheet cell from a tag's values: joined by ';', with '\\' and ';' inside values backslash-escaped."""
+    return VALUE_SEPARATOR.join(value.replace('\\', '\\\\').replace(VALUE_SEPARATOR, '\\' + VALUE_SEPARATOR)
+                                for value in values)
+
+
+def split_values(cell):
+    """inverse of join_values: the stripped, non-empty values of a sheet cell."""
+    values, current, chars = [], [], iter(cell)
+    for char in chars:
+        if char == '\\':
+            current.append(next(chars, ''))
+        elif char == VALUE_SEPARATOR:
+            values.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    values.append(''.join(current))
+    return [value.strip() for value in values if value.strip()]
+
+
+def diff_row(row, tags):
+    """
+    changed cells of a sheet row against the current tags.
+    returns {field: [values]}; an emptied cell maps to [] (delete the tag).
+    """
+    changes = {}
+    for field, cell in row.items():
+        if field not in Metadata.possible_tags or cell is None:
+            continue
+        values = split_values(cell)
+        if values != [value.strip() for value in tags.get(field, ()) if value.strip()]:
+            changes[field] = values
+    return changes
+
+
+def apply_changes(path, changes, index=None):
+    """write changed tags to path through Metadata.sanitize/save."""
+    meta = Metadata(path)
+    for field in [k for k, v in changes.items() if not v]:
+        if field in meta.audio:
+            del meta.audio[field]
+    meta.save({k: v for k, v in changes.items() if v})
+    if index is not None:
+        index.record(meta)
+
+
+# export
+def export_rows(files, fields=EXPORT_FIELDS, index=None, report=None):
+    """
+    yield one list per file: the absolute path followed by the values of each field (see join_values).
+    files that cannot be read are skipped and passed to report(path, None, exception).
+    """
+    for file in files:
+        path = _os.path.abspath(file)
+        try:
+            tags = current_tags(path, index)
+        except Exception as e:
+            if report is not None:
+                report(path, None, e)
+            continue
+        yield [path] + [join_values(tags.get(field, ())) for field in fields]
+
+
+def export_metadata(files, out_path, fields=None, index=None, fmt=None, report=None):
+    """
+    stream tags of files to a csv or parquet sheet; returns the number of rows written.
+
+    :param report: optional callable(path, None, exception) for files that could not be read.
+    """
+    fields = EXPORT_FIELDS if not fields else tuple(fields)
+    header = (PATH_COLUMN,) + fields
+    rows = export_rows(files, fields, index, report)
+    if file_format(out_path, fmt) == 'parquet':
+        return _write_parquet(out_path, header, rows)
+    count = 0
+    with open(out_path, 'w', newline='', encoding='utf-8') as out:
+        writer = _csv.writer(out)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('parquet sheets need pyarrow (pip install pyarrow); use a .csv file instead')
+    return pyarrow, pyarrow.parquet
+
+
+def _write_parquet(out_path, header, rows):
+    pa, pq = _pyarrow()
+    schema = pa.schema([(name, pa.string()) for name in header])
+    count = 0
+    with pq.ParquetWriter(out_path, schema) as writer:
+        while True:
+            batch = list(_it.islice(rows, PARQUET_BATCH))
+            if not batch:
+                break
+            columns = [pa.array(column, pa.string()) for column in zip(*batch)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(batch)
+    return count
+
+
+# import
+def read_rows(in_path, fmt=None):
+    """stream sheet rows as dicts."""
+    if file_format(in_path, fmt) == 'parquet':
+        _, pq = _pyarrow()
+        for batch in pq.ParquetFile(in_path).iter_batches(batch_size=PARQUET_BATCH):
+            yield from batch.to_pylist()
+    else:
+        with open(in_path, newline='', encoding='utf-8') as sheet:
+            yield from _csv.DictReader(sheet)
+
+
+def import_metadata(in_path, index=None, workers=4, dry_run=False, fmt=None, report=None):
+    """
+    apply edited cells of a sheet back onto the files.
+    unchanged files are compared against the index and never re-parsed or rewritten.
+
+    :param report: optional callable(path, changes, exception) called per changed / failed row.
+    returns a dict of counters.
+    """
+    counts = {'rows': 0, 'changed_files': 0, 'changed_cells': 0, 'errors': 0}
+
+    def process(row):
+        path = row[PATH_COLUMN]
+        changes = diff_row(row, current_tags(path, index))
+        if changes and not dry_run:
+            apply_changes(path, changes, index)
+        return changes
+
+    for row, changes, error in utils.parallel_imap(process, read_rows(in_path, fmt), workers):
+        counts['rows'] += 1
+        if error is not None:
+            counts['errors'] += 1
+        elif changes:
+            counts['changed_files'] += 1
+            counts['changed_cells'] += len(changes)
+        if report is not None and (error is not None or changes):
+            report(row.get(PATH_COLUMN), changes, error)
+    return counts
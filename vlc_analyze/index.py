@@ -0,0 +1,452 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+index.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Persistent metadata index (sqlite) keyed by absolute file path.
+    Holds the size, mtime, length and tags of every file the tools have parsed,
+    so later runs can work from the index instead of re-reading the files.
+"""
+import os as _os
+import json as _json
+import time as _time
+import sqlite3 as _sqlite3
+import threading as _threading
+from contextlib import contextmanager as _contextmanager
+
+from .bloom import BloomFilter
+from .utils import BOOKMARK_PATH
+from .metadata import Metadata
+
+INDEX_FILENAME = 'vlc_analyze_index.db'
+INDEX_FILE = _os.path.join(BOOKMARK_PATH, INDEX_FILENAME)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    length REAL,
+    format TEXT,
+    tags TEXT
+);
+CREATE TABLE IF NOT EXISTS play_paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS play_log (
+    track INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    listened INTEGER NOT NULL,
+    flags INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS play_log_track ON play_log (track);
+CREATE TABLE IF NOT EXISTS play_stats (
+    track INTEGER PRIMARY KEY,
+    mtime REAL NOT NULL,
+    plays INTEGER NOT NULL DEFAULT 0,
+    skips INTEGER NOT NULL DEFAULT 0,
+    finishes INTEGER NOT NULL DEFAULT 0,
+    deletes INTEGER NOT NULL DEFAULT 0,
+    listened REAL NOT NULL DEFAULT 0,
+    last_played INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS trash (
+    trash_path TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    deleted REAL NOT NULL,
+    bookmarked INTEGER NOT NULL DEFAULT 0,
+    track TEXT  -- JSON of MetadataIndex.file_rows() of path, put back by undo
+);
+CREATE TABLE IF NOT EXISTS art (
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    mime TEXT,
+    ptype INTEGER NOT NULL DEFAULT 3,
+    description TEXT,
+    stripped INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (path, digest, ptype)
+);
+CREATE INDEX IF NOT EXISTS art_digest ON art (digest);
+CREATE TABLE IF NOT EXISTS sort_keys (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    album TEXT NOT NULL,
+    disc INTEGER NOT NULL,
+    track INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sort_keys_directory ON sort_keys (directory);
+CREATE TABLE IF NOT EXISTS integrity (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    audio TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    verified REAL NOT NULL
+);
+'''
+
+
+def review_key(path, mtime):
+    """bloom filter key for a (path, mtime) pair."""
+    return '{}\0{!r}'.format(path, float(mtime)).encode('utf-8', 'surrogateescape')
+
+
+TRACK_COLUMNS = ('path', 'size', 'mtime', 'length', 'format', 'tags')
+INTEGRITY_COLUMNS = ('path', 'size', 'mtime', 'audio', 'tags', 'verified')
+STATS_COLUMNS = ('path', 'mtime', 'plays', 'skips', 'finishes', 'deletes', 'listened', 'last_played')
+
+# play_log flags: a play that is not FINISHED was skipped, one that is not DELETED was kept
+PLAY_FINISHED = 0x1
+PLAY_DELETED = 0x2
+FILE_TABLES = ('tracks', 'sort_keys', 'integrity', 'art')  # tables holding rows about a file, keyed by path
+UNREVIEWED_BATCH = 256  # files whose Bloom filter hits are confirmed with a single query (< sqlite's 999 limit)
+
+
+def _prefix_range(folder):
+    """(low, high) bounds selecting every path below folder with an indexed range scan."""
+    folder = _os.path.join(_os.path.abspath(folder), '')
+    return folder, folder + '\U0010ffff'
+
+
+class MetadataIndex:
+    """
+    Thread-safe wrapper around the index database.
+    Every public method runs in its own transaction; use transaction() to group several.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self._lock = _threading.RLock()
+        self._depth = 0  # nesting of transaction() in the thread holding the lock
+        self.conn = _sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+
+    @_contextmanager
+    def transaction(self):
+        """lock + transaction; nested calls (e.g. public methods used inside one) join the outermost."""
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._depth -= 1
+                return
+            self._depth = 1
+            try:
+                with self.conn:
+                    yield self.conn
+            finally:
+                self._depth = 0
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    @staticmethod
+    def track_row(meta, stat=None):
+        """build a tracks row from a Metadata (or FastMetadata) object."""
+        if stat is None:
+            stat = _os.stat(meta.path)
+        tags = {k: list(v) for k, v in meta.get_audio_metadata() if k in Metadata.possible_tags}
+        f_type = getattr(meta, 'f_type', None) or _os.path.splitext(meta.path)[1][1:].lower()
+        return (meta.path, stat.st_size, stat.st_mtime, meta.length, f_type, _json.dumps(tags, sort_keys=True))
+
+    def record(self, meta, stat=None):
+        """insert or refresh the entry for a parsed file."""
+        self.record_rows([self.track_row(meta, stat)])
+
+    def record_rows(self, rows):
+        with self.transaction() as conn:
+            conn.executemany('INSERT OR REPLACE INTO tracks (path, size, mtime, length, format, tags) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def get(self, path):
+        """tracks row for path as a dict, or None."""
+        with self._lock:
+            row = self.conn.execute('SELECT path, size, mtime, length, format, tags FROM tracks WHERE path = ?',
+                                    (path,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(TRACK_COLUMNS, row))
+        entry['tags'] = _json.loads(entry['tags']) if entry['tags'] else {}
+        return entry
+
+    def get_fresh(self, path, stat=None):
+        """like get, but only if the indexed size/mtime still match the file on disk."""
+        entry = self.get(path)
+        if entry is None:
+            return None
+        if stat is None:
+            try:
+                stat = _os.stat(path)
+            except OSError:
+                return None
+        if entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+            return None
+        return entry
+
+    def iter_tracks(self, chunk_size=10000):
+        """
+        stream the whole tracks table in path order, as lists of up to chunk_size rows (TRACK_COLUMNS order,
+        tags as JSON text). each chunk is its own keyset query, so writers are never blocked for long.
+        """
+        last = ''
+        while True:
+            with self._lock:
+                rows = self.conn.execute('SELECT path, size, mtime, length, format, tags FROM tracks '
+                                         'WHERE path > ? ORDER BY path LIMIT ?', (last, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1][0]
+
+    def remove(self, paths):
+        """forget everything about paths (see FILE_TABLES)."""
+        paths = [(p,) for p in paths]
+        with self.transaction() as conn:
+            for table in FILE_TABLES:
+                conn.executemany('DELETE FROM {} WHERE path = ?'.format(table), paths)
+
+    def file_rows(self, path):
+        """{table: [columns, rows]} of everything the index holds about path, for restore_file_rows()."""
+        saved = {}
+        with self._lock:
+            for table in FILE_TABLES:
+                cursor = self.conn.execute('SELECT * FROM {} WHERE path = ?'.format(table), (path,))
+                rows = cursor.fetchall()
+                if rows:
+                    saved[table] = [[column[0] for column in cursor.description], rows]
+        return saved
+
+    def restore_file_rows(self, saved):
+        """put back rows returned by file_rows()."""
+        with self.transaction() as conn:
+            for table, (columns, rows) in saved.items():
+                if table not in FILE_TABLES:
+                    continue
+                conn.executemany('INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+                    table, ', '.join(columns), ', '.join('?' * len(columns))), [tuple(row) for row in rows])
+
+    def __contains__(self, path):
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM tracks WHERE path = ?', (path,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+
+    # scan order
+    def sort_keys(self, directory):
+        """{path: (size, mtime, album, disc, track)} of the files directly in directory."""
+        with self._lock:
+            rows = self.conn.execute('SELECT path, size, mtime, album, disc, track FROM sort_keys '
+                                     'WHERE directory = ?', (_os.path.abspath(directory),)).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def record_sort_keys(self, rows):
+        """rows of (path, size, mtime, album, disc, track)."""
+        with self.transaction() as conn:
+            conn.executemany('INSERT OR REPLACE INTO sort_keys (path, directory, size, mtime, album, disc, track) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             ((row[0], _os.path.dirname(row[0])) + tuple(row[1:]) for row in rows))
+
+    # content hashes
+    def integrity(self, path):
+        """integrity row for path as a dict (size, mtime, audio / tags digests, verified time), or None."""
+        with self._lock:
+            row = self.conn.execute('SELECT path, size, mtime, audio, tags, verified FROM integrity '
+                                    'WHERE path = ?', (path,)).fetchone()
+        return None if row is None else dict(zip(INTEGRITY_COLUMNS, row))
+
+    def record_integrity(self, rows):
+        """rows of (path, size, mtime, audio digest, tags digest, verified time)."""
+        with self.transaction() as conn:
+            conn.executemany('INSERT OR REPLACE INTO integrity (path, size, mtime, audio, tags, verified) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    # embedded art references
+    def record_art(self, path, refs):
+        """
+        replace the art references of path with refs [(digest, mime, picture type, description)].
+        references to art stripped from the file are kept.
+        """
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM art WHERE path = ? AND stripped = 0', (path,))
+            conn.executemany('INSERT OR IGNORE INTO art (path, digest, mime, ptype, description) '
+                             'VALUES (?, ?, ?, ?, ?)', ((path,) + tuple(ref) for ref in refs))
+
+    def art(self, path):
+        """art references of path as dicts (digest, mime, ptype, desc, stripped)."""
+        with self._lock:
+            rows = self.conn.execute('SELECT digest, mime, ptype, description, stripped FROM art '
+                                     'WHERE path = ? ORDER BY ptype', (path,)).fetchall()
+        return [dict(zip(('digest', 'mime', 'ptype', 'desc', 'stripped'), row)) for row in rows]
+
+    def shared_art(self, min_refs=2):
+        """[(path, [digests])] of files still embedding an image that at least min_refs files reference."""
+        with self._lock:
+            rows = self.conn.execute('SELECT a.path, a.digest FROM art a WHERE a.stripped = 0 AND a.path IN '
+                                     '(SELECT path FROM art WHERE digest IN (SELECT digest FROM art '
+                                     'GROUP BY digest HAVING COUNT(DISTINCT path) >= ?)) '
+                                     'ORDER BY a.path', (min_refs,)).fetchall()
+        shared = []
+        for path, key in rows:
+            if not shared or shared[-1][0] != path:
+                shared.append((path, []))
+            shared[-1][1].append(key)
+        return shared
+
+    def mark_art_stripped(self, path, stripped=True, digests=None):
+        """flag the art references of path (only those in digests, if given) as stripped / embedded."""
+        with self.transaction() as conn:
+            if digests is None:
+                conn.execute('UPDATE art SET stripped = ? WHERE path = ?', (int(stripped), path))
+            else:
+                conn.executemany('UPDATE art SET stripped = ? WHERE path = ? AND digest = ?',
+                                 ((int(stripped), path, key) for key in digests))
+
+    def stripped_art(self):
+        """digests of every image that only survives in the art cache."""
+        with self._lock:
+            return {row[0] for row in self.conn.execute('SELECT DISTINCT digest FROM art WHERE stripped = 1')}
+
+    # listening history
+    def log_play(self, path, mtime, listened, flags, ts=None):
+        """
+        append one play to the log and fold it into the per-track counters.
+
+        :param listened: seconds listened.
+        :param flags: PLAY_FINISHED / PLAY_DELETED bits.
+        """
+        ts = int(_time.time() if ts is None else ts)
+        finished, deleted = bool(flags & PLAY_FINISHED), bool(flags & PLAY_DELETED)
+        with self.transaction() as conn:
+            conn.execute('INSERT OR IGNORE INTO play_paths (path) VALUES (?)', (path,))
+            track = conn.execute('SELECT id FROM play_paths WHERE path = ?', (path,)).fetchone()[0]
+            # listened time is logged in tenths of a second to keep rows integer-only
+            conn.execute('INSERT INTO play_log (track, ts, listened, flags) VALUES (?, ?, ?, ?)',
+                         (track, ts, int(round(listened * 10)), flags))
+            conn.execute('INSERT OR IGNORE INTO play_stats (track, mtime) VALUES (?, ?)',
+                         (track, mtime))
+            conn.execute('UPDATE play_stats SET mtime = ?, plays = plays + 1, skips = skips + ?, '
+                         'finishes = finishes + ?, deletes = deletes + ?, listened = listened + ?, '
+                         'last_played = ? WHERE track = ?',
+                         (mtime, not finished, finished, deleted, listened, ts, track))
+
+    def play_stats(self, path):
+        """aggregated counters for one path as a dict, or None if it was never played."""
+        with self._lock:
+            row = self.conn.execute('SELECT p.path, s.mtime, s.plays, s.skips, s.finishes, s.deletes, '
+                                    's.listened, s.last_played FROM play_stats s JOIN play_paths p '
+                                    'ON p.id = s.track WHERE p.path = ?', (path,)).fetchone()
+        return None if row is None else dict(zip(STATS_COLUMNS, row))
+
+    def play_log(self, path):
+        """(timestamp, seconds listened, flags) of every play of path, oldest first."""
+        with self._lock:
+            rows = self.conn.execute('SELECT l.ts, l.listened, l.flags FROM play_log l JOIN play_paths p '
+                                     'ON p.id = l.track WHERE p.path = ? ORDER BY l.ts', (path,)).fetchall()
+        return [(ts, listened / 10, flags) for ts, listened, flags in rows]
+
+    def most_skipped(self, folder=None, limit=10):
+        """play_stats dicts with the most skips, optionally limited to files below folder."""
+        query = ('SELECT p.path, s.mtime, s.plays, s.skips, s.finishes, s.deletes, s.listened, s.last_played '
+                 'FROM play_stats s JOIN play_paths p ON p.id = s.track WHERE s.skips > 0')
+        params = ()
+        if folder is not None:
+            query += ' AND p.path >= ? AND p.path < ?'
+            params = _prefix_range(folder)
+        query += ' ORDER BY s.skips DESC, s.plays DESC LIMIT ?'
+        with self._lock:
+            rows = self.conn.execute(query, params + (limit,)).fetchall()
+        return [dict(zip(STATS_COLUMNS, row)) for row in rows]
+
+    def never_reviewed(self, folder=None):
+        """indexed paths (below folder) that were never played, or were modified since their last play."""
+        query = ('SELECT t.path FROM tracks t LEFT JOIN play_paths p ON p.path = t.path '
+                 'LEFT JOIN play_stats s ON s.track = p.id WHERE (s.track IS NULL OR s.mtime != t.mtime)')
+        params = ()
+        if folder is not None:
+            query += ' AND t.path >= ? AND t.path < ?'
+            params = _prefix_range(folder)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(query + ' ORDER BY t.path', params)]
+
+    def reviewed_keys(self):
+        """iterate (path, mtime) for every file that has been played at least once."""
+        with self._lock:
+            rows = self.conn.execute('SELECT p.path, s.mtime FROM play_stats s '
+                                     'JOIN play_paths p ON p.id = s.track').fetchall()
+        return iter(rows)
+
+    def reviewed_filter(self, error_rate=0.01):
+        """Bloom filter over review_key() of every reviewed (path, mtime)."""
+        with self._lock:
+            capacity = self.conn.execute('SELECT COUNT(*) FROM play_stats').fetchone()[0]
+        return BloomFilter.from_keys((review_key(path, mtime) for path, mtime in self.reviewed_keys()),
+                                     capacity=capacity, error_rate=error_rate)
+
+    def is_reviewed(self, path, mtime):
+        """exact check: was path played while it had this mtime."""
+        with self._lock:
+            row = self.conn.execute('SELECT s.mtime FROM play_stats s JOIN play_paths p ON p.id = s.track '
+                                    'WHERE p.path = ?', (path,)).fetchone()
+        return row is not None and row[0] == mtime
+
+    def reviewed_mtimes(self, paths):
+        """{path: mtime it was last played with} for the reviewed paths among paths, in one query."""
+        paths = list(paths)
+        if not paths:
+            return {}
+        with self._lock:
+            rows = self.conn.execute('SELECT p.path, s.mtime FROM play_paths p JOIN play_stats s ON s.track = p.id '
+                                     'WHERE p.path IN ({})'.format(', '.join('?' * len(paths))), paths).fetchall()
+        return dict(rows)
+
+    def unreviewed(self, files, batch_size=UNREVIEWED_BATCH):
+        """
+        filter an iterable of paths down to files that were never reviewed, or changed since.
+        costs one stat per file; a Bloom filter miss settles a file without touching the database,
+        hits are confirmed with one query per directory (or per batch_size files).
+        """
+        bloom = None
+        batch = []  # (file, path, mtime, bloom hit) in input order
+        hits = []
+        folder = None
+        for file in files:
+            if bloom is None:
+                bloom = self.reviewed_filter()
+            path = _os.path.abspath(file)
+            try:
+                mtime = _os.stat(path).st_mtime
+            except OSError:
+                continue
+            if batch and (len(batch) >= batch_size or _os.path.dirname(path) != folder):
+                yield from self._unreviewed_batch(batch, hits)
+                batch, hits = [], []
+            folder = _os.path.dirname(path)
+            hit = review_key(path, mtime) in bloom
+            batch.append((file, path, mtime, hit))
+            if hit:
+                hits.append(path)
+        yield from self._unreviewed_batch(batch, hits)
+
+    def _unreviewed_batch(self, batch, hits):
+        reviewed = self.reviewed_mtimes(hits)
+        for file, path, mtime, hit in batch:
+            if not hit or reviewed.get(path) != mtime:
+                yield file
@@ -0,0 +1,167 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+instrument.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Opt-in timing instrumentation for the shells.
+    Everything is off by default; instrumented code checks STATS.enabled before
+    touching the clock, so the disabled cost is one attribute lookup.
+"""
+import time as _time
+import cProfile as _cProfile
+from contextlib import contextmanager as _contextmanager
+
+# histogram buckets are powers of two microseconds: bucket n holds [2**(n-1), 2**n) us
+_MAX_BUCKET = 40
+
+
+def _fmt_seconds(seconds):
+    if seconds < 1e-3:
+        return '{:.0f}us'.format(seconds * 1e6)
+    elif seconds < 1:
+        return '{:.2f}ms'.format(seconds * 1e3)
+    return '{:.2f}s'.format(seconds)
+
+
+class Histogram:
+    """
+    Log2 latency histogram. Percentiles are reported as bucket upper bounds.
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.buckets = [0] * (_MAX_BUCKET + 1)
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), _MAX_BUCKET)] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for idx, hits in enumerate(self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return min((1 << idx) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return '{:>7} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+            self.count, _fmt_seconds(self.mean), _fmt_seconds(self.percentile(.5)),
+            _fmt_seconds(self.percentile(.9)), _fmt_seconds(self.percentile(.99)), _fmt_seconds(self.max))
+
+    def bars(self, width=40):
+        peak = max(self.buckets) or 1
+        lines = []
+        for idx, hits in enumerate(self.buckets):
+            if hits:
+                lines.append('{:>9} | {:<{w}} {}\n'.format('<' + _fmt_seconds((1 << idx) / 1e6),
+                                                           '#' * max(1, hits * width // peak), hits, w=width))
+        return ''.join(lines)
+
+
+class _Timer:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = _time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.stats.record(self.name, _time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Stats:
+    """
+    Named latency histograms plus an optional session-wide profiler.
+    """
+    header = '{:<24} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9}\n'.format('name', 'count', 'mean', 'p50',
+                                                                    'p90', 'p99', 'max')
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.profiler = None
+
+    def record(self, name, seconds):
+        try:
+            self.histograms[name].record(seconds)
+        except KeyError:
+            hist = self.histograms[name] = Histogram()
+            hist.record(seconds)
+
+    def timer(self, name):
+        """
+        context manager timing its block into histogram `name`; blocks that raise are not recorded.
+        while disabled a shared no-op context is returned, so nothing is allocated.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def clear(self):
+        self.histograms.clear()
+
+    def report(self, names=None):
+        if not self.histograms:
+            return 'no timings recorded{}\n'.format('' if self.enabled else ' (instrumentation is disabled)')
+        if names:
+            return ''.join('{}\n{}'.format(name, self.histograms[name].bars())
+                           if name in self.histograms else 'No such timer {}\n'.format(name) for name in names)
+        return self.header + ''.join('{:<24} {}\n'.format(name, self.histograms[name].summary())
+                                     for name in sorted(self.histograms))
+
+    @_contextmanager
+    def profile(self, path):
+        """cProfile everything in the block and dump pstats data to path."""
+        self.profiler = _cProfile.Profile()
+        self.profiler.enable()
+        try:
+            yield self.profiler
+        finally:
+            self.profiler.disable()
+            self.profiler.dump_stats(path)
+            self.profiler = None
+
+
+# process wide stats, enabled by the cli's --timing flag
+STATS = Stats()
@@ -13,16 +13,99 @@ Description:
     Built off of the "Cmd"  class from the builtin module "cmd"
 """
 import os as _os
+import re as _re
+import time as _time
+import threading as _threading
 # import rlcompleter
 from cmd import Cmd as _Cmd
 
 from vlc_analyze import utils
+from vlc_analyze.instrument import STATS as _STATS
 
 
 # misc functions / decorators
 # def make_alias(alias, method, args):
 #     pass
 
+_COMMAND_SEPARATOR = _re.compile(r'(?<!\\);')
+
+
+def split_commands(line, free_text=None):
+    """
+    'n; e; v artist' -> ['n', 'e', 'v artist']. a backslash escapes a literal ';'.
+    the first command for which free_text(command) is true takes the rest of the line,
+    ';' included, as its argument: 'n; edit artist::A; B' -> ['n', 'edit artist::A; B'].
+    """
+    commands = []
+    start = 0
+    for stop in [match.start() for match in _COMMAND_SEPARATOR.finditer(line)] + [len(line)]:
+        part = line[start:stop].strip().replace('\\;', ';')
+        if part and free_text is not None and free_text(part):
+            commands.append(line[start:].strip())
+            break
+        if part:
+            commands.append(part)
+        start = stop + 1
+    return commands
+
+
+class BufferedOutput:
+    """
+    file-like wrapper that holds back everything written while a command runs
+    and passes it on in a single write + flush once the command is done.
+    outside of held sections writes go straight through.
+
+    :param interval: if set, held output is also flushed this many seconds after it was written,
+                     so long running commands still show progress.
+    """
+
+    def __init__(self, stream, interval=None):
+        self.stream = stream
+        self.interval = interval
+        self._held = False
+        self._parts = []
+        self._timer = None
+        self._lock = _threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            if not self._held:
+                return self.stream.write(data)
+            self._parts.append(data)
+            if self.interval is not None and self._timer is None:
+                self._timer = _threading.Timer(self.interval, self.commit)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(data)
+
+    def flush(self):
+        with self._lock:
+            if not self._held:
+                self.stream.flush()
+
+    def hold(self):
+        with self._lock:
+            self._held = True
+
+    def commit(self):
+        """write out what is held so far."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._parts:
+                self.stream.write(''.join(self._parts))
+                self._parts = []
+                self.stream.flush()
+
+    def release(self):
+        self.commit()
+        with self._lock:
+            self._held = False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
 
 # base level interpreters / mix-ins
 # all of these classes inherit from the base Cmd class.
@@ -56,6 +139,74 @@ class HideNoneDocMix(_Cmd):
             super(HideNoneDocMix, self).print_topics(header, cmds, cmdlen, maxcol)
 
 
+class BufferedOutputMix(_Cmd):
+    """
+    interpreter whose output is collected per command (precmd .. postcmd) and written out once
+    the command finished, instead of a write + flush for every line.
+    on a terminal, output held for longer than FLUSH_INTERVAL seconds is flushed anyway.
+    """
+    FLUSH_INTERVAL = 0.1
+
+    def __init__(self, *args, **kwargs):
+        super(BufferedOutputMix, self).__init__(*args, **kwargs)
+        interactive = getattr(self.stdout, 'isatty', lambda: False)()
+        self.output = self.stdout = BufferedOutput(self.stdout, self.FLUSH_INTERVAL if interactive else None)
+
+    def precmd(self, line):
+        self.output.hold()
+        return super(BufferedOutputMix, self).precmd(line)
+
+    def onecmd(self, line):
+        try:
+            return super(BufferedOutputMix, self).onecmd(line)
+        except BaseException:
+            self.output.release()  # postcmd will not run: do not leave later output held back
+            raise
+
+    def postcmd(self, stop, line):
+        try:
+            return super(BufferedOutputMix, self).postcmd(stop, line)
+        finally:
+            self.output.release()
+
+    def flush_output(self):
+        """write out what the running command printed so far, e.g. before handing the terminal to another shell."""
+        self.output.commit()
+
+
+class PipelineMix(_Cmd):
+    """
+    interpreter that runs several ';' separated commands given on one line as one batch:
+    "n; e; v artist". the batch stops at the first command that ends the shell.
+    commands in FREE_TEXT (or aliases of them) take free text that may hold a ';' of its own,
+    so the line is not split after one given an argument: it ends the batch. shells nested in a pipelining one
+    set PIPELINE = False, their lines were split (or deliberately not) by the outer shell.
+    """
+    PIPELINE = True
+    FREE_TEXT = frozenset(('edit', 'shell', 'alias'))
+
+    def takes_free_text(self, command):
+        """whether command has an argument that is free text, which is not split on ';'."""
+        name, arg, _ = self.parseline(command)
+        if not arg:  # a bare "e" still runs as part of the batch
+            return False
+        resolve = getattr(self, 'command_name', None)  # follows aliases when mixed with AliasMix
+        return (resolve(command) if resolve is not None else name) in self.FREE_TEXT
+
+    def onecmd(self, line):
+        if not self.PIPELINE:
+            return super(PipelineMix, self).onecmd(line)
+        commands = split_commands(line, self.takes_free_text)
+        if len(commands) < 2:
+            return super(PipelineMix, self).onecmd(commands[0] if commands else line)
+        stop = None
+        for command in commands:
+            stop = super(PipelineMix, self).onecmd(command)
+            if stop:
+                break
+        return stop
+
+
 class AliasMix(_Cmd):
     """
     interpreter that allows aliasing or commands using the alias_prefix
@@ -80,6 +231,23 @@ class AliasMix(_Cmd):
     def get_aliases(self):
         return {i[6:] for i in self.get_names() if i.startswith(self.ALIAS_PREFIX)}
 
+    def command_name(self, line):
+        """resolve the do_* command name a line will dispatch to, following aliases."""
+        cmd = self.parseline(line)[0]
+        if not cmd:
+            return 'emptyline' if not line.strip() else 'unknown'
+        func = getattr(self, self.ALIAS_PREFIX + cmd, None) or getattr(self, 'do_' + cmd, None)
+        return func.__name__[3:] if func is not None else cmd
+
+    def onecmd(self, line):
+        if not _STATS.enabled:
+            return super(AliasMix, self).onecmd(line)
+        start = _time.perf_counter()
+        try:
+            return super(AliasMix, self).onecmd(line)
+        finally:
+            _STATS.record('cmd: ' + self.command_name(line), _time.perf_counter() - start)
+
     def default(self, line):
         cmd, arg, line = self.parseline(line)
         func = [getattr(self, n) for n in self.get_names() if
@@ -97,12 +265,15 @@ class AliasMix(_Cmd):
         Otherwise try to call complete_<command> to get list of completions.
         """
         if state == 0:
-            import readline
-            origline = readline.get_line_buffer()
+            context = utils.completion_context()
+            if context is None:
+                import readline
+                context = readline.get_line_buffer(), readline.get_begidx(), readline.get_endidx()
+            origline, begidx, endidx = context
             line = origline.lstrip()
             stripped = len(origline) - len(line)
-            begidx = readline.get_begidx() - stripped
-            endidx = readline.get_endidx() - stripped
+            begidx -= stripped
+            endidx -= stripped
             if begidx > 0:
                 cmd, args, foo = self.parseline(line)
                 if cmd == '':
@@ -128,7 +299,11 @@ class AliasMix(_Cmd):
 class TimeoutInputMix(_Cmd):
     """
     mixin for timeout supported input methods
+    commands queued on a remote control server (see remote.py) are run between prompts.
+    only this prompt is woken up for them: while a command itself waits on the terminal
+    (the delete confirmation, a nested shell's cmdloop) they stay queued until it returns.
     """
+    remote = None
 
     def __init__(self, timeout=None, *args, **kwargs):
         super(TimeoutInputMix, self).__init__(*args, **kwargs)
@@ -157,24 +332,25 @@ class TimeoutInputMix(_Cmd):
                 self.stdout.write(str(self.intro) + "\n")
             stop = None
             while not stop:
+                if self.remote is not None and self.remote.pending():
+                    stop = self.remote.dispatch(self)
+                    continue
                 if self.cmdqueue:
                     line = self.cmdqueue.pop(0)
                 else:
                     if self.use_rawinput:
                         try:
-                            try:
-                                if timeout is not None:
-                                    tout = timeout
-                                elif self.timeout:
-                                    tout = self.timeout
-
-                                get_input = lambda prompt: utils.input_timeout(caption=prompt, timeout=tout,
-                                                                               stream=self.stdout,
-                                                                               timeout_msg=timeout_msg,
-                                                                               completer=self.complete)
-                            except NameError:
-                                get_input = lambda prompt: input(prompt)
-                            line = get_input(self.prompt)
+                            tout = timeout if timeout is not None else (self.timeout or None)
+                            get_input = lambda prompt: utils.input_timeout(caption=prompt, timeout=tout,
+                                                                           stream=self.stdout,
+                                                                           timeout_msg=timeout_msg,
+                                                                           completer=self.complete)
+                            if _STATS.enabled:
+                                start = _time.perf_counter()
+                                line = get_input(self.prompt)
+                                _STATS.record('input wait', _time.perf_counter() - start)
+                            else:
+                                line = get_input(self.prompt)
                         except EOFError:
                             line = 'EOF'
                     else:
@@ -201,10 +377,11 @@ class TimeoutInputMix(_Cmd):
 
 # more specialized interpreters for ease of use.
 # not guaranteed to be fully compatible for mixing purposes.
-class AliasCmdInterpreter(AliasMix):
+class AliasCmdInterpreter(PipelineMix, BufferedOutputMix, AliasMix):
     """
     AliasedShell with generally implemented command 'alias' that lists all aliases.
     'alias' has also been mapped to 'a'
+    Output is buffered per command and several commands can be given on one line separated by ';'.
     """
 
     def __init__(self, *args, **kwargs):
@@ -246,6 +423,24 @@ class AliasCmdInterpreter(AliasMix):
             else:
                 return alias_str
 
+    def do_stats(self, args=''):
+        """
+        print timing statistics collected while instrumentation is enabled (--timing)
+
+        Usage:
+        stats [<name1>,<name2>,... | -c]
+
+        Options:
+        [name] -- comma separated timer names to print as histograms.
+        [-c] -- clear all recorded timings.
+        """
+        if args.strip() == '-c':
+            _STATS.clear()
+            return
+        names = [name.strip() for name in args.split(',') if name.strip()]
+        self.stdout.write(_STATS.report(names))
+        self.stdout.flush()
+
     # aliased cmds
     alias_a = do_alias
 
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+library.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Compact in-memory model of a media library.
+    Tracks are stored as __slots__ records holding integer ids into shared string pools,
+    so holding a few hundred thousand tracks costs a small fixed amount per track
+    instead of a full mutagen object each.
+"""
+import os as _os
+
+
+class StringPool:
+    """
+    Interns strings to small integer ids. Id 0 is always the empty string.
+    """
+    __slots__ = ('_ids', '_strings')
+
+    def __init__(self):
+        self._ids = {'': 0}
+        self._strings = ['']
+
+    def intern(self, string):
+        try:
+            return self._ids[string]
+        except KeyError:
+            idx = len(self._strings)
+            self._ids[string] = idx
+            self._strings.append(string)
+            return idx
+
+    def lookup(self, string):
+        """return the id of an already interned string, or None."""
+        return self._ids.get(string)
+
+    def __getitem__(self, idx):
+        return self._strings[idx]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class Track:
+    """
+    Single library record. Only integer ids and numbers are stored on the record itself.
+    """
+    __slots__ = ('path_id', 'size', 'mtime', 'length', 'artist_id', 'album_id', 'title_id')
+
+    def __init__(self, path_id, size=0, mtime=0.0, length=0.0, artist_id=0, album_id=0, title_id=0):
+        self.path_id = path_id
+        self.size = size
+        self.mtime = mtime
+        self.length = length
+        self.artist_id = artist_id
+        self.album_id = album_id
+        self.title_id = title_id
+
+
+class TrackView:
+    """
+    Read-only view of a Track that resolves its ids through the owning Library.
+    """
+    __slots__ = ('_library', '_track')
+
+    def __init__(self, library, track):
+        object.__setattr__(self, '_library', library)
+        object.__setattr__(self, '_track', track)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('TrackView is read-only')
+
+    def __repr__(self):
+        return '<TrackView {!r}>'.format(self.path)
+
+    @property
+    def path(self):
+        return self._library.paths[self._track.path_id]
+
+    @property
+    def file(self):
+        return _os.path.basename(self.path)
+
+    @property
+    def size(self):
+        return self._track.size
+
+    @property
+    def mtime(self):
+        return self._track.mtime
+
+    @property
+    def length(self):
+        return self._track.length
+
+    @property
+    def artist(self):
+        return self._library.strings[self._track.artist_id]
+
+    @property
+    def album(self):
+        return self._library.strings[self._track.album_id]
+
+    @property
+    def title(self):
+        return self._library.strings[self._track.title_id]
+
+
+class Library:
+    """
+    Collection of Track records with interned paths and tag strings.
+    Records are only handed out as read-only TrackView objects.
+    """
+
+    def __init__(self):
+        self.paths = StringPool()
+        self.strings = StringPool()
+        self._tracks = []
+        self._by_path = {}
+
+    def add(self, path, size=0, mtime=0.0, length=0.0, artist='', album='', title=''):
+        """add (or replace) a track record and return its view."""
+        path_id = self.paths.intern(path)
+        track = Track(path_id, size, mtime, length,
+                      self.strings.intern(artist), self.strings.intern(album), self.strings.intern(title))
+        try:
+            self._tracks[self._by_path[path_id]] = track
+        except KeyError:
+            self._by_path[path_id] = len(self._tracks)
+            self._tracks.append(track)
+        return TrackView(self, track)
+
+    def add_metadata(self, metadata, stat=None):
+        """add a track built from a metadata.Metadata object."""
+        if stat is None:
+            stat = _os.stat(metadata.path)
+        artist, album, title = metadata.get_audio_metadata(['artist', 'album', 'title'])
+        return self.add(metadata.path, stat.st_size, stat.st_mtime, metadata.length, artist, album, title)
+
+    def get(self, path, default=None):
+        path_id = self.paths.lookup(path)
+        if path_id is None or path_id not in self._by_path:
+            return default
+        return TrackView(self, self._tracks[self._by_path[path_id]])
+
+    def __contains__(self, path):
+        return self.get(path) is not None
+
+    def __getitem__(self, idx):
+        return TrackView(self, self._tracks[idx])
+
+    def __iter__(self):
+        return (TrackView(self, track) for track in self._tracks)
+
+    def __len__(self):
+        return len(self._tracks)
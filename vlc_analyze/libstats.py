@@ -0,0 +1,174 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+libstats.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Library-wide statistics from the metadata index.
+    The tracks table is streamed once, chunk by chunk, into columnar arrays
+    (sizes, lengths, folder / format codes) plus per-field tag presence counters;
+    totals, distributions and the largest files are then aggregated over the columns.
+    Only files missing from the index or modified since are parsed (in parallel) and indexed on the way.
+"""
+import os as _os
+import re as _re
+import json as _json
+import heapq as _heapq
+import bisect as _bisect
+from array import array as _array
+from collections import Counter as _Counter
+
+from . import utils
+from .index import MetadataIndex
+from .metadata import Metadata, load_metadata
+
+BITRATE_BUCKETS = (64, 96, 128, 160, 192, 224, 256, 320)  # kbit/s upper bounds
+_BITRATE_LABELS = ['<={}'.format(kbps) for kbps in BITRATE_BUCKETS] + ['>{}'.format(BITRATE_BUCKETS[-1])]
+TOP_FILES = 10
+
+# a field with at least one non-empty value in a tags column (json.dumps output, so values are ascii
+# and any quote inside a value is escaped: this can only match real keys)
+_PRESENT_TAG = _re.compile(r'"([a-z]+)": \[(?!\]|""(?:, "")*\])')
+
+
+class _Columns:
+    """per track columns, filled a chunk of index rows at a time."""
+
+    def __init__(self):
+        self.sizes = _array('q')
+        self.lengths = _array('d')
+        self.folders = _array('L')  # code into folder_names
+        self.formats = _array('L')  # code into format_names
+        self.paths = []
+        self.folder_names, self._folder_codes = [], {}
+        self.format_names, self._format_codes = [], {}
+        self.tags_present = _Counter()
+
+    @staticmethod
+    def _code(value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def add_rows(self, rows, wanted=None):
+        """
+        append tracks rows (TRACK_COLUMNS order, tags as JSON text); with wanted, only rows whose path
+        is in it and whose size / mtime still match the file on disk, removing them from it
+        (stale rows stay in wanted, to be parsed again). returns the number of rows added.
+        """
+        paths, sizes, lengths, folders, formats = self.paths, self.sizes, self.lengths, self.folders, self.formats
+        folder_names, folder_codes = self.folder_names, self._folder_codes
+        format_names, format_codes = self.format_names, self._format_codes
+        stat = _os.stat
+        present = []
+        added = 0
+        for path, size, mtime, length, f_type, tags in rows:
+            if wanted is not None:
+                if path not in wanted:
+                    continue
+                try:
+                    st = stat(path)
+                except OSError:
+                    continue
+                if st.st_size != size or st.st_mtime != mtime:
+                    continue
+                wanted.discard(path)
+            paths.append(path)
+            sizes.append(size)
+            lengths.append(length or 0.0)
+            folder = path.rpartition(_os.sep)[0] or _os.sep
+            code = folder_codes.get(folder)
+            folders.append(self._code(folder, folder_names, folder_codes) if code is None else code)
+            code = format_codes.get(f_type)
+            formats.append(self._code(f_type, format_names, format_codes) if code is None else code)
+            if tags:
+                present.extend(_PRESENT_TAG.findall(tags))
+            added += 1
+        self.tags_present.update(present)
+        return added
+
+
+def library_stats(files, index, workers=4, top=TOP_FILES):
+    """
+    statistics of files as a dict: totals, per folder track count / duration, format and
+    (estimated, size / length) bitrate distributions, missing tag counts per field and the largest files.
+    files not in the index, or changed since they were indexed, are parsed and (re)indexed.
+    """
+    wanted = {_os.path.abspath(file) for file in files}
+    columns = _Columns()
+    for rows in index.iter_tracks():
+        columns.add_rows(rows, wanted)
+    indexed = len(columns.paths)
+
+    def parse(path):
+        return MetadataIndex.track_row(load_metadata(path))
+
+    errors, parsed = 0, []
+    for path, row, error in utils.parallel_imap(parse, sorted(wanted), workers):
+        if error is not None:
+            errors += 1
+            continue
+        parsed.append(row)
+    if parsed:
+        columns.add_rows(parsed)
+        index.record_rows(parsed)
+
+    count = len(columns.paths)
+    folder_tracks = _Counter(columns.folders)
+    folder_seconds = [0.0] * len(columns.folder_names)
+    buckets = [0] * (len(BITRATE_BUCKETS) + 1)
+    bisect_left = _bisect.bisect_left
+    for folder, size, length in zip(columns.folders, columns.sizes, columns.lengths):
+        folder_seconds[folder] += length
+        if length > 0:
+            buckets[bisect_left(BITRATE_BUCKETS, size * 0.008 / length)] += 1
+    largest = _heapq.nlargest(top, range(count), key=columns.sizes.__getitem__)
+    return {'tracks': count,
+            'duration': sum(columns.lengths),
+            'bytes': sum(columns.sizes),
+            'indexed': indexed,
+            'parsed': len(parsed),
+            'errors': errors,
+            'folders': [{'folder': columns.folder_names[code], 'tracks': folder_tracks[code],
+                         'duration': folder_seconds[code]}
+                        for code in sorted(folder_tracks, key=columns.folder_names.__getitem__)],
+            'formats': {columns.format_names[code]: n for code, n in _Counter(columns.formats).most_common()},
+            'bitrates': {label: n for label, n in zip(_BITRATE_LABELS, buckets) if n},
+            'missing_tags': {field: count - columns.tags_present[field] for field in sorted(Metadata.possible_tags)},
+            'largest': [{'path': columns.paths[idx], 'bytes': columns.sizes[idx]} for idx in largest],
+            }
+
+
+def _fmt_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+
+
+def format_stats(stats, fmt='text'):
+    """render library_stats() output as a text report or JSON."""
+    if fmt == 'json':
+        return _json.dumps(stats, indent=2) + '\n'
+    lines = ['{} tracks, {} total, {:.1f} MB ({} from the index, {} parsed, {} errors)'.format(
+        stats['tracks'], _fmt_duration(stats['duration']), stats['bytes'] / 2 ** 20,
+        stats['indexed'], stats['parsed'], stats['errors'])]
+    lines.append('\nfolders:')
+    lines.extend('{:>8} {:>6}  {}'.format(_fmt_duration(entry['duration']), entry['tracks'], entry['folder'])
+                 for entry in stats['folders'])
+    lines.append('\nformats:')
+    lines.extend('{:>8}  {}'.format(n, f_type or '?') for f_type, n in stats['formats'].items())
+    lines.append('\nbitrates (kbit/s, estimated):')
+    lines.extend('{:>8}  {}'.format(n, label) for label, n in stats['bitrates'].items())
+    lines.append('\nmissing tags:')
+    lines.extend('{:>8}  {}'.format(n, field) for field, n in
+                 sorted(stats['missing_tags'].items(), key=lambda item: (-item[1], item[0])))
+    lines.append('\nlargest files:')
+    lines.extend('{:>8.1f} MB  {}'.format(entry['bytes'] / 2 ** 20, entry['path']) for entry in stats['largest'])
+    return '\n'.join(lines) + '\n'
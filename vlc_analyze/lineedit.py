@@ -0,0 +1,309 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+lineedit.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Posix line editor with timeouts.
+    Puts the terminal in non-canonical mode and waits on a selector, so input
+    can time out or be woken by other threads (track end, background jobs)
+    without polling, while still offering line editing, history and tab completion.
+"""
+import os as _os
+import sys as _sys
+import time as _time
+import codecs as _codecs
+import selectors as _selectors
+import threading as _threading
+
+try:
+    import termios as _termios
+except ImportError:  # not a posix terminal
+    _termios = None
+
+HISTORY_SIZE = 500
+COMPLETION_LIMIT = 200
+WORD_DELIMS = ' \t,'
+
+# escape sequences -> editor actions
+_ESCAPES = {'\x1b[A': 'history_prev', '\x1bOA': 'history_prev',
+            '\x1b[B': 'history_next', '\x1bOB': 'history_next',
+            '\x1b[C': 'right', '\x1bOC': 'right',
+            '\x1b[D': 'left', '\x1bOD': 'left',
+            '\x1b[H': 'home', '\x1bOH': 'home', '\x1b[1~': 'home',
+            '\x1b[F': 'end', '\x1bOF': 'end', '\x1b[4~': 'end',
+            '\x1b[3~': 'delete',
+            }
+_CONTROLS = {'\r': 'accept', '\n': 'accept',
+             '\x7f': 'backspace', '\b': 'backspace',
+             '\t': 'complete',
+             '\x01': 'home', '\x05': 'end',
+             '\x02': 'left', '\x06': 'right',
+             '\x10': 'history_prev', '\x0e': 'history_next',
+             '\x0b': 'kill_end', '\x15': 'kill_line', '\x17': 'kill_word',
+             '\x04': 'eof',
+             '\x0c': 'redraw',
+             }
+
+
+class LineEditor:
+    """
+    Reads one line at a time from a file descriptor with an optional timeout.
+    Any thread may call wake() to end the current read early.
+    """
+
+    def __init__(self, infile=None, history_size=HISTORY_SIZE):
+        self.infile = _sys.stdin if infile is None else infile
+        self.fd = self.infile.fileno()
+        self.is_tty = _termios is not None and _os.isatty(self.fd)
+        self.history = []
+        self.history_size = history_size
+        self.partial = ''  # unfinished line carried over a timeout / wake
+        self.buffer = ''
+        self.cursor = 0
+        self.completion = None  # (line, begidx, endidx) while a completer runs
+        self._pending = ''
+        self._lines = []  # complete lines already read in non-tty mode
+        self._decoder = _codecs.getincrementaldecoder('utf-8')('replace')
+        self._wake_r, self._wake_w = _os.pipe()
+        _os.set_blocking(self._wake_r, False)
+        _os.set_blocking(self._wake_w, False)
+        self._selector = _selectors.DefaultSelector()
+        self._selector.register(self.fd, _selectors.EVENT_READ, 'input')
+        self._selector.register(self._wake_r, _selectors.EVENT_READ, 'wake')
+
+    def wake(self):
+        """interrupt a pending readline() from any thread."""
+        try:
+            _os.write(self._wake_w, b'\0')
+        except BlockingIOError:  # already woken
+            pass
+
+    def _drain_wake(self):
+        try:
+            while _os.read(self._wake_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def readline(self, prompt='', timeout=None, default='', stream=None, timeout_msg='', completer=None):
+        """
+        return the entered line, or `default` on timeout / wake.
+        raises EOFError on end of input.
+        """
+        stream = _sys.stdout if stream is None else stream
+        if not self.is_tty:
+            return self._readline_plain(prompt, timeout, default, stream, timeout_msg)
+        old_attrs = _termios.tcgetattr(self.fd)
+        new_attrs = _termios.tcgetattr(self.fd)
+        new_attrs[3] &= ~(_termios.ICANON | _termios.ECHO)  # keep ISIG so ^C still interrupts
+        new_attrs[6][_termios.VMIN] = 1
+        new_attrs[6][_termios.VTIME] = 0
+        _termios.tcsetattr(self.fd, _termios.TCSANOW, new_attrs)
+        try:
+            return self._readline_tty(prompt, timeout, default, stream, timeout_msg, completer)
+        finally:
+            _termios.tcsetattr(self.fd, _termios.TCSANOW, old_attrs)
+
+    def _wait(self, deadline):
+        """block until input is readable; returns 'input', 'wake' or 'timeout'."""
+        remaining = None if deadline is None else max(0.0, deadline - _time.monotonic())
+        events = self._selector.select(remaining)
+        if not events:
+            return 'timeout'
+        kinds = {key.data for key, _ in events}
+        if 'wake' in kinds:
+            self._drain_wake()
+            return 'wake'
+        return 'input'
+
+    def _readline_plain(self, prompt, timeout, default, stream, timeout_msg):
+        stream.write(prompt)
+        stream.flush()
+        deadline = None if timeout is None else _time.monotonic() + timeout
+        while not self._lines:
+            event = self._wait(deadline)
+            if event != 'input':
+                if event == 'timeout':
+                    stream.write(timeout_msg)
+                stream.write('\n')
+                stream.flush()
+                return default
+            data = _os.read(self.fd, 4096)
+            if not data:
+                if self._pending:
+                    self._lines.append(self._pending)
+                    self._pending = ''
+                    break
+                raise EOFError
+            self._pending += self._decoder.decode(data)
+            *lines, self._pending = self._pending.split('\n')
+            self._lines.extend(lines)
+        return self._lines.pop(0).rstrip('\r') or default
+
+    def _readline_tty(self, prompt, timeout, default, stream, timeout_msg, completer):
+        self.buffer, self.cursor = self.partial, len(self.partial)
+        self.partial = ''
+        history_idx = len(self.history)
+        edited = self.buffer
+        deadline = None if timeout is None else _time.monotonic() + timeout
+        self._redraw(stream, prompt)
+        while True:
+            action, char = self._next_key()
+            if action is None:
+                event = self._wait(deadline)
+                if event != 'input':
+                    self.partial = self.buffer
+                    stream.write((timeout_msg if event == 'timeout' else '') + '\n')
+                    stream.flush()
+                    return default
+                data = _os.read(self.fd, 1024)
+                if not data:
+                    raise EOFError
+                self._pending += self._decoder.decode(data)
+                continue
+
+            if action == 'accept':
+                stream.write('\n')
+                stream.flush()
+                line = self.buffer
+                self.buffer, self.cursor = '', 0
+                if line.strip() and (not self.history or self.history[-1] != line):
+                    self.history.append(line)
+                    del self.history[:-self.history_size]
+                return line or default
+            elif action == 'eof':
+                if not self.buffer:
+                    stream.write('\n')
+                    stream.flush()
+                    raise EOFError
+                action = 'delete'
+
+            if action == 'insert':
+                self.buffer = self.buffer[:self.cursor] + char + self.buffer[self.cursor:]
+                self.cursor += len(char)
+            elif action == 'backspace' and self.cursor:
+                self.buffer = self.buffer[:self.cursor - 1] + self.buffer[self.cursor:]
+                self.cursor -= 1
+            elif action == 'delete':
+                self.buffer = self.buffer[:self.cursor] + self.buffer[self.cursor + 1:]
+            elif action == 'left':
+                self.cursor = max(0, self.cursor - 1)
+            elif action == 'right':
+                self.cursor = min(len(self.buffer), self.cursor + 1)
+            elif action == 'home':
+                self.cursor = 0
+            elif action == 'end':
+                self.cursor = len(self.buffer)
+            elif action == 'kill_end':
+                self.buffer = self.buffer[:self.cursor]
+            elif action == 'kill_line':
+                self.buffer, self.cursor = '', 0
+            elif action == 'kill_word':
+                start = self.cursor
+                while start and self.buffer[start - 1] in WORD_DELIMS:
+                    start -= 1
+                start = self._word_start(start)
+                self.buffer = self.buffer[:start] + self.buffer[self.cursor:]
+                self.cursor = start
+            elif action in ('history_prev', 'history_next'):
+                if history_idx == len(self.history):
+                    edited = self.buffer
+                step = -1 if action == 'history_prev' else 1
+                history_idx = min(max(0, history_idx + step), len(self.history))
+                self.buffer = self.history[history_idx] if history_idx < len(self.history) else edited
+                self.cursor = len(self.buffer)
+            elif action == 'complete' and completer is not None:
+                self._complete(completer, stream, prompt)
+            self._redraw(stream, prompt)
+
+    def _next_key(self):
+        """pop one key from the pending input; (None, None) if more input is needed."""
+        pending = self._pending
+        if not pending:
+            return None, None
+        if pending[0] == '\x1b':
+            for seq, action in _ESCAPES.items():
+                if pending.startswith(seq):
+                    self._pending = pending[len(seq):]
+                    return action, seq
+            if any(seq.startswith(pending) for seq in _ESCAPES):
+                return None, None  # incomplete escape sequence
+            # unknown sequence: drop ESC [ and any parameter bytes up to the final byte
+            end = 1
+            if len(pending) > 1 and pending[1] in '[O':
+                end = 2
+                while end < len(pending) and not ('@' <= pending[end] <= '~'):
+                    end += 1
+                end += 1
+            self._pending = pending[end:]
+            return 'ignore', None
+        self._pending = pending[1:]
+        char = pending[0]
+        if char in _CONTROLS:
+            return _CONTROLS[char], char
+        if char.isprintable():
+            return 'insert', char
+        return 'ignore', char
+
+    def _word_start(self, end=None):
+        end = self.cursor if end is None else end
+        start = end
+        while start and self.buffer[start - 1] not in WORD_DELIMS:
+            start -= 1
+        return start
+
+    def _complete(self, completer, stream, prompt):
+        begidx = self._word_start()
+        text = self.buffer[begidx:self.cursor]
+        self.completion = (self.buffer, begidx, self.cursor)
+        matches = []
+        try:
+            for state in range(COMPLETION_LIMIT):
+                match = completer(text, state)
+                if match is None:
+                    break
+                matches.append(match)
+        finally:
+            self.completion = None
+        if not matches:
+            return
+        if len(matches) == 1:
+            insert = matches[0][len(text):] + ' '
+        else:
+            insert = _os.path.commonprefix(matches)[len(text):]
+            if not insert:
+                stream.write('\n' + '  '.join(matches) + '\n')
+        self.buffer = self.buffer[:self.cursor] + insert + self.buffer[self.cursor:]
+        self.cursor += len(insert)
+
+    def _redraw(self, stream, prompt):
+        back = len(self.buffer) - self.cursor
+        stream.write('\r' + prompt + self.buffer + '\x1b[K' + ('\x1b[{}D'.format(back) if back else ''))
+        stream.flush()
+
+
+_EDITOR = None
+_EDITOR_LOCK = _threading.Lock()
+
+
+def get_editor():
+    """
+    process wide editor on stdin, shared by every shell so history is shared too.
+    every prompt should read through it: in non-tty mode it reads ahead, so a plain input() would miss lines.
+    """
+    global _EDITOR
+    with _EDITOR_LOCK:  # also reached from other threads through utils.input_wakeup
+        if _EDITOR is None or _EDITOR.infile is not _sys.stdin:
+            _EDITOR = LineEditor(_sys.stdin)
+        return _EDITOR
+
+
+def current_editor():
+    """the shared editor if one was created yet, else None (never creates one)."""
+    return _EDITOR
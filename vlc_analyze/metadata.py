@@ -11,16 +11,67 @@ License: N/A
 Description: 
 """
 import os as _os
+import mmap as _mmap
 import itertools as _it
-from copy import deepcopy as _deepcopy
 
 from mutagen.mp3 import EasyMP3 as _MP3
 from mutagen.flac import FLAC as _FLAC
 
+from .telemetry import METRICS as _METRICS
+
 _F_TYPES = {'mp3': _MP3,
             'flac': _FLAC,
             }
 
+# ID3v2 text frames read by the fast path, named as in mutagen's easyid3.py
+_ID3_FRAMES = {b'TALB': 'album',
+               b'TBPM': 'bpm',
+               b'TCMP': 'compilation',
+               b'TCOM': 'composer',
+               b'TCOP': 'copyright',
+               b'TENC': 'encodedby',
+               b'TEXT': 'lyricist',
+               b'TLEN': 'length',
+               b'TMED': 'media',
+               b'TMOO': 'mood',
+               b'TIT2': 'title',
+               b'TIT3': 'version',
+               b'TPE1': 'artist',
+               b'TPE2': 'albumartist',
+               b'TPE3': 'conductor',
+               b'TPE4': 'arranger',
+               b'TPOS': 'discnumber',
+               b'TPUB': 'organization',
+               b'TRCK': 'tracknumber',
+               b'TOLY': 'author',
+               b'TSO2': 'albumartistsort',
+               b'TSOA': 'albumsort',
+               b'TSOC': 'composersort',
+               b'TSOP': 'artistsort',
+               b'TSOT': 'titlesort',
+               b'TSRC': 'isrc',
+               b'TSST': 'discsubtitle',
+               b'TLAN': 'language',
+               }
+_ID3_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+# MPEG audio header tables, indexed by version bits (0: 2.5, 2: 2, 3: 1)
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000),
+                      2: (22050, 24000, 16000),
+                      0: (11025, 12000, 8000),
+                      }
+_MPEG1_L3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_MPEG2_L3_BITRATES = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+
+# errors that mean "not a layout the fast path understands"
+_FAST_ERRORS = (ValueError, IndexError, KeyError, UnicodeDecodeError, ZeroDivisionError)
+
+
+def file_type(afile):
+    """metadata backend name for a file, from its extension (mp3 if unknown)."""
+    ext = _os.path.splitext(afile)[1][1:].lower()
+    return ext if ext in _F_TYPES else 'mp3'
+
 
 def pairwise(iterable):
     """s -> (s0,s1), (s1,s2), (s2, s3), ..."""
@@ -29,6 +80,206 @@ def pairwise(iterable):
     return zip(a, b)
 
 
+class FastMetadata:
+    """
+    Read-only subset of Metadata produced by the fast path: possible_tags and length only.
+    audio_start/audio_end delimit the audio payload (everything that is not a tag block).
+    """
+    __slots__ = ('path', 'file', 'f_type', 'length', 'tags', 'audio_start', 'audio_end')
+
+    def __init__(self, path, f_type, length, tags, audio_start, audio_end):
+        self.path = _os.path.abspath(path)
+        self.file = _os.path.basename(path)
+        self.f_type = f_type
+        self.length = length
+        self.tags = tags
+        self.audio_start = audio_start
+        self.audio_end = audio_end
+
+    def get_audio_metadata(self, fields=None):
+        if fields:
+            return [self.tags.get(field, ('',))[0] for field in fields]
+        else:
+            return self.tags.items()
+
+
+def _syncsafe(buf):
+    return (buf[0] << 21) | (buf[1] << 14) | (buf[2] << 7) | buf[3]
+
+
+def _id3_text(frame):
+    encoding = _ID3_ENCODINGS[frame[0]]
+    return [value for value in str(frame[1:], encoding).split('\x00') if value]
+
+
+def _parse_id3v2(mv):
+    """return (tags, end offset) of a leading ID3v2.3/2.4 tag, or None for an unusual tag."""
+    version, flags = mv[3], mv[5]
+    if version not in (3, 4) or flags & 0x80:  # v2.2 or whole-tag unsynchronisation
+        return None
+    end = 10 + _syncsafe(mv[6:10])
+    pos = 10
+    if flags & 0x40:  # extended header
+        pos += _syncsafe(mv[10:14]) if version == 4 else 4 + int.from_bytes(mv[10:14], 'big')
+    tags = {}
+    while pos + 10 <= end and mv[pos] != 0:
+        frame_id = bytes(mv[pos:pos + 4])
+        size = _syncsafe(mv[pos + 4:pos + 8]) if version == 4 else int.from_bytes(mv[pos + 4:pos + 8], 'big')
+        fmt_flags = mv[pos + 9]
+        pos += 10
+        key = _ID3_FRAMES.get(frame_id)
+        if key is not None and size:
+            # grouped / compressed / encrypted / unsynchronised frames go through mutagen
+            if fmt_flags & (0x4f if version == 4 else 0xe0):
+                return None
+            values = _id3_text(mv[pos:pos + size])
+            if values:
+                tags[key] = values
+        pos += size
+    return tags, end + (10 if flags & 0x10 else 0)
+
+
+def _parse_id3v1(mv):
+    fields = (('title', 3, 33), ('artist', 33, 63), ('album', 63, 93))
+    tags = {}
+    for key, start, stop in fields:
+        value = str(mv[start:stop], 'latin-1').split('\x00')[0].strip()
+        if value:
+            tags[key] = [value]
+    if mv[125] == 0 and mv[126]:
+        tags['tracknumber'] = [str(mv[126])]
+    return tags
+
+
+def _parse_mp3(mv):
+    size = len(mv)
+    tags = {}
+    audio_start, audio_end = 0, size
+    if mv[:3] == b'ID3':
+        id3 = _parse_id3v2(mv)
+        if id3 is None:
+            return None
+        tags, audio_start = id3
+    if size >= 32 and mv[size - 32:size - 24] == b'APETAGEX':
+        return None
+    if size - audio_start >= 128 and mv[size - 128:size - 125] == b'TAG':
+        audio_end -= 128
+        for key, value in _parse_id3v1(mv[size - 128:]).items():
+            tags.setdefault(key, value)
+
+    # first frame must sit right after the tag; anything else is left to mutagen's resync
+    header = int.from_bytes(mv[audio_start:audio_start + 4], 'big')
+    version, layer = (header >> 19) & 0x3, (header >> 17) & 0x3
+    if header >> 21 != 0x7ff or version == 1 or layer != 1:  # layer bits 01 == layer III
+        return None
+    bitrate = (_MPEG1_L3_BITRATES if version == 3 else _MPEG2_L3_BITRATES)[(header >> 12) & 0xf] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][(header >> 10) & 0x3]
+    mono = (header >> 6) & 0x3 == 3
+    samples = 1152 if version == 3 else 576
+
+    # Xing/Info header holds the frame count of vbr (and some cbr) files
+    if version == 3:
+        xing = audio_start + 4 + (17 if mono else 32)
+    else:
+        xing = audio_start + 4 + (9 if mono else 17)
+    if mv[xing:xing + 4] in (b'Xing', b'Info') and mv[xing + 7] & 0x1:
+        frames = int.from_bytes(mv[xing + 8:xing + 12], 'big')
+        length = frames * samples / sample_rate
+    elif mv[audio_start + 36:audio_start + 40] == b'VBRI':
+        frames = int.from_bytes(mv[audio_start + 50:audio_start + 54], 'big')
+        length = frames * samples / sample_rate
+    else:
+        length = (audio_end - audio_start) * 8 / bitrate
+    return tags, length, audio_start, audio_end
+
+
+def _parse_flac(mv):
+    if mv[:4] != b'fLaC':
+        return None
+    tags = {}
+    length = None
+    pos = 4
+    last = False
+    while not last:
+        last = bool(mv[pos] & 0x80)
+        block_type = mv[pos] & 0x7f
+        block_size = int.from_bytes(mv[pos + 1:pos + 4], 'big')
+        pos += 4
+        if block_type == 0:  # STREAMINFO
+            packed = int.from_bytes(mv[pos + 10:pos + 18], 'big')
+            length = (packed & 0xfffffffff) / (packed >> 44)
+        elif block_type == 4:  # VORBIS_COMMENT
+            cursor = pos + 4 + int.from_bytes(mv[pos:pos + 4], 'little')
+            count = int.from_bytes(mv[cursor:cursor + 4], 'little')
+            cursor += 4
+            for _ in range(count):
+                comment_size = int.from_bytes(mv[cursor:cursor + 4], 'little')
+                key, _, value = str(mv[cursor + 4:cursor + 4 + comment_size], 'utf-8').partition('=')
+                key = key.lower()
+                if key in Metadata.possible_tags:
+                    tags.setdefault(key, []).append(value)
+                cursor += 4 + comment_size
+        pos += block_size
+    if length is None:
+        return None
+    return tags, length, pos, len(mv)
+
+
+_FAST_PARSERS = {'mp3': _parse_mp3,
+                 'flac': _parse_flac,
+                 }
+
+
+def _parse_buffer(parser, mv):
+    try:
+        return parser(mv)
+    except _FAST_ERRORS:
+        return None
+
+
+def read_fast(afile, f_type=None):
+    """
+    Fast-path reader for plain mp3/flac files.
+    Maps the file and slices tags and stream info straight out of the mapping.
+
+    returns a FastMetadata, or None if the file needs the full mutagen parser.
+    """
+    if f_type is None:
+        f_type = _os.path.splitext(afile)[1][1:]
+    parser = _FAST_PARSERS.get(f_type.lower())
+    if parser is None:
+        return None
+    try:
+        f = open(afile, 'rb')
+    except OSError as e:
+        if _METRICS.enabled:
+            _METRICS.error(e)
+        raise
+    with f:
+        try:
+            mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+    with mm, memoryview(mm) as mv:
+        result = _parse_buffer(parser, mv)
+        size = len(mv)
+    if result is None:
+        return None
+    if _METRICS.enabled:
+        _METRICS.parsed(size)
+    tags, length, audio_start, audio_end = result
+    return FastMetadata(afile, f_type.lower(), length, tags, audio_start, audio_end)
+
+
+def load_metadata(afile, f_type=None):
+    """
+    Read-only metadata for scanning: the fast path where possible, falling back to Metadata.
+    """
+    if f_type is None:
+        f_type = file_type(afile)
+    return read_fast(afile, f_type) or Metadata(afile, f_type)
+
+
 class Metadata:
     # list of some possible ID3 tags -- from mutagen's easyid3.py
     possible_tags = {"album",
@@ -61,13 +312,25 @@ class Metadata:
                      "language",
                      }
 
-    def __init__(self, afile=None, f_type='mp3'):
+    def __init__(self, afile=None, f_type=None):
+        if f_type is None:
+            f_type = file_type(afile)
+        self.path = _os.path.abspath(afile)
         self.file = _os.path.basename(afile)
-        self.audio = _F_TYPES[f_type.lower()](afile)
+        self.f_type = f_type.lower()
+        try:
+            self.audio = _F_TYPES[f_type.lower()](afile)
+        except Exception as e:
+            if _METRICS.enabled:
+                _METRICS.error(e)
+            raise
+        if _METRICS.enabled:
+            _METRICS.parsed(_os.path.getsize(afile))
 
     @property
     def tags(self):
-        return _deepcopy(self.audio)
+        """working copy of the text tags (one list per field); embedded pictures are never copied."""
+        return {k: list(v) for k, v in self.audio.items()}
 
     @property
     def length(self):
@@ -79,7 +342,7 @@ class Metadata:
         else:
             return self.audio.items()
 
-    def edit_meta_data(self):
+    def edit_meta_data(self, writeback=None):
         for field in self.audio:
             print('%s: %s' % (field, self.audio[field][0]))
         flag = True
@@ -97,7 +360,11 @@ class Metadata:
             # elif tmp_args == 'save':
             elif tmp_args == 's':
                 self.audio.update(tmp_dict)
-                self.audio.save()
+                if writeback is None:
+                    self.audio.save()
+                else:  # queued and coalesced, so repeated saves cost one write
+                    writeback.submit(self.path, self.sanitize({k: v if isinstance(v, list) else [v]
+                                                               for k, v in tmp_dict.items()}))
             # elif tmp_args == 'view':
             elif tmp_args == 'v':
                 for field in tmp_dict:
@@ -0,0 +1,292 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+remote.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Local remote control for the shells.
+    An asyncio server (unix socket, or localhost tcp where unix sockets are unavailable)
+    runs in a background thread. Clients send shell command lines, one per line; each
+    command is handed to the shell thread, which is woken from its prompt, runs the
+    command exactly as if it had been typed and sends back one JSON line:
+        {"reply": <line>, "ok": true, "output": <captured output>, "stop": false}
+    Events such as {"event": "now_playing", ...} are pushed to every connected client.
+    Commands are only picked up at the shell's own prompt: while the shell waits on the
+    terminal inside a command (delete's confirmation, the metadata sub-shell of edit)
+    they queue up and run once that command returns.
+
+    python -m vlc_analyze.remote [--address ADDRESS] [--follow] [command ...]
+"""
+import io as _io
+import os as _os
+import sys as _sys
+import json as _json
+import socket as _socket
+import asyncio as _asyncio
+import threading as _threading
+from collections import deque as _deque
+from concurrent.futures import Future as _Future
+
+from . import utils
+
+SOCKET_FILENAME = 'vlc_analyze.sock'
+DEFAULT_PORT = 47811
+if hasattr(_socket, 'AF_UNIX'):
+    DEFAULT_ADDRESS = _os.path.join(utils.BOOKMARK_PATH, SOCKET_FILENAME)
+else:
+    DEFAULT_ADDRESS = '127.0.0.1:{}'.format(DEFAULT_PORT)
+
+
+def parse_address(address=None):
+    """'host:port' -> (host, port) for tcp; anything else is a unix socket path."""
+    address = address or DEFAULT_ADDRESS
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and _os.sep not in address:
+        return host or '127.0.0.1', int(port)
+    return address
+
+
+def _encode(message):
+    return (_json.dumps(message) + '\n').encode('utf-8')
+
+
+class RemoteServer:
+    """
+    Background remote control endpoint.
+    Shells call dispatch() from their own thread to run queued commands;
+    any thread may call publish() to push an event to the clients.
+
+    :param wakeup: called whenever a command is queued, to interrupt the shell's prompt.
+    """
+
+    def __init__(self, address=None, wakeup=utils.input_wakeup):
+        self.address = parse_address(address)
+        self.wakeup = wakeup
+        self._commands = _deque()  # (line, Future)
+        self._writers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._error = None
+
+    @property
+    def unix(self):
+        return not isinstance(self.address, tuple)
+
+    def __str__(self):
+        return self.address if self.unix else '{}:{}'.format(*self.address)
+
+    # server thread
+    def start(self):
+        """bind the endpoint and start serving; returns self."""
+        if self.unix:
+            self._clear_stale_socket()
+        ready = _threading.Event()
+        self._loop = _asyncio.new_event_loop()
+        self._thread = _threading.Thread(target=self._run, args=(ready,), name='remote', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def _clear_stale_socket(self):
+        if not _os.path.exists(self.address):
+            return
+        probe = _socket.socket(_socket.AF_UNIX)
+        try:
+            probe.connect(self.address)
+        except OSError:
+            _os.remove(self.address)  # left behind by a session that died
+        else:
+            raise OSError('another session is already listening on {}'.format(self.address))
+        finally:
+            probe.close()
+
+    def _run(self, ready):
+        loop = self._loop
+        _asyncio.set_event_loop(loop)
+        try:
+            if self.unix:
+                self._server = loop.run_until_complete(_asyncio.start_unix_server(self._client, path=self.address))
+                _os.chmod(self.address, 0o600)
+            else:
+                host, port = self.address
+                self._server = loop.run_until_complete(_asyncio.start_server(self._client, host, port))
+                self.address = self._server.sockets[0].getsockname()[:2]
+        except Exception as e:
+            self._error = e
+            loop.close()
+            ready.set()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    async def _client(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', 'replace').strip()
+                if not line:
+                    continue
+                future = _Future()
+                self._commands.append((line, future))
+                self.wakeup()
+                try:
+                    output, stop = await _asyncio.wrap_future(future)
+                except Exception as e:
+                    message = {'reply': line, 'ok': False, 'error': '{}: {}'.format(type(e).__name__, e)}
+                else:
+                    message = {'reply': line, 'ok': True, 'output': output, 'stop': stop}
+                writer.write(_encode(message))
+                await writer.drain()
+        except (ConnectionError, _asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _broadcast(self, data):
+        for writer in list(self._writers):
+            try:
+                writer.write(data)
+            except (ConnectionError, RuntimeError):
+                self._writers.discard(writer)
+
+    def close(self):
+        """stop serving; commands still queued fail with a ConnectionAbortedError. safe to call more than once."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        while self._commands:
+            _, future = self._commands.popleft()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ConnectionAbortedError('remote control closed'))
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        if self.unix:
+            try:
+                _os.remove(self.address)
+            except FileNotFoundError:
+                pass
+
+    # shell side
+    def pending(self):
+        return bool(self._commands)
+
+    def publish(self, event, **data):
+        """push {"event": event, **data} to every client (callable from any thread)."""
+        data['event'] = event
+        self._loop.call_soon_threadsafe(self._broadcast, _encode(data))
+
+    def dispatch(self, shell):
+        """
+        run queued commands on shell, from the shell's thread, the same way cmdloop would.
+        output is captured for the client and echoed to the shell's own stdout.
+        returns the stop flag of the last command run.
+        """
+        stop = False
+        while self._commands and not stop:
+            line, future = self._commands.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            stdout, shell.stdout = shell.stdout, _io.StringIO()
+            try:
+                line = shell.precmd(line)
+                stop = shell.postcmd(shell.onecmd(line), line)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result((shell.stdout.getvalue(), bool(stop)))
+            finally:
+                output, shell.stdout = shell.stdout.getvalue(), stdout
+                if output:
+                    stdout.write(output)
+                    stdout.flush()
+        return stop
+
+
+# client side
+def connect(address=None, timeout=None):
+    """blocking socket connected to a running session."""
+    address = parse_address(address)
+    if isinstance(address, tuple):
+        return _socket.create_connection(address, timeout)
+    sock = _socket.socket(_socket.AF_UNIX)
+    sock.settimeout(timeout)
+    sock.connect(address)
+    return sock
+
+
+def send(commands, address=None, timeout=10.0, on_event=None):
+    """
+    run command lines on a running session; returns their replies in order.
+    events arriving in the meantime go to on_event(message).
+    """
+    with connect(address, timeout) as sock, sock.makefile('rwb') as stream:
+        for command in commands:
+            stream.write(command.encode('utf-8') + b'\n')
+        stream.flush()
+        replies = []
+        while len(replies) < len(commands):
+            line = stream.readline()
+            if not line:
+                raise ConnectionError('session closed the connection')
+            message = _json.loads(line.decode('utf-8'))
+            if 'event' in message:
+                if on_event is not None:
+                    on_event(message)
+            else:
+                replies.append(message)
+        return replies
+
+
+def follow(address=None, on_event=print):
+    """print (or hand to on_event) every event of a running session until it ends."""
+    with connect(address) as sock, sock.makefile('rb') as stream:
+        for line in stream:
+            on_event(_json.loads(line.decode('utf-8')))
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser('vlc_analyze.remote')
+    parser.add_argument('--address', '-a', type=str, default=None,
+                        help='unix socket path or host:port of the session (default: {}).'.format(DEFAULT_ADDRESS))
+    parser.add_argument('--follow', '-f', action='store_true', help='print events until the session ends.')
+    parser.add_argument('command', nargs='*', help='shell command line to run, e.g. "next_track" or "skip -10".')
+    args = parser.parse_args()
+
+    def print_event(message):
+        _sys.stdout.write(_json.dumps(message) + '\n')
+        _sys.stdout.flush()
+
+    status = 0
+    if args.command:
+        reply = send([' '.join(args.command)], args.address, on_event=print_event if args.follow else None)[0]
+        if reply['ok']:
+            _sys.stdout.write(reply['output'])
+        else:
+            _sys.stderr.write(reply['error'] + '\n')
+            status = 1
+    if args.follow:
+        follow(args.address, print_event)
+    _sys.exit(status)
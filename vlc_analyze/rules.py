@@ -0,0 +1,189 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+rules.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Declarative tag normalization rules.
+    A JSON config lists rules in order; they are compiled once into a single
+    function that runs over a file's tags in one pass, and files are only
+    written when that pass actually changed something.
+
+    Example config:
+    {"rules": [
+        {"rule": "strip"},
+        {"rule": "nfc"},
+        {"rule": "mojibake", "fields": ["artist", "album", "title"]},
+        {"rule": "filename_split", "pattern": "{artist} - {title}"},
+        {"rule": "zero_pad", "fields": ["tracknumber"], "width": 2}
+    ]}
+"""
+import os as _os
+import re as _re
+import json as _json
+import unicodedata as _unicodedata
+from string import Formatter as _Formatter
+
+from . import utils
+from .bulk import current_tags, apply_changes
+from .metadata import Metadata
+
+RULES = {}
+
+
+def rule(name):
+    """register a rule factory: factory(fields, **options) -> func(tags, path) mutating tags in place."""
+    def register(factory):
+        RULES[name] = factory
+        return factory
+    return register
+
+
+def _map_values(fields, func):
+    def apply(tags, path):
+        for field in (tags if fields is None else fields):
+            if field in tags:
+                tags[field] = [func(value) for value in tags[field]]
+    return apply
+
+
+@rule('strip')
+def strip_rule(fields=None):
+    """trim leading / trailing whitespace and collapse inner runs of spaces."""
+    spaces = _re.compile(r'\s{2,}')
+    return _map_values(fields, lambda value: spaces.sub(' ', value.strip()))
+
+
+@rule('nfc')
+def nfc_rule(fields=None, form='NFC'):
+    """unicode normalization (NFC by default)."""
+    return _map_values(fields, lambda value: _unicodedata.normalize(form, value))
+
+
+@rule('mojibake')
+def mojibake_rule(fields=None, encodings=('latin-1', 'cp1252')):
+    """undo utf-8 text that was decoded as latin-1 / cp1252 (e.g. from ID3v1 fields)."""
+    def fix(value):
+        for encoding in encodings:
+            try:
+                fixed = value.encode(encoding).decode('utf-8')
+            except UnicodeError:
+                continue
+            if fixed != value:
+                return fixed
+        return value
+    return _map_values(fields, fix)
+
+
+@rule('zero_pad')
+def zero_pad_rule(fields=('tracknumber',), width=2):
+    """zero pad numbers like tracknumber, keeping a '/total' suffix: 3/12 -> 03/12."""
+    number = _re.compile(r'^(\d+)(/\d+)?$')
+
+    def pad(value):
+        match = number.match(value.strip())
+        if match is None:
+            return value
+        return match.group(1).zfill(width) + (match.group(2) or '')
+    return _map_values(fields, pad)
+
+
+@rule('filename_split')
+def filename_split_rule(fields=None, pattern='{artist} - {title}', overwrite=False):
+    """fill tags from the file name, e.g. pattern '{artist} - {title}'. only fills missing tags unless overwrite."""
+    regex = ''
+    for literal, field, _, _ in _Formatter().parse(pattern):
+        regex += _re.escape(literal)
+        if field:
+            if field not in Metadata.possible_tags:
+                raise ValueError('Unknown tag {} in filename pattern {}'.format(field, pattern))
+            regex += '(?P<{}>.+?)'.format(field)
+    compiled = _re.compile('^{}$'.format(regex))
+
+    def split(tags, path):
+        match = compiled.match(_os.path.splitext(_os.path.basename(path))[0])
+        if match is None:
+            return
+        for field, value in match.groupdict().items():
+            if (fields is None or field in fields) and (overwrite or not tags.get(field) or not tags[field][0]):
+                tags[field] = [value.strip()]
+    return split
+
+
+MAX_PASSES = 4
+
+
+def compile_rules(config):
+    """
+    build one func(tags, path) -> new tags from a config dict ({'rules': [...]}) or a list of rules.
+    the rules are re-applied until the tags settle (values filled in by a later rule still get
+    normalized by earlier ones), so a second run over the same files changes nothing.
+    """
+    specs = config['rules'] if isinstance(config, dict) else config
+    steps = []
+    for spec in specs:
+        spec = dict(spec)
+        name = spec.pop('rule')
+        try:
+            factory = RULES[name]
+        except KeyError:
+            raise ValueError('Unknown rule {!r}; known rules: {}'.format(name, ', '.join(sorted(RULES))))
+        steps.append(factory(**spec))
+
+    def run(tags, path):
+        tags = {k: list(v) for k, v in tags.items()}
+        for _ in range(MAX_PASSES):
+            before = {k: list(v) for k, v in tags.items()}
+            for step in steps:
+                step(tags, path)
+            if tags == before:
+                break
+        return tags
+    return run
+
+
+def load_rules(path):
+    with open(path, encoding='utf-8') as f:
+        return compile_rules(_json.load(f))
+
+
+def changed_tags(old, new):
+    """{field: values} that differ between two tag dicts; removed fields map to []."""
+    changes = {k: v for k, v in new.items() if old.get(k) != v}
+    changes.update({k: [] for k in old if k not in new})
+    return changes
+
+
+def fix_tags(files, rules, index=None, workers=4, dry_run=False, report=None):
+    """
+    run compiled rules over files in parallel, writing only files whose tags changed.
+    tags are read from the index when fresh, so an idempotent re-run costs no file reads.
+
+    :param report: optional callable(path, changes, exception) for changed / failed files.
+    returns a dict of counters.
+    """
+    counts = {'files': 0, 'changed_files': 0, 'changed_cells': 0, 'errors': 0}
+
+    def process(file):
+        path = _os.path.abspath(file)
+        tags = current_tags(path, index)
+        changes = changed_tags(tags, rules(tags, path))
+        if changes and not dry_run:
+            apply_changes(path, changes, index)
+        return changes
+
+    for file, changes, error in utils.parallel_imap(process, files, workers):
+        counts['files'] += 1
+        if error is not None:
+            counts['errors'] += 1
+        elif changes:
+            counts['changed_files'] += 1
+            counts['changed_cells'] += len(changes)
+        if report is not None and (error is not None or changes):
+            report(file, changes, error)
+    return counts
@@ -0,0 +1,406 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+scan.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Parallel media scanning over several roots at once.
+    Directory listings are the unit of work. They are scheduled per device (st_dev)
+    so each device has its own concurrency limit: a spinning disk is read one directory
+    at a time while SSD / network roots use the whole thread pool. A device at its limit
+    queues its own work instead of tying up pool threads, so a slow disk never starves
+    the others. Results of all roots merge into one stream, either root by root
+    (command line order) or interleaved.
+
+    Without an order files come out as they are found. With one (see ORDERS) each root
+    is walked depth first, one sorted directory at a time, while the next few directories
+    are listed ahead in the background; so the order is deterministic without ever
+    holding more than the directories along the current path. Tag sort keys are cached
+    in the index per directory.
+"""
+import os as _os
+import re as _re
+import stat as _stat
+import queue as _queue
+import threading as _threading
+from collections import deque as _deque
+from concurrent.futures import Future as _Future, ThreadPoolExecutor as _ThreadPoolExecutor
+
+from .metadata import load_metadata
+from .telemetry import METRICS as _METRICS
+
+ROTATIONAL_LIMIT = 1  # directory listings in flight on a spinning disk
+MERGE_MODES = ('ordered', 'interleave')
+ORDERS = ('path', 'tags', 'mtime')
+PREFETCH = 8  # directories listed ahead of a sorted walk
+_DONE = object()
+_DIGITS = _re.compile(r'(\d+)')
+
+
+def rotational(dev):
+    """True if dev is a spinning disk (linux sysfs); False if unknown, e.g. network or virtual filesystems."""
+    block = '/sys/dev/block/{}:{}'.format(_os.major(dev), _os.minor(dev))
+    for flag in (_os.path.join(block, 'queue', 'rotational'), _os.path.join(block, '..', 'queue', 'rotational')):
+        try:
+            with open(flag) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return False
+
+
+class IOLimits:
+    """
+    Concurrency limit per device; 0 means unlimited (bounded by the pool size).
+
+    :param default: limit for every device, or None to pick per device (ROTATIONAL_LIMIT for spinning disks).
+    :param paths: {path: limit} overrides for the devices holding those paths.
+    """
+
+    def __init__(self, default=None, paths=None):
+        self.default = default
+        self.devices = {_os.stat(path).st_dev: limit for path, limit in (paths or {}).items()}
+
+    @classmethod
+    def parse(cls, specs):
+        """from command line specs: 'N' sets the default, 'PATH=N' the device of PATH."""
+        default, paths = None, {}
+        for spec in specs or ():
+            path, sep, limit = spec.rpartition('=')
+            if sep:
+                paths[path] = int(limit)
+            else:
+                default = int(limit)
+        return cls(default, paths)
+
+    def limit(self, dev):
+        if dev not in self.devices:
+            if self.default is not None:
+                self.devices[dev] = self.default
+            else:
+                self.devices[dev] = ROTATIONAL_LIMIT if rotational(dev) else 0
+        return self.devices[dev]
+
+
+def _matcher(extensions):
+    suffixes = tuple(_os.path.normcase('.' + ext.lstrip('.')) for ext in extensions)
+    return lambda name: _os.path.normcase(name).endswith(suffixes)
+
+
+# sort keys
+def natural_key(name):
+    """'Track 10' sorts after 'track 9': digit runs compare as numbers, the rest case-insensitively."""
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part.casefold())
+                 for part in _DIGITS.split(name) if part)
+
+
+def _leading_number(values):
+    """3 from ['3/12']; 0 if missing or not numeric."""
+    match = _DIGITS.match(values[0].strip()) if values else None
+    return int(match.group(1)) if match else 0
+
+
+def tag_key(tags):
+    """(album, disc, track) sort key of a tag dict."""
+    return (tags.get('album', ('',))[0].casefold(), _leading_number(tags.get('discnumber')),
+            _leading_number(tags.get('tracknumber')))
+
+
+def _tag_keys(entries, index):
+    """{path: tag_key} for the files of one directory, from the index where its keys are still fresh."""
+    if not entries:
+        return {}
+    stats = {entry.path: entry.stat() for entry in entries}
+    cached = index.sort_keys(_os.path.dirname(entries[0].path)) if index is not None else {}
+    keys, fresh, rows = {}, [], []
+    for path, stat in stats.items():
+        entry = cached.get(path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            keys[path] = entry[2:]
+            continue
+        try:
+            meta = load_metadata(path)
+        except Exception:  # unreadable files sort first and are left to the shell to report
+            keys[path] = ('', 0, 0)
+            continue
+        keys[path] = tag_key(dict(meta.get_audio_metadata()))
+        if index is not None:
+            fresh.append((path, stat.st_size, stat.st_mtime) + keys[path])
+            rows.append(index.track_row(meta, stat))
+    if fresh:
+        index.record_rows(rows)
+        index.record_sort_keys(fresh)
+    return keys
+
+
+def sort_entries(entries, order, index=None):
+    """sort the file DirEntries of one directory by order (see ORDERS)."""
+    if order == 'path':
+        return sorted(entries, key=lambda entry: natural_key(entry.name))
+    if order == 'mtime':
+        return sorted(entries, key=lambda entry: (entry.stat().st_mtime, natural_key(entry.name)))
+    if order == 'tags':
+        keys = _tag_keys(entries, index)
+        return sorted(entries, key=lambda entry: keys[entry.path] + (natural_key(entry.name),))
+    raise ValueError('order must be one of {}'.format(', '.join(ORDERS)))
+
+
+# scheduling
+class DeviceScheduler:
+    """
+    Thread pool whose jobs are tagged with a device.
+    A device never runs more than its IOLimits limit at once; jobs over the limit wait in
+    a queue of their own device instead of occupying a pool thread.
+    """
+
+    def __init__(self, limits, workers):
+        self.limits = limits
+        self.pool = _ThreadPoolExecutor(max_workers=workers)
+        self._lock = _threading.Lock()
+        self._running = {}  # dev -> jobs in flight
+        self._waiting = {}  # dev -> deque of jobs over the device limit
+
+    def submit(self, dev, func, *args):
+        """run func(*args) within the limit of dev; returns a Future."""
+        job = (_Future(), func, args)
+        limit = self.limits.limit(dev)
+        with self._lock:
+            if limit and self._running.get(dev, 0) >= limit:
+                self._waiting.setdefault(dev, _deque()).append(job)
+                return job[0]
+            self._running[dev] = self._running.get(dev, 0) + 1
+        self._start(dev, job)
+        return job[0]
+
+    def _start(self, dev, job):
+        try:
+            self.pool.submit(self._run, dev, job)
+        except RuntimeError:  # shut down
+            job[0].cancel()
+
+    def _run(self, dev, job):
+        future, func, args = job
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                waiting = self._waiting.get(dev)
+                follow = waiting.popleft() if waiting else None
+                if follow is None:
+                    self._running[dev] -= 1
+            if follow is not None:
+                self._start(dev, follow)
+
+    def shutdown(self):
+        with self._lock:
+            waiting = [job for jobs in self._waiting.values() for job in jobs]
+            self._waiting.clear()
+        for future, _, _ in waiting:
+            future.cancel()
+        self.pool.shutdown(wait=False)
+
+
+class _Scan:
+    """one scan over several roots."""
+
+    def __init__(self, roots, extensions, recursive, limits, workers, order=None, index=None):
+        self.roots = roots
+        self.match = _matcher(extensions)
+        self.recursive = recursive
+        self.order = order
+        self.index = index
+        self.scheduler = DeviceScheduler(limits, workers)
+        self.closed = False
+        self._lock = _threading.Lock()
+        self._seen = set()  # real paths of symlinked directories, to break cycles
+        self._real_roots = tuple(_os.path.join(_os.path.realpath(root), '') for root in roots)
+
+    def close(self):
+        self.closed = True
+        self.scheduler.shutdown()
+
+    def _follow(self, link):
+        """follow a directory symlink only into trees no root covers and no earlier link reached."""
+        real = _os.path.join(_os.path.realpath(link), '')
+        with self._lock:
+            if real.startswith(self._real_roots) or real in self._seen:
+                return False
+            self._seen.add(real)
+        return True
+
+    def _listing(self, directory):
+        """([matching file DirEntries], [subdirectory paths]) of one directory; unreadable ones are empty."""
+        found, subdirs = [], []
+        try:
+            with _os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):  # hidden, as with glob
+                        continue
+                    try:
+                        if self.recursive and entry.is_dir():
+                            if entry.is_symlink() and not self._follow(entry.path):
+                                continue
+                            subdirs.append(entry.path)
+                        elif self.match(entry.name) and entry.is_file():
+                            found.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:  # skipped, as glob would
+            if _METRICS.enabled:
+                _METRICS.error(e)
+        if found and _METRICS.enabled:
+            _METRICS.scanned(len(found))
+        return found, subdirs
+
+    def _sorted_listing(self, directory):
+        found, subdirs = self._listing(directory)
+        found = [entry.path for entry in sort_entries(found, self.order, self.index)]
+        return found, sorted(subdirs, key=lambda path: natural_key(_os.path.basename(path)))
+
+    def _root(self, root):
+        """(device, absolute path) of a directory root, or the file / nothing to pass through as a batch."""
+        try:
+            stat = _os.stat(root)
+        except OSError as e:
+            if _METRICS.enabled:
+                _METRICS.error(e)
+            return None, []
+        if not _stat.S_ISDIR(stat.st_mode):
+            return None, [_os.path.abspath(root)]
+        return stat.st_dev, _os.path.abspath(root)
+
+    # unordered: every listing schedules its subdirectories, batches go out as they come
+    def unordered(self):
+        """iterate (root index, batch of paths | _DONE) in completion order."""
+        results = _queue.Queue()
+        outstanding = [0] * len(self.roots)  # directories queued or being listed, per root
+
+        def visit(dev, idx, directory):
+            try:
+                if self.closed:
+                    return
+                found, subdirs = self._listing(directory)
+                if found:
+                    results.put((idx, [entry.path for entry in found]))
+                # mount points below a root are rare; subdirectories are charged to the parent's device
+                with self._lock:
+                    outstanding[idx] += len(subdirs)
+                for subdir in subdirs:
+                    self.scheduler.submit(dev, visit, dev, idx, subdir)
+            finally:
+                with self._lock:
+                    outstanding[idx] -= 1
+                    done = not outstanding[idx]
+                if done:
+                    results.put((idx, _DONE))
+
+        for idx, root in enumerate(self.roots):
+            dev, root = self._root(root)
+            if dev is None:
+                results.put((idx, root))
+                results.put((idx, _DONE))
+            else:
+                outstanding[idx] = 1
+                self.scheduler.submit(dev, visit, dev, idx, root)
+        remaining = len(self.roots)
+        while remaining:
+            idx, batch = results.get()
+            if batch is _DONE:
+                remaining -= 1
+            yield idx, batch
+
+    # sorted: depth first, one directory at a time, with a window of listings in flight
+    def walk_sorted(self, root):
+        """iterate the sorted file batches of one root, a directory at a time. starts listing right away."""
+        dev, root = self._root(root)
+        if dev is None:
+            return iter([root] if root else [])
+        stack = [[root, None]]  # [directory, Future of its listing], next directory last
+        self._prefetch(dev, stack)
+        return self._walk(dev, stack)
+
+    def _prefetch(self, dev, stack):
+        for entry in stack[-PREFETCH:]:
+            if entry[1] is None:
+                entry[1] = self.scheduler.submit(dev, self._sorted_listing, entry[0])
+
+    def _walk(self, dev, stack):
+        while stack:
+            directory, future = stack.pop()
+            found, subdirs = future.result()
+            stack.extend([subdir, None] for subdir in reversed(subdirs))
+            self._prefetch(dev, stack)
+            if found:
+                yield found
+
+
+def scan_roots(roots, extensions, recursive=False, limits=None, workers=8, merge='ordered', order=None,
+               index=None):
+    """
+    yield media files (absolute paths) below every root, scanning all roots concurrently.
+    roots that are files are passed through unfiltered.
+
+    :param limits: IOLimits; defaults to one listing at a time on spinning disks, unlimited elsewhere.
+    :param merge: 'ordered' yields root by root in the given order (later roots are buffered while
+                  earlier ones finish); 'interleave' mixes the roots: as files are found, or with an
+                  order, one directory of each root in turn.
+    :param order: None for discovery order, or one of ORDERS to walk every root sorted, directory by
+                  directory. 'tags' sorts by album/disc/track, caching the keys in index.
+    """
+    if merge not in MERGE_MODES:
+        raise ValueError('merge must be one of {}'.format(', '.join(MERGE_MODES)))
+    if order is not None and order not in ORDERS:
+        raise ValueError('order must be one of {}'.format(', '.join(ORDERS)))
+    if isinstance(roots, str):
+        roots = [roots]
+    scan = _Scan(list(roots), extensions, recursive, limits or IOLimits(), workers, order, index)
+    try:
+        if order is not None:
+            yield from _merge_sorted([scan.walk_sorted(root) for root in scan.roots], merge)
+        else:
+            yield from _merge_unordered(scan.unordered(), len(scan.roots), merge)
+    finally:
+        scan.close()
+
+
+def _merge_sorted(walks, merge):
+    if merge == 'ordered':
+        for walk in walks:
+            for batch in walk:
+                yield from batch
+        return
+    while walks:  # round robin, a directory at a time
+        for walk in list(walks):
+            batch = next(walk, None)
+            if batch is None:
+                walks.remove(walk)
+            else:
+                yield from batch
+
+
+def _merge_unordered(results, count, merge):
+    buffered = [[] for _ in range(count)]
+    finished = [False] * count
+    current = 0  # root being yielded in ordered mode
+    for idx, batch in results:
+        if batch is _DONE:
+            finished[idx] = True
+        elif merge == 'interleave' or idx == current:
+            yield from batch
+        else:
+            buffered[idx].append(batch)
+        while merge == 'ordered' and current < count and finished[current]:
+            current += 1
+            if current < count:
+                for pending in buffered[current]:
+                    yield from pending
+                buffered[current] = None
@@ -13,15 +13,39 @@ Description:
 import os as _os
 import vlc as _vlc
 import time as _time
-from urllib import request as urllib
 
 from . import utils
+from .instrument import STATS
 from .interpreter import AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix
 
-from .metadata import Metadata
+from .metadata import Metadata, load_metadata
+from .library import Library
+from .index import MetadataIndex, PLAY_FINISHED, PLAY_DELETED
+from .trash import Trash
+from .writeback import WriteBack
 
 # constants
 HORIZ_LINE = 78 * '-'
+FINISHED_POSITION = 0.98  # player position past which a track counts as listened to the end
+SAMPLE_SEGMENTS = ('intro', 'middle', 'outro')
+SEGMENT_SLACK_MS = 50  # a segment this close to its end counts as played
+
+
+def sample_windows(length, sample, segments=SAMPLE_SEGMENTS):
+    """
+    [(start ms, end ms)] of the snippets of a track to play in sample mode.
+    each named segment is `sample` seconds long; overlapping snippets merge, so short tracks play whole.
+    """
+    length_ms, sample_ms = int(length * 1000), int(sample * 1000)
+    starts = {'intro': 0, 'middle': (length_ms - sample_ms) // 2, 'outro': length_ms - sample_ms}
+    windows = []
+    for start, end in sorted((max(0, starts[segment]), min(length_ms, max(0, starts[segment]) + sample_ms))
+                             for segment in segments):
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(end, windows[-1][1]))
+        else:
+            windows.append((start, end))
+    return windows
 
 
 class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
@@ -31,16 +55,55 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
     misc_header = 'Reference/help guides (type help/? <topic>):'
     undoc_header = None
 
-    def __init__(self, media_files, interact=False, *args, **kwargs):
+    def __init__(self, media_files, interact=False, *args, index=None, trash=None, remote=None, writeback=None,
+                 sample=None, segments=SAMPLE_SEGMENTS, **kwargs):
         super(AudioShell, self).__init__(*args, **kwargs)
         self.file_list = iter(media_files)
         self.played_files = []
+        self.library = Library()
+        # index / trash / writeback passed in are owned (and closed) by the caller
+        self.index = MetadataIndex() if index is None else index
+        self.writeback = WriteBack(index=self.index) if writeback is None else writeback
+        self.trash = Trash(index=self.index, writeback=self.writeback) if trash is None else trash
+        # the trash first: purging it drops the edits of deleted files before the writer shuts down
+        self._owned = (([self.trash] if trash is None else []) + ([self.writeback] if writeback is None else []) +
+                       ([self.index] if index is None else []))
+        self.remote = remote  # RemoteServer, owned by the caller
+        # sample mode: play only `sample` seconds of each of `segments` per track
+        self.sample = sample
+        self.segments = segments
+        self._windows = []  # (start ms, end ms) of the current track's snippets
+        self._window = 0
+        self.track = None  # TrackView of the current track
+        self._mdatashell = None  # built on first edit, see mdatashell
+        self.current_file = None
+        self._current_mtime = None
+        self._play_started = None
         self.player_instance = _vlc.Instance()
         self.interactive = interact
         self.player = self.player_instance.media_player_new()
+        # wake the timed prompt as soon as a track ends instead of waiting out the timeout
+        self.player.event_manager().event_attach(_vlc.EventType.MediaPlayerEndReached,
+                                                 lambda event: utils.input_wakeup())
+
+    def _end_ms(self):
+        """end of what is being played: the current sample snippet, or the whole track."""
+        if self._windows:
+            return self._windows[self._window][1]
+        return int(self.track.length * 1000)
 
     def _set_timeout(self):
-        self.timeout = self.metadata.length * (1 - self.player.get_position()) + .1
+        start = self._windows[self._window][0] if self._windows else 0
+        now = max(self.player.get_time(), start)  # -1 / 0 until playback actually started
+        self.timeout = max(self._end_ms() - now, 0) / 1000 + .1
+
+    def _next_window(self):
+        """jump to the next sample snippet; False after the last one."""
+        if self._window + 1 >= len(self._windows):
+            return False
+        self._window += 1
+        self.player.set_time(self._windows[self._window][0])
+        return True
 
     def _set_prompt(self, file_name):
         name = _os.path.splitext(_os.path.basename(file_name))[0]
@@ -48,21 +111,38 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
             name = name[:27] + '...'
         self.prompt = '{} > '.format(name)
 
+    def _log_play(self, deleted=False):
+        """record how the current track was left in the listening history."""
+        if self.current_file is None:
+            return
+        ended = self.player.get_state() == _vlc.State.Ended
+        finished = ended or self.player.get_position() >= FINISHED_POSITION
+        listened = min(_time.monotonic() - self._play_started, self.track.length)
+        flags = (PLAY_FINISHED if finished else 0) | (PLAY_DELETED if deleted else 0)
+        self.index.log_play(self.current_file, self._current_mtime, listened, flags)
+        self.played_files.append(self.current_file)
+        self.current_file = None
+
     def get_file_from_player(self):
-        return urllib.unquote(self.player.get_media().get_mrl())[8:].replace('/', _os.sep)
+        return utils.mrl_to_path(self.player.get_media().get_mrl())
 
     # noinspection PyMethodMayBeStatic
     def emptyline(self):
         return False
 
-    # noinspection PyUnusedLocal
     def postcmd(self, stop, line):
-        if stop:
-            return True
+        if not stop:
+            stop = self._advance()
+        return super(AudioShell, self).postcmd(stop, line)
+
+    def _advance(self):
+        """move on once the current track (or snippet) is over; True when the queue ran out."""
         if not self.player.is_playing():
             return self.do_next_track()
-        else:
-            self._set_timeout()
+        if self._windows and self.player.get_time() >= self._end_ms() - SEGMENT_SLACK_MS:
+            if not self._next_window():
+                return self.do_next_track()
+        self._set_timeout()
 
     # noinspection PyUnusedLocal
     def do_quit(self, *args):
@@ -73,8 +153,13 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
         quit
         """
         self.file_list = iter([])
+        self._log_play()
+        if self.remote is not None:
+            self.remote.publish('stopped')
         self.player.stop()
         self.player_instance.release()
+        for owned in self._owned:
+            owned.close()
 
     # noinspection PyUnusedLocal,PyAttributeOutsideInit
     def do_next_track(self, *args):
@@ -85,60 +170,167 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
         next_track
         """
         try:
-            self.player.stop()
-            file = next(self.file_list)
-            media = self.player_instance.media_new(file)
-            self.player.set_media(media)
-            self.metadata = Metadata(file)
-            self._set_prompt(file)
-            self.mdatashell = MetaDataShell(self.metadata, parent=self, view=True)
-            self._set_timeout()
-            self.player.play()
-            md = self.metadata.get_audio_metadata(['artist', 'title'])
+            self._log_play()
+            with STATS.timer('inter-track gap'):
+                self.player.stop()
+                file = next(self.file_list)
+                with STATS.timer('metadata parse'):
+                    meta = load_metadata(file)
+                    stat = _os.stat(file)
+                    self.index.record(meta, stat)
+                    self.track = self._add_track(meta, stat)
+                    del meta  # only the compact library record is kept
+                options = []
+                self._windows, self._window = [], 0
+                if self.sample:
+                    self._windows = sample_windows(self.track.length, self.sample, self.segments)
+                    # libvlc starts decoding at the first snippet and stops after the last one
+                    options = [':start-time={:.3f}'.format(self._windows[0][0] / 1000),
+                               ':stop-time={:.3f}'.format(self._windows[-1][1] / 1000)]
+                self.current_file = self.track.path
+                self._current_mtime = stat.st_mtime
+                self._set_prompt(file)
+                self._mdatashell = None
+                self._set_timeout()
+                with STATS.timer('media open'):  # libvlc opens and demuxes the file in play()
+                    media = self.player_instance.media_new(file, *options)
+                    self.player.set_media(media)
+                    self.player.play()
+                self._play_started = _time.monotonic()
+            track = self.track
             self.stdout.write('{}\nplaying: {}\nTitle: {}\nArtist: {}\n'
-                              'Path: {}\n'.format(HORIZ_LINE, _os.path.basename(file), *md, _os.path.abspath(file))
+                              'Path: {}\n'.format(HORIZ_LINE, track.file, track.title, track.artist, track.path)
                               )
             self.stdout.flush()
+            if self.remote is not None:
+                self.remote.publish('now_playing', path=track.path, title=track.title, artist=track.artist,
+                                    album=track.album, length=track.length)
             _time.sleep(.2)
             return False
         except StopIteration:
             self.do_quit()
             return True
 
-    # noinspection PyUnusedLocal
-    def do_edit(self, *args):
+    def _add_track(self, meta, stat=None):
+        """add meta to the library, with edits queued but not written yet applied, and return its view."""
+        queued = self.writeback.pending(meta.path)  # edits not written yet still show
+        artist, album, title = ((queued[field] or [''])[0] if field in queued else value
+                                for field, value in zip(('artist', 'album', 'title'),
+                                                        meta.get_audio_metadata(['artist', 'album', 'title'])))
+        if stat is None:
+            stat = _os.stat(meta.path)
+        return self.library.add(meta.path, stat.st_size, stat.st_mtime, meta.length, artist, album, title)
+
+    @property
+    def mdatashell(self):
+        """metadata shell of the current track; the file is only parsed in full once it is edited."""
+        if self._mdatashell is None:
+            metadata = Metadata(self.track.path)
+            queued = self.writeback.pending(metadata.path)
+            if queued:
+                metadata.update({k: v for k, v in queued.items() if v})
+            self._mdatashell = MetaDataShell(metadata, parent=self, view=True, writeback=self.writeback)
+        return self._mdatashell
+
+    def do_edit(self, args=''):
         """
-        Open the metadata shell to edit and view the current track's metadata.
+        Open the metadata shell to edit and view the current track's metadata,
+        or run a single metadata shell command without entering it.
 
         Usage:
-        edit
+        edit [metadata-command]
+
+        Options:
+        [metadata-command] -- metadata shell command to run, e.g. "view artist" or "save".
+
+        Examples:
+        edit edit artist::Someone,, title::Something
+        edit save
         """
-        self.mdatashell.cmdloop()
+        shell = self.mdatashell
+        if args.strip():
+            stdout, shell.stdout = shell.stdout, self.stdout
+            try:
+                shell.onecmd(args)
+            finally:
+                shell.stdout = stdout
+        else:
+            self.flush_output()
+            shell.cmdloop()
+        self.track = self._add_track(shell.meta)  # pick up edited artist / album / title
 
     # noinspection PyUnusedLocal
     def do_delete(self, *args):
         """
         Delete the current file begin played.
         If shell was laughed in interactive mode, will prompt for a confirmation.
+        Deleted files are moved to the trash in the background and purged on exit.
 
         Usage:
         delete
         """
-        self.player.stop()
-        file_path = urllib.unquote(self.player.get_media().get_mrl())[8:]
         if self.interactive:
-            confirm = input('Really delete? (y/n): ')
-            if 'y' == confirm.rstrip().lower():
-                _os.remove(file_path)
-                self.do_next_track()
+            self.flush_output()  # show what the batch printed so far (e.g. the track) before asking
+            confirm = utils.input_timeout('Really delete? (y/n): ', timeout=None)  # not input(): see lineedit
+            if 'y' != confirm.rstrip().lower():
+                return
+        file_path = self.current_file
+        self._log_play(deleted=True)
+        self.player.stop()
+        self.trash.delete(file_path)
+        return self.do_next_track()
+
+    # noinspection PyUnusedLocal
+    def do_undo(self, *args):
+        """
+        Restore the most recently deleted file from the trash.
+
+        Usage:
+        undo
+        """
+        restored = self.trash.undo()
+        if restored is None:
+            self.stdout.write('Nothing to undo.\n')
         else:
-            _os.remove(file_path)
-            self.do_next_track()
+            self.stdout.write('restored: {}\n'.format(restored))
+        self.stdout.flush()
+
+    def do_history(self, args=''):
+        """
+        Show listening history.
+
+        Usage:
+        history [skipped [folder] | unreviewed [folder]]
+
+        Options:
+        [] -- play counts for the current track.
+        [skipped] -- most skipped tracks in folder (defaults to the current track's folder).
+        [unreviewed] -- indexed tracks in folder that were never played or changed since.
+        """
+        cmd, _, folder = args.strip().partition(' ')
+        folder = folder.strip() or (_os.path.dirname(self.current_file) if self.current_file else _os.curdir)
+        if cmd in ('skipped', 's'):
+            for entry in self.index.most_skipped(folder):
+                self.stdout.write('{:>4} skips / {:>4} plays  {}\n'.format(entry['skips'], entry['plays'],
+                                                                          entry['path']))
+        elif cmd in ('unreviewed', 'u'):
+            for path in self.index.never_reviewed(folder):
+                self.stdout.write('{}\n'.format(path))
+        elif self.current_file is not None:
+            entry = self.index.play_stats(self.current_file)
+            if entry is None:
+                self.stdout.write('first play\n')
+            else:
+                self.stdout.write('plays: {plays}  finished: {finishes}  skipped: {skips}  '
+                                  'listened: {listened:.0f}s  last: {last}\n'.format(
+                                      last=_time.strftime('%Y-%m-%d %H:%M', _time.localtime(entry['last_played'])),
+                                      **entry))
+        self.stdout.flush()
 
     def do_skip(self, duration=''):
         """
         Skip a number of seconds forwards or back in the current track.
-        Blank usage results in a +30 seconds skip.
+        Blank usage results in a +30 seconds skip, or in sample mode a jump to the next snippet.
 
         Usage:
         skip [seconds]
@@ -147,16 +339,19 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
         [seconds] -- number of seconds (+/-) to jump in the track. Defaults to 30 seconds.
 
         """
+        if not duration and self._windows:
+            if not self._next_window():
+                self.player.stop()
+                _time.sleep(0.1)
+            return
         if not duration:
             duration = 30.0
-        calc_pos = (float(duration) / self.metadata.length) + self.player.get_position()
-        if calc_pos > 1:
+        target = self.player.get_time() + int(float(duration) * 1000)
+        if target >= int(self.track.length * 1000):
             self.player.stop()
             _time.sleep(0.1)
-        elif calc_pos < 0:
-            self.player.set_position(0)
         else:
-            self.player.set_position(calc_pos)
+            self.player.set_time(max(target, 0))
 
     def do_bookmark(self, bookmark):
         """
@@ -202,8 +397,9 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
         super(AudioShell, self).do_help(arg)
 
     # noinspection PyPep8Naming
-    def do_EOF(self):
+    def do_EOF(self, *args):
         self.do_quit()
+        return True
 
     # internal masking:
     preloop = do_next_track
@@ -219,22 +415,27 @@ class AudioShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
     alias_next = do_next_track
     alias_r = do_remove_bookmark
     alias_remove = do_remove_bookmark
+    alias_u = do_undo
+    alias_hist = do_history
 
 
-class MetaDataShell(AliasCmdInterpreter, HideNoneDocMix):
+class MetaDataShell(AliasCmdInterpreter, HideNoneDocMix, TimeoutInputMix):
     """
     Metadata Shell for interacting with MetaData objects.
+    Prompts read through the same line editor as the AudioShell it is nested in.
     """
     intro = 'Metadata for: '
     prompt = 'Metadata: '
+    PIPELINE = False  # edit values may hold ';', and AudioShell already runs the batches
     doc_header = 'Commands (type help/? <topic>):'
     misc_header = 'Reference/help guides (type help/? <topic>):'
     undoc_header = None
     # ruler = '-'
 
-    def __init__(self, mdata: Metadata, *args, parent=None, view=None, **kwargs):
+    def __init__(self, mdata: Metadata, *args, parent=None, view=None, writeback=None, **kwargs):
         super(MetaDataShell, self).__init__(*args, **kwargs)
         self.meta = mdata
+        self.writeback = writeback
         self.intro += mdata.file
         self.tmp_dict = dict(mdata.tags)
 
@@ -289,6 +490,7 @@ class MetaDataShell(AliasCmdInterpreter, HideNoneDocMix):
     def do_save(self, *args):
         """
         Save current metadata tags to current file.
+        With a write-back queue the file is written in the background.
 
         Usage:
         save
@@ -296,7 +498,11 @@ class MetaDataShell(AliasCmdInterpreter, HideNoneDocMix):
         Options:
         []
         """
-        self.meta.save(self.tmp_dict)
+        if self.writeback is None:
+            self.meta.save(self.tmp_dict)
+        else:
+            self.meta.update(self.tmp_dict)
+            self.writeback.submit(self.meta.path, self.meta.sanitize(self.tmp_dict))
 
     def do_view(self, args='', supress=False):
         """
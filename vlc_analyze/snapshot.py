@@ -0,0 +1,169 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+snapshot.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Compact, shareable library snapshot for process pools.
+    The parent packs the path, size and mtime of every file into one flat buffer:
+        header | path offsets (uint64) | sizes (int64) | mtimes (float64) | utf-8 path blob
+    backed by a memory mapped file (on tmpfs where available). Worker processes map it
+    read-only once and are sent nothing but (start, stop) index ranges, so no per-file
+    data is pickled and starting a worker costs the same for any library size.
+"""
+import os as _os
+import math as _math
+import mmap as _mmap
+import struct as _struct
+import tempfile as _tempfile
+from array import array as _array
+from collections import deque as _deque
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+
+_MAGIC = b'VLSNAP01'
+_HEADER = _struct.Struct('<8sQQ')  # magic, file count, path blob length
+_SHM_DIR = '/dev/shm'
+_ENCODING = ('utf-8', 'surrogateescape')
+
+
+class Snapshot:
+    """
+    Read-only table of (path, size, mtime) rows.
+    build() creates one (the creator removes the backing file on close);
+    Snapshot(name) maps an existing one, e.g. in a worker process.
+    """
+
+    def __init__(self, name, owner=False):
+        self.name = name
+        self.owner = owner
+        with open(name, 'rb') as f:
+            self._mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        magic, count, blob_len = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            raise ValueError('{} is not a library snapshot'.format(name))
+        self._count = count
+        view = memoryview(self._mm)
+        pos = _HEADER.size
+        self._offsets = view[pos:pos + 8 * (count + 1)].cast('Q')
+        pos += 8 * (count + 1)
+        self._sizes = view[pos:pos + 8 * count].cast('q')
+        pos += 8 * count
+        self._mtimes = view[pos:pos + 8 * count].cast('d')
+        pos += 8 * count
+        self._blob = view[pos:pos + blob_len]
+        self._views = (self._offsets, self._sizes, self._mtimes, self._blob, view)
+
+    @classmethod
+    def build(cls, entries):
+        """snapshot of an iterable of (path, size, mtime)."""
+        offsets, sizes, mtimes, blob = _array('Q', [0]), _array('q'), _array('d'), bytearray()
+        for path, size, mtime in entries:
+            blob += path.encode(*_ENCODING)
+            offsets.append(len(blob))
+            sizes.append(size)
+            mtimes.append(mtime)
+        fd, name = _tempfile.mkstemp(prefix='vlc_analyze_snapshot_', suffix='.bin',
+                                     dir=_SHM_DIR if _os.path.isdir(_SHM_DIR) else None)
+        with open(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(sizes), len(blob)))
+            for table in (offsets, sizes, mtimes):
+                f.write(table.tobytes())
+            f.write(blob)
+        try:
+            return cls(name, owner=True)
+        except BaseException:
+            _os.remove(name)
+            raise
+
+    def __len__(self):
+        return self._count
+
+    def path(self, idx):
+        return str(self._blob[self._offsets[idx]:self._offsets[idx + 1]], *_ENCODING)
+
+    def size(self, idx):
+        return self._sizes[idx]
+
+    def mtime(self, idx):
+        return self._mtimes[idx]
+
+    def entries(self, start=0, stop=None):
+        """iterate (path, size, mtime) of rows start..stop."""
+        stop = self._count if stop is None else min(stop, self._count)
+        for idx in range(start, stop):
+            yield self.path(idx), self._sizes[idx], self._mtimes[idx]
+
+    def close(self):
+        if self._mm is None:
+            return
+        for view in self._views:
+            view.release()
+        self._mm.close()
+        self._mm = None
+        if self.owner:
+            try:
+                _os.remove(self.name)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_attached = {}  # worker side: snapshot name -> Snapshot
+
+
+def _run_range(func, name, start, stop):
+    snapshot = _attached.get(name)
+    if snapshot is None:
+        for stale in _attached.values():
+            stale.close()
+        _attached.clear()
+        snapshot = _attached[name] = Snapshot(name)
+    return func(snapshot, start, stop)
+
+
+def ranges(count, parts):
+    """split range(count) into about `parts` contiguous (start, stop) ranges."""
+    step = max(1, _math.ceil(count / parts)) if parts else max(count, 1)
+    return [(start, min(start + step, count)) for start in range(0, count, step)]
+
+
+def submit_ranges(func, snapshot, pool, parts):
+    """submit func(snapshot, start, stop) for about `parts` ranges of the snapshot at once. returns [(start, stop, future)]."""
+    return [(start, stop, pool.submit(_run_range, func, snapshot.name, start, stop))
+            for start, stop in ranges(len(snapshot), parts)]
+
+
+def map_ranges(func, snapshot, processes=4, chunks_per_process=4, pool=None):
+    """
+    run func(snapshot, start, stop) over the snapshot in a process pool (pool, or one of its own).
+    func must be a module level function; it and the two integers are all that is sent per task.
+    yields (start, stop, result) in snapshot order. at most two ranges per process are queued
+    at a time, and those not started yet are cancelled when the caller stops early.
+    """
+    if pool is None:
+        with _ProcessPoolExecutor(max_workers=processes) as pool:
+            yield from map_ranges(func, snapshot, processes, chunks_per_process, pool)
+        return
+    pending = _deque()
+    try:
+        for start, stop in ranges(len(snapshot), processes * chunks_per_process):
+            pending.append((start, stop, pool.submit(_run_range, func, snapshot.name, start, stop)))
+            if len(pending) >= 2 * processes:
+                start, stop, future = pending.popleft()
+                yield start, stop, future.result()
+        while pending:
+            start, stop, future = pending.popleft()
+            yield start, stop, future.result()
+    finally:
+        for _, _, future in pending:
+            future.cancel()
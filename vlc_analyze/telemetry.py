@@ -0,0 +1,197 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+telemetry.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Progress metrics for long-running headless jobs, written periodically
+    by a background thread as JSON lines or a Prometheus textfile.
+    Like instrument.STATS, collection is off unless METRICS.enabled is set.
+"""
+import os as _os
+import json as _json
+import time as _time
+import threading as _threading
+from contextlib import contextmanager as _contextmanager
+
+PROMETHEUS_PREFIX = 'vlc_analyze_'
+
+
+class Metrics:
+    """
+    Thread-safe counters and gauges for scanning / batch jobs.
+    bytes_read counts the size of every media file that went through the metadata layer.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = _threading.Lock()
+        self.started = _time.time()
+        self.files_scanned = 0
+        self.files_parsed = 0
+        self.bytes_read = 0
+        self.parse_errors = {}
+        self.queue_depth = 0
+        self.workers_total = 0
+        self._busy = {}  # worker thread id -> start time of current task
+        self._busy_seconds = 0.0
+        self.last_progress = self.started
+
+    def scanned(self, count=1):
+        with self._lock:
+            self.files_scanned += count
+            self.last_progress = _time.time()
+
+    def parsed(self, nbytes=0):
+        with self._lock:
+            self.files_parsed += 1
+            self.bytes_read += nbytes
+            self.last_progress = _time.time()
+
+    def read(self, nbytes):
+        with self._lock:
+            self.bytes_read += nbytes
+
+    def error(self, exc):
+        name = type(exc).__name__
+        with self._lock:
+            self.parse_errors[name] = self.parse_errors.get(name, 0) + 1
+
+    def set_queue_depth(self, depth):
+        self.queue_depth = depth
+
+    def set_workers(self, count):
+        self.workers_total = count
+
+    @_contextmanager
+    def task(self):
+        """mark the calling worker thread busy for the duration of the block."""
+        if not self.enabled:
+            yield
+            return
+        ident = _threading.get_ident()
+        start = _time.time()
+        with self._lock:  # snapshot() iterates _busy from the emitter thread
+            self._busy[ident] = start
+        try:
+            yield
+        finally:
+            end = _time.time()
+            with self._lock:
+                self._busy.pop(ident, None)
+                self._busy_seconds += end - start
+                self.last_progress = end
+
+    def count_scanned(self, iterable):
+        """pass through an iterable of file paths, counting them as scanned."""
+        for item in iterable:
+            self.scanned()
+            yield item
+
+    def snapshot(self):
+        now = _time.time()
+        with self._lock:
+            busy_now = sum(now - start for start in self._busy.values())
+            snap = {'time': now,
+                    'elapsed': now - self.started,
+                    'files_scanned': self.files_scanned,
+                    'files_parsed': self.files_parsed,
+                    'bytes_read': self.bytes_read,
+                    'parse_errors': dict(self.parse_errors),
+                    'queue_depth': self.queue_depth,
+                    'workers_total': self.workers_total,
+                    'workers_busy': len(self._busy),
+                    'worker_busy_seconds': self._busy_seconds + busy_now,
+                    'oldest_task_seconds': max((now - start for start in self._busy.values()), default=0.0),
+                    'seconds_since_progress': now - self.last_progress,
+                    }
+        return snap
+
+
+class Emitter(_threading.Thread):
+    """
+    Periodically writes Metrics snapshots.
+
+    fmt 'jsonl' appends one JSON object per interval to path.
+    fmt 'prom' atomically rewrites path in the Prometheus textfile collector format.
+    """
+
+    def __init__(self, metrics, path, fmt=None, interval=10.0):
+        super(Emitter, self).__init__(name='telemetry', daemon=True)
+        if fmt is None:
+            fmt = 'prom' if path.endswith('.prom') else 'jsonl'
+        if fmt not in ('jsonl', 'prom'):
+            raise ValueError('Unsupported telemetry format {}'.format(fmt))
+        self.metrics = metrics
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self._stop_event = _threading.Event()
+        self._last = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.emit()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.emit()
+
+    def emit(self):
+        snap = self.metrics.snapshot()
+        if self._last is not None:
+            dt = (snap['time'] - self._last['time']) or 1e-9
+            snap['files_per_sec'] = (snap['files_scanned'] - self._last['files_scanned']) / dt
+            snap['bytes_per_sec'] = (snap['bytes_read'] - self._last['bytes_read']) / dt
+            busy = snap['worker_busy_seconds'] - self._last['worker_busy_seconds']
+            snap['worker_utilization'] = busy / (dt * snap['workers_total']) if snap['workers_total'] else 0.0
+        else:
+            elapsed = snap['elapsed'] or 1e-9
+            snap['files_per_sec'] = snap['files_scanned'] / elapsed
+            snap['bytes_per_sec'] = snap['bytes_read'] / elapsed
+            snap['worker_utilization'] = 0.0
+        self._last = snap
+        if self.fmt == 'jsonl':
+            with open(self.path, 'a') as f:
+                f.write(_json.dumps(snap) + '\n')
+        else:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                f.write(self.prometheus(snap))
+            _os.replace(tmp, self.path)
+
+    @staticmethod
+    def prometheus(snap):
+        lines = []
+        for key, value in sorted(snap.items()):
+            if key in ('time', 'parse_errors'):
+                continue
+            lines.append('{}{} {}'.format(PROMETHEUS_PREFIX, key, value))
+        for error, count in sorted(snap['parse_errors'].items()):
+            lines.append('{}parse_errors{{type="{}"}} {}'.format(PROMETHEUS_PREFIX, error, count))
+        lines.append('{}last_emit_timestamp_seconds {}'.format(PROMETHEUS_PREFIX, snap['time']))
+        return '\n'.join(lines) + '\n'
+
+
+@_contextmanager
+def emitting(path, fmt=None, interval=10.0, metrics=None):
+    """enable metrics and run an Emitter for the duration of the block."""
+    metrics = METRICS if metrics is None else metrics
+    metrics.enabled = True
+    metrics.started = metrics.last_progress = _time.time()
+    emitter = Emitter(metrics, path, fmt, interval)
+    emitter.start()
+    try:
+        yield metrics
+    finally:
+        emitter.stop()
+
+
+# process wide metrics, enabled by the cli's --telemetry option
+METRICS = Metrics()
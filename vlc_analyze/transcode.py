@@ -0,0 +1,204 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+transcode.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Batch transcoding through libvlc stream output.
+    Each file is played into a '#transcode{...}:std{access=file}' chain by one of a
+    bounded pool of libvlc instances, written to a hidden temporary file, tagged with
+    the source's tags through the Metadata backends and then moved into place.
+    Outputs newer than their source are skipped, so re-runs only convert what changed.
+"""
+import os as _os
+import vlc as _vlc
+import math as _math
+import wave as _wave
+import queue as _queue
+import struct as _struct
+import threading as _threading
+from contextlib import contextmanager as _contextmanager
+
+from . import utils
+from .metadata import Metadata, load_metadata, _F_TYPES
+from .writeback import temp_path
+
+# output format -> (libvlc audio codec, muxer)
+FORMATS = {'mp3': ('mp3', 'dummy'),
+           'flac': ('flac', 'raw'),
+           }
+DEFAULT_BITRATE = 192  # kbit/s
+INSTANCE_ARGS = ('--quiet', '--no-video', '--no-sout-video')
+TIMEOUT = 3600.0  # seconds one file may take before it counts as failed
+
+
+def sout_chain(dst, f_type='mp3', bitrate=DEFAULT_BITRATE):
+    """libvlc stream output chain converting to f_type and writing dst."""
+    codec, mux = FORMATS[f_type]
+    return '#transcode{{vcodec=none,acodec={},ab={}}}:std{{access=file,mux={},dst="{}"}}'.format(
+        codec, bitrate, mux, dst.replace('"', '\\"'))
+
+
+def output_path(path, roots, out_dir, f_type='mp3'):
+    """where path goes below out_dir: its place below the root it was found in, with the new extension."""
+    path = _os.path.abspath(path)
+    rel = _os.path.basename(path)
+    for root in roots:
+        root = _os.path.join(_os.path.abspath(root), '')
+        if path.startswith(root):
+            rel = path[len(root):]
+            break
+    return _os.path.join(_os.path.abspath(out_dir), _os.path.splitext(rel)[0] + '.' + f_type)
+
+
+def up_to_date(src, dst):
+    """dst exists and was written after src was last modified."""
+    try:
+        return _os.stat(dst).st_mtime >= _os.stat(src).st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def copy_tags(src, dst, f_type):
+    """copy the text tags of src onto dst. sources without a tag backend (e.g. wav) have none to copy."""
+    if _os.path.splitext(src)[1][1:].lower() not in _F_TYPES:
+        return
+    tags = {k: list(v) for k, v in load_metadata(src).get_audio_metadata() if k in Metadata.possible_tags}
+    if tags:
+        Metadata(dst, f_type).save(tags)
+
+
+class InstancePool:
+    """
+    At most `size` libvlc instances, created on first use and shared by the worker threads.
+    instances are expensive to start, so each one converts many files.
+    """
+
+    def __init__(self, size, args=INSTANCE_ARGS):
+        self.size = size
+        self.args = args
+        self._free = _queue.Queue()
+        self._all = []
+        self._lock = _threading.Lock()
+
+    @_contextmanager
+    def instance(self):
+        try:
+            instance = self._free.get_nowait()
+        except _queue.Empty:
+            instance = None
+            with self._lock:
+                if len(self._all) < self.size:
+                    instance = _vlc.Instance(*self.args)
+                    if instance is None:
+                        raise RuntimeError('could not start libvlc')
+                    self._all.append(instance)
+            if instance is None:
+                instance = self._free.get()
+        try:
+            yield instance
+        finally:
+            self._free.put(instance)
+
+    def close(self):
+        with self._lock:
+            for instance in self._all:
+                instance.release()
+            self._all = []
+            self._free = _queue.Queue()
+
+
+def transcode_file(instance, src, dst, f_type='mp3', bitrate=DEFAULT_BITRATE, timeout=TIMEOUT):
+    """convert src into dst with one libvlc instance; dst only appears once it is complete and tagged."""
+    tmp = temp_path(dst)
+    _os.makedirs(_os.path.dirname(dst), exist_ok=True)
+    done = _threading.Event()
+    failed = []
+    media = instance.media_new(src, ':sout=' + sout_chain(tmp, f_type, bitrate), ':sout-keep', ':no-sout-all')
+    player = instance.media_player_new()
+    events = player.event_manager()
+    events.event_attach(_vlc.EventType.MediaPlayerEndReached, lambda event: done.set())
+    events.event_attach(_vlc.EventType.MediaPlayerEncounteredError, lambda event: (failed.append(event), done.set()))
+    try:
+        player.set_media(media)
+        if player.play() == -1:
+            raise RuntimeError('libvlc could not open {}'.format(src))
+        if not done.wait(timeout):
+            raise TimeoutError('transcoding {} took longer than {} seconds'.format(src, timeout))
+        player.stop()  # flushes and closes the output
+        if failed or not _os.path.getsize(tmp):
+            raise RuntimeError('libvlc failed to transcode {}'.format(src))
+        copy_tags(src, tmp, f_type)
+        _os.replace(tmp, dst)
+    except BaseException:
+        player.stop()
+        try:
+            _os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    finally:
+        player.release()
+        media.release()
+
+
+def transcode(files, roots, out_dir, f_type='mp3', bitrate=DEFAULT_BITRATE, workers=4, dry_run=False, report=None):
+    """
+    convert files (found below roots) into the same tree below out_dir, skipping up to date outputs
+    and anything already inside out_dir.
+
+    :param report: optional callable(path, output path, exception) for converted / failed files.
+    returns a dict of counters.
+    """
+    if f_type not in FORMATS:
+        raise ValueError('Unknown output format {!r}; known formats: {}'.format(f_type, ', '.join(sorted(FORMATS))))
+    counts = {'files': 0, 'transcoded': 0, 'skipped': 0, 'bytes': 0, 'errors': 0}
+    out_root = _os.path.join(_os.path.realpath(out_dir), '')
+    # out_dir may lie below a scanned root: never feed outputs back in as sources
+    files = (file for file in files if not _os.path.realpath(file).startswith(out_root))
+    pool = InstancePool(workers)
+
+    def process(src):
+        dst = output_path(src, roots, out_dir, f_type)
+        if _os.path.abspath(src) == dst:
+            raise ValueError('output would overwrite the source')
+        if up_to_date(src, dst):
+            return dst, False
+        if not dry_run:
+            with pool.instance() as instance:
+                transcode_file(instance, src, dst, f_type, bitrate)
+        return dst, True
+
+    try:
+        for src, result, error in utils.parallel_imap(process, files, workers):
+            counts['files'] += 1
+            if error is not None:
+                counts['errors'] += 1
+            elif result[1]:
+                counts['transcoded'] += 1
+                if not dry_run:
+                    counts['bytes'] += _os.path.getsize(result[0])
+            else:
+                counts['skipped'] += 1
+            if report is not None and (error is not None or result[1]):
+                report(src, None if error is not None else result[0], error)
+    finally:
+        pool.close()
+    return counts
+
+
+def write_tone(path, seconds=1.0, frequency=440.0, rate=44100, channels=2):
+    """write a synthetic 16 bit sine wave .wav, to exercise the pipeline without a music library."""
+    frames = int(seconds * rate)
+    amplitude = 0.5 * 0x7fff
+    samples = (int(amplitude * _math.sin(2 * _math.pi * frequency * n / rate)) for n in range(frames))
+    with _wave.open(path, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(b''.join(_struct.pack('<' + 'h' * channels, *(sample,) * channels) for sample in samples))
@@ -0,0 +1,234 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+trash.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Deferred, undoable file deletion.
+    delete() only queues a file; a background worker moves queued files into a
+    trash directory on the same device (so the move is a rename) in batches and drops their index/bookmark entries in the same step
+    (undo puts them back).
+    Trashed files are only really removed by purge(), normally on exit.
+"""
+import os as _os
+import json as _json
+import errno as _errno
+import time as _time
+import shutil as _shutil
+import threading as _threading
+from itertools import count as _count
+
+from . import utils
+
+TRASH_DIRNAME = '.vlc_analyze_trash'
+TRASH_DIR = _os.path.join(utils.BOOKMARK_PATH, TRASH_DIRNAME)
+
+
+class Trash:
+    """
+    Background trash for media files.
+
+    :param trash_dir: trash for files on its own device; files on other devices go to a
+                      TRASH_DIRNAME directory at the top of their device (see device_trash_dir).
+    :param index: MetadataIndex to keep in sync (optional).
+    :param bookmark_path: bookmark file to keep in sync, or None.
+    :param writeback: WriteBack whose queued edits of a file are dropped when it is trashed (optional).
+    :param batch_delay: seconds to wait for more deletes before moving a batch.
+    """
+
+    def __init__(self, trash_dir=TRASH_DIR, index=None, bookmark_path=utils.BOOKMARK_FILE,
+                 batch_size=64, batch_delay=0.5, writeback=None):
+        self.trash_dir = trash_dir
+        self.index = index
+        self.writeback = writeback
+        self.bookmark_path = bookmark_path
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.errors = []  # (path, exception) of failed moves
+        self._cond = _threading.Condition()
+        self._pending = []  # queued, not yet moved
+        self._moving = []  # batch currently being moved by the worker
+        self._trashed = []  # (original path, trash path), most recent last
+        self._names = _count()
+        self._closed = False
+        _os.makedirs(trash_dir, exist_ok=True)
+        self._dirs = {_os.stat(trash_dir).st_dev: trash_dir}  # device -> trash directory on it
+        self._worker = _threading.Thread(target=self._run, name='trash', daemon=True)
+        self._worker.start()
+
+    def delete(self, path):
+        """queue path for deletion and return immediately."""
+        with self._cond:
+            if self._closed:
+                raise ValueError('Trash is closed')
+            self._pending.append(_os.path.abspath(path))
+            self._cond.notify()
+
+    def undo(self):
+        """
+        restore the most recently deleted file.
+        returns its path, or None if there is nothing to undo.
+        """
+        with self._cond:
+            while self._moving:  # let the current batch land so the order stays consistent
+                self._cond.wait()
+            if self._pending:
+                return self._pending.pop()
+            if not self._trashed:
+                return None
+            path, trash_path = self._trashed.pop()
+        self._restore(path, trash_path)
+        return path
+
+    def flush(self):
+        """block until every queued file has been moved into the trash."""
+        with self._cond:
+            self._cond.notify()
+            while self._pending or self._moving:
+                self._cond.wait()
+
+    def purge(self):
+        """permanently delete everything in the trash, including leftovers from earlier sessions."""
+        self.flush()
+        trashed = []
+        if self.index is not None:
+            with self.index.transaction() as conn:
+                trashed = [row[0] for row in conn.execute('SELECT trash_path FROM trash')]
+                conn.execute('DELETE FROM trash')
+        with self._cond:
+            trashed.extend(trash_path for _, trash_path in self._trashed)
+            self._trashed.clear()
+        for trash_path in set(trashed):
+            try:
+                _os.remove(trash_path)
+            except FileNotFoundError:
+                pass
+        return len(set(trashed))
+
+    def close(self, purge=True):
+        """stop the worker; purges the trash unless purge is False. safe to call more than once."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+        if purge:
+            self.purge()
+
+    # worker side
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # give rapid deletes a moment to pile up into one batch
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.batch_delay)
+                self._moving = self._pending[:self.batch_size]
+                del self._pending[:len(self._moving)]
+            try:
+                self._move_batch(self._moving)
+            finally:
+                with self._cond:
+                    self._moving = []
+                    self._cond.notify_all()
+
+    def _trash_name(self, path):
+        directory = _os.path.dirname(path)
+        device = _os.stat(directory).st_dev
+        trash_dir = self._dirs.get(device)
+        if trash_dir is None:
+            trash_dir = self._dirs[device] = device_trash_dir(directory)
+        return _os.path.join(trash_dir, '{}_{}_{}'.format(int(_time.time()), next(self._names),
+                                                          _os.path.basename(path)))
+
+    def _move_batch(self, paths):
+        moved = []
+        for path in paths:
+            if self.writeback is not None:  # before the move, so no write can recreate the file
+                self.writeback.discard(path)
+            try:
+                trash_path = self._trash_name(path)
+                _move(path, trash_path)
+            except OSError as e:
+                self.errors.append((path, e))
+                continue
+            moved.append((path, trash_path))
+        if not moved:
+            return
+        bookmarks = utils.bookmarks_load(self.bookmark_path) if self.bookmark_path else set()
+        if self.index is not None:
+            now = _time.time()
+            with self.index.transaction() as conn:
+                for path, trash_path in moved:
+                    rows = self.index.file_rows(path)  # kept with the trash entry for undo
+                    conn.execute('INSERT OR REPLACE INTO trash (trash_path, path, deleted, bookmarked, track) '
+                                 'VALUES (?, ?, ?, ?, ?)',
+                                 (trash_path, path, now, path in bookmarks, _json.dumps(rows) if rows else None))
+                self.index.remove([path for path, _ in moved])
+        marked = {path for path, _ in moved} & bookmarks
+        if marked:
+            utils.bookmarks_remove(marked, self.bookmark_path)
+        with self._cond:
+            self._trashed.extend(moved)
+
+    def _restore(self, path, trash_path):
+        _move(trash_path, path)
+        bookmarked = False
+        if self.index is not None:
+            with self.index.transaction() as conn:
+                row = conn.execute('SELECT bookmarked, track FROM trash WHERE trash_path = ?',
+                                   (trash_path,)).fetchone()
+                conn.execute('DELETE FROM trash WHERE trash_path = ?', (trash_path,))
+                if row is not None:
+                    bookmarked = bool(row[0])
+                    if row[1]:
+                        self.index.restore_file_rows(_json.loads(row[1]))
+        if bookmarked and self.bookmark_path:
+            utils.bookmark_file(path, self.bookmark_path)
+
+
+def device_trash_dir(directory):
+    """
+    TRASH_DIRNAME directory on the device of directory: at the top of the device (its mount point),
+    or in directory itself where the top is not writable. hidden, so scans skip it.
+    """
+    directory = _os.path.abspath(directory)
+    device = _os.stat(directory).st_dev
+    top = directory
+    while True:
+        parent = _os.path.dirname(top)
+        if parent == top or _os.stat(parent).st_dev != device:
+            break
+        top = parent
+    for base in (top, directory):
+        trash_dir = _os.path.join(base, TRASH_DIRNAME)
+        try:
+            _os.makedirs(trash_dir, exist_ok=True)
+        except OSError:
+            continue
+        return trash_dir
+    raise PermissionError(_errno.EACCES, 'no writable trash directory on the device of', directory)
+
+
+def _move(src, dst):
+    """rename when src and dst share a device, otherwise copy + unlink. never leaves both copies behind."""
+    try:
+        _os.rename(src, dst)
+    except OSError as e:
+        if e.errno != _errno.EXDEV:
+            raise
+        _shutil.copy2(src, dst)
+        try:
+            _os.remove(src)
+        except OSError:
+            _os.remove(dst)
+            raise
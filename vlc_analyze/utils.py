@@ -17,6 +17,12 @@ import time as _time
 import glob as _glob
 import ctypes as _ctypes
 import itertools as _it
+from collections import deque as _deque
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+from urllib import parse as _urlparse
+from urllib import request as _urlreq
+
+from .telemetry import METRICS as _METRICS
 
 # constants
 BOOKMARK_FILENAME = 'vlc_analyze_bookmarks.txt'
@@ -27,6 +33,7 @@ BOOKMARK_FILE = _os.path.join(BOOKMARK_PATH, BOOKMARK_FILENAME)
 
 # input_timeout implementations
 if _sys.platform.startswith('win'):
+    import threading as _threading
     from msvcrt import getch, kbhit
     from string import printable as _printable
 
@@ -127,9 +134,12 @@ if _sys.platform.startswith('win'):
                         byte_arr.append(ord(char))
                         write_flush(str(char, 'utf-8'))
 
-                if (_time.time() - start_time) > timeout:
+                if timeout is not None and (_time.time() - start_time) > timeout:
                     stream.write(timeout_msg)
                     break
+                if _wake.is_set():
+                    _wake.clear()
+                    break
             except KeyboardInterrupt:
                 write_flush('\n')
                 _sys.exit(0)
@@ -143,61 +153,78 @@ if _sys.platform.startswith('win'):
 
     input_timeout.partial = b''
     input_timeout.previous = b''
+    _wake = _threading.Event()
+
+
+    def input_wakeup():
+        """end a pending input_timeout early (callable from any thread)."""
+        _wake.set()
+
+
+    def completion_context():
+        """the windows input_timeout leaves completion context to readline."""
+        return None
 elif _sys.platform.startswith('linux'):
-    import select as _select
+    from . import lineedit as _lineedit
 
 
-    def input_timeout(prompt, timeout):
-        _sys.stdout.write(prompt)
-        _sys.stdout.flush()
-        ready, _, _ = _select.select([_sys.stdin], [], [], timeout)
-        if ready:
-            return _sys.stdin.readline().rstrip('\n')  # expect stdin to be line-buffered
-        else:
-            return ''
+    def input_timeout(caption, timeout=5, default='', *_,
+                      stream=_sys.stdout, timeout_msg='\n ----- timed out', completer=None):
+        return _lineedit.get_editor().readline(caption, timeout, default, stream=stream,
+                                               timeout_msg=timeout_msg, completer=completer)
+
+
+    def input_wakeup():
+        """end a pending input_timeout early (callable from any thread)."""
+        _lineedit.get_editor().wake()
+
+
+    def completion_context():
+        """(line, begidx, endidx) of the line being completed, or None outside of input_timeout."""
+        editor = _lineedit.current_editor()
+        return None if editor is None else editor.completion
 else:
     raise OSError('Unsupported platform %s' % _sys.platform)
 
 
+def _hidden_name(file_name):
+    """For *nix add a '.' prefix to the base name."""
+    if _os.name == 'nt':
+        return file_name
+    head, tail = _os.path.split(file_name)
+    return file_name if tail.startswith('.') else _os.path.join(head, '.' + tail)
+
+
+def _set_hidden_attribute(file_name):
+    """For windows set the hidden file attribute."""
+    if _os.name == 'nt':
+        # noinspection PyPep8Naming
+        FILE_ATTRIBUTE_HIDDEN = 0x02
+        ret = _ctypes.windll.kernel32.SetFileAttributesW(file_name, FILE_ATTRIBUTE_HIDDEN)
+        if not ret:  # There was an error.
+            raise _ctypes.WinError()
+
+
 def write_hidden(file_name, data):
     """
     Cross platform hidden file writer.
     """
-    # noinspection PyPep8Naming
-    FILE_ATTRIBUTE_HIDDEN = 0x02
-    win_set_attribute_func = _ctypes.windll.kernel32.SetFileAttributesW
-    # For *nix add a '.' prefix.
-    prefix = '.' if _os.name != 'nt' else ''
-    file_name = prefix + file_name
+    file_name = _hidden_name(file_name)
 
     # Write file.
     with open(file_name, 'a') as f:
         f.write(data)
 
-    # For windows set file attribute.
-    if _os.name == 'nt':
-        ret = win_set_attribute_func(file_name, FILE_ATTRIBUTE_HIDDEN)
-        if not ret:  # There was an error.
-            raise _ctypes.WinError()
+    _set_hidden_attribute(file_name)
 
 
 def make_hidden(file_name):
-    # noinspection PyPep8Naming
+    file_name = _hidden_name(file_name)
     try:
-        open(file_name, 'w')
+        open(file_name, 'w').close()
     except PermissionError:
         pass
-
-    # noinspection PyPep8Naming
-    FILE_ATTRIBUTE_HIDDEN = 0x02
-    win_set_attribute_func = _ctypes.windll.kernel32.SetFileAttributesW
-    # For *nix add a '.' prefix.
-    prefix = '.' if _os.name != 'nt' else ''
-    file_name = prefix + file_name
-    if _os.name == 'nt':
-        ret = win_set_attribute_func(file_name, FILE_ATTRIBUTE_HIDDEN)
-        if not ret:  # There was an error.
-            raise _ctypes.WinError()
+    _set_hidden_attribute(file_name)
     return file_name
 
 
@@ -239,11 +266,35 @@ def bookmark_remove(bookmark, path=BOOKMARK_FILE):
     _os.rename(tmp_file, path)
 
 
+def bookmarks_remove(bookmarks, path=BOOKMARK_FILE):
+    """remove every bookmark in the `bookmarks` set with a single rewrite of the bookmark file."""
+    tmp_path, tmp_name = _os.path.split(path)
+    tmp_name = _os.path.splitext(tmp_name)[0] + '.tmp'
+    tmp_file = make_hidden(_os.path.join(tmp_path, tmp_name))
+    with open(path, 'r') as bkfile:
+        with open(tmp_file, 'r+') as tmpfile:
+            for line in bkfile:
+                if line.rstrip() not in bookmarks:
+                    tmpfile.write(line)
+    _os.replace(tmp_file, path)
+
+
 def bookmark_clear_mark(path=BOOKMARK_FILE):
     with open(path, 'r+') as bkfile:
         bkfile.truncate()
 
 
+def mrl_to_path(mrl):
+    """convert a vlc media resource locator (file:///...) back into a local path."""
+    parsed = _urlparse.urlparse(mrl)
+    if parsed.scheme and parsed.scheme != 'file':
+        return mrl
+    path = _urlreq.url2pathname(parsed.path)
+    if parsed.netloc:  # unc share on windows
+        path = '\\\\' + parsed.netloc + path
+    return path
+
+
 def split_comma_str(comma_str):
     return [item for item in comma_str.replace(' ', '').split(',')]
 
@@ -255,4 +306,43 @@ def multiple_file_types(path, patterns, recursion=False):
     else:
         files = (_glob.iglob(_os.path.abspath(_os.path.join(path, '*.{}'.format(pattern))))
                  for pattern in patterns)
+    if _METRICS.enabled:
+        return _METRICS.count_scanned(_it.chain.from_iterable(files))
     return _it.chain.from_iterable(files)
+
+
+def parallel_imap(func, items, workers=4, backlog=None):
+    """
+    lazily map func over items on a thread pool, keeping at most `backlog` calls in flight,
+    so an unbounded (streamed) iterable never has to fit in memory.
+
+    yields (item, result, exception) in input order; exactly one of result/exception is meaningful.
+    """
+    backlog = workers * 4 if backlog is None else backlog
+
+    def run(item):
+        with _METRICS.task():
+            return func(item)
+
+    if _METRICS.enabled:
+        _METRICS.set_workers(workers)
+    pending = _deque()
+    with _ThreadPoolExecutor(max_workers=workers) as pool:
+        for item in items:
+            pending.append((item, pool.submit(run, item)))
+            if len(pending) >= backlog:
+                yield _finished(pending.popleft())
+            if _METRICS.enabled:
+                _METRICS.set_queue_depth(len(pending))
+        while pending:
+            yield _finished(pending.popleft())
+    if _METRICS.enabled:
+        _METRICS.set_queue_depth(0)
+
+
+def _finished(entry):
+    item, future = entry
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
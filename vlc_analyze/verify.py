@@ -0,0 +1,276 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+verify.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Content-hash integrity checks against bit rot.
+    Every file gets two BLAKE2 digests stored in the index: one of its audio payload
+    and one of everything else (the tag blocks), so re-tagging a file is told apart
+    from damage to its audio. Files are mapped and hashed straight out of the mapping.
+    A normal run only hashes files whose size/mtime changed; a full audit re-hashes
+    everything and flags files whose content changed behind an unchanged mtime.
+    Progress is checkpointed, so an interrupted audit picks up where it stopped.
+    Hashing runs on a thread pool, or on a process pool fed from a shared Snapshot.
+"""
+import os as _os
+import json as _json
+import mmap as _mmap
+import time as _time
+import threading as _threading
+from hashlib import blake2b as _blake2b
+from itertools import islice as _islice
+from collections import deque as _deque
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+
+from . import utils
+from .metadata import file_type, _FAST_PARSERS, _parse_buffer
+from .snapshot import Snapshot, submit_ranges
+from .telemetry import METRICS as _METRICS
+
+CHECKPOINT_FILENAME = 'vlc_analyze_verify.json'
+CHECKPOINT_FILE = _os.path.join(utils.BOOKMARK_PATH, CHECKPOINT_FILENAME)
+CHUNK_SIZE = 1 << 20  # bytes fed to the hash per update
+CHECKPOINT_EVERY = 64  # results buffered before they are committed to the index
+PROCESS_BATCH = 1024  # files planned and snapshotted at a time when hashing in processes
+RANGES_PER_PROCESS = 4  # snapshot ranges per worker process and batch
+
+# per file outcomes
+NEW = 'new'  # first time seen
+OK = 'ok'  # re-hashed, content matches
+UNCHANGED = 'unchanged'  # size/mtime unchanged, not re-hashed
+RETAGGED = 'retagged'  # modified since the last run, audio is the same
+MODIFIED = 'modified'  # modified since the last run, audio changed too
+CORRUPT = 'corrupt'  # content changed while size/mtime did not
+RESUMED = 'resumed'  # already verified by an interrupted run of the same audit
+RESULTS = (NEW, OK, UNCHANGED, RETAGGED, MODIFIED, CORRUPT, RESUMED)
+
+
+def _update(digest, mv, start, stop):
+    for pos in range(start, stop, CHUNK_SIZE):
+        digest.update(mv[pos:min(pos + CHUNK_SIZE, stop)])
+
+
+def hash_file(path, f_type=None):
+    """
+    (audio digest, tags digest, bytes hashed) of path.
+    the audio payload is located with the fast metadata parsers; files they do not handle
+    are hashed whole as audio, with an empty tags digest.
+    """
+    if f_type is None:
+        f_type = file_type(path)
+    audio, tags = _blake2b(digest_size=32), _blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        try:
+            mm = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return audio.hexdigest(), tags.hexdigest(), 0
+    with mm:
+        if hasattr(mm, 'madvise'):
+            mm.madvise(_mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as mv:
+            size = len(mv)
+            parser = _FAST_PARSERS.get(f_type)
+            result = None if parser is None else _parse_buffer(parser, mv)
+            audio_start, audio_end = (0, size) if result is None else result[2:]
+            _update(tags, mv, 0, audio_start)
+            _update(audio, mv, audio_start, audio_end)
+            _update(tags, mv, audio_end, size)
+    return audio.hexdigest(), tags.hexdigest(), size
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return _json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_checkpoint(checkpoint, path=CHECKPOINT_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        _json.dump(checkpoint, f)
+    _os.replace(tmp, path)
+
+
+def clear_checkpoint(path=CHECKPOINT_FILE):
+    try:
+        _os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class WorkerRates:
+    """bytes hashed and seconds spent per worker thread (or process)."""
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self.workers = {}  # worker name -> [bytes, seconds]
+
+    def add(self, nbytes, seconds, name=None):
+        if name is None:
+            name = _threading.current_thread().name
+        with self._lock:
+            totals = self.workers.setdefault(name, [0, 0.0])
+            totals[0] += nbytes
+            totals[1] += seconds
+
+    def rates(self):
+        """[(thread name, bytes, bytes/sec)]."""
+        with self._lock:
+            return [(name, nbytes, nbytes / seconds if seconds else 0.0)
+                    for name, (nbytes, seconds) in sorted(self.workers.items())]
+
+
+def _hash_range(snapshot, start, stop):
+    """process pool task: [(audio, tags, bytes, seconds, worker) or exception] of snapshot rows start..stop."""
+    worker = 'process-{}'.format(_os.getpid())
+    results = []
+    for path, _, _ in snapshot.entries(start, stop):
+        begin = _time.perf_counter()
+        try:
+            results.append(hash_file(path) + (_time.perf_counter() - begin, worker))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _hash_in_processes(files, plan, finish, processes, rates):
+    """
+    (file, result, exception) like parallel_imap, with the hashing done by a process pool.
+    files are planned (stat + index lookup) here, PROCESS_BATCH at a time; those that need
+    hashing go into a shared snapshot per batch, whose ranges are all queued on the pool at once.
+    batches are double buffered: the next one is planned and queued while the workers still hash
+    the current one, so they never sit idle at a batch boundary.
+    """
+    in_flight = _deque()  # (snapshot, [(file, stat, known)] of its rows, [(start, stop, future)]), two at most
+    files = iter(files)
+    with _ProcessPoolExecutor(max_workers=processes) as pool:
+        try:
+            while True:
+                batch = list(_islice(files, PROCESS_BATCH))
+                queued = []
+                for file in batch:
+                    try:
+                        path, stat, known, result = plan(file)
+                    except Exception as e:
+                        yield file, None, e
+                        continue
+                    if result is not None:
+                        yield file, (None, result, 0), None
+                    else:
+                        queued.append((file, stat, known))
+                if queued:
+                    entries = ((_os.path.abspath(file), stat.st_size, stat.st_mtime) for file, stat, _ in queued)
+                    snap = Snapshot.build(entries)
+                    in_flight.append((snap, queued, submit_ranges(_hash_range, snap, pool,
+                                                                  processes * RANGES_PER_PROCESS)))
+                if not in_flight:
+                    if not batch:
+                        return
+                    continue
+                if batch and len(in_flight) < 2:
+                    continue  # plan the next batch before waiting on this one
+                snap, queued, futures = in_flight[0]
+                for start, _, future in futures:
+                    for (file, stat, known), result in zip(queued[start:], future.result()):
+                        if isinstance(result, Exception):
+                            yield file, None, result
+                            continue
+                        audio, tags, nbytes, seconds, worker = result
+                        rates.add(nbytes, seconds, worker)
+                        yield file, finish(_os.path.abspath(file), stat, known, audio, tags, nbytes), None
+                in_flight.popleft()
+                snap.close()
+        finally:
+            for snap, _, futures in in_flight:
+                for _, _, future in futures:
+                    future.cancel()
+                snap.close()
+
+
+def verify_files(files, index, full=False, workers=4, checkpoint_path=CHECKPOINT_FILE, report=None, rates=None,
+                 processes=0):
+    """
+    hash files and check them against the digests stored in the index.
+
+    :param full: re-hash every file, not just the ones whose size/mtime changed.
+    :param processes: hash in this many worker processes instead of `workers` threads.
+    :param report: optional callable(path, result, exception), called for every file that is not OK / UNCHANGED.
+    :param rates: optional WorkerRates collecting per worker throughput.
+    returns a dict of counters: one per result, plus files, bytes and errors.
+    """
+    rates = WorkerRates() if rates is None else rates
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is None or checkpoint.get('full') != full:
+        checkpoint = {'started': _time.time(), 'full': full}
+        save_checkpoint(checkpoint, checkpoint_path)
+    started = checkpoint['started']
+    counts = dict.fromkeys(RESULTS, 0)
+    counts.update(files=0, bytes=0, errors=0)
+
+    def plan(file):
+        """(path, stat, index entry, result), result None if the file needs hashing."""
+        path = _os.path.abspath(file)
+        stat = _os.stat(path)
+        known = index.integrity(path)
+        same_stat = known is not None and known['size'] == stat.st_size and known['mtime'] == stat.st_mtime
+        if same_stat and known['verified'] >= started:
+            return path, stat, known, RESUMED
+        if same_stat and not full:
+            return path, stat, known, UNCHANGED
+        return path, stat, known, None
+
+    def finish(path, stat, known, audio, tags, nbytes):
+        """(index row or None, result, bytes hashed) from the fresh digests."""
+        if _METRICS.enabled:
+            _METRICS.read(nbytes)
+        row = (path, stat.st_size, stat.st_mtime, audio, tags, _time.time())
+        if known is None:
+            return row, NEW, nbytes
+        if known['size'] == stat.st_size and known['mtime'] == stat.st_mtime:
+            if (audio, tags) != (known['audio'], known['tags']):
+                return None, CORRUPT, nbytes  # keep the good digests as the reference
+            return row, OK, nbytes
+        return row, RETAGGED if audio == known['audio'] else MODIFIED, nbytes
+
+    def process(file):
+        path, stat, known, result = plan(file)
+        if result is not None:
+            return None, result, 0
+        start = _time.perf_counter()
+        audio, tags, nbytes = hash_file(path)
+        rates.add(nbytes, _time.perf_counter() - start)
+        return finish(path, stat, known, audio, tags, nbytes)
+
+    if processes:
+        results = _hash_in_processes(files, plan, finish, processes, rates)
+    else:
+        results = utils.parallel_imap(process, files, workers)
+    rows = []
+    try:
+        for file, result, error in results:
+            counts['files'] += 1
+            if error is not None:
+                counts['errors'] += 1
+            else:
+                row, outcome, nbytes = result
+                counts[outcome] += 1
+                counts['bytes'] += nbytes
+                if row is not None:
+                    rows.append(row)
+                if len(rows) >= CHECKPOINT_EVERY:
+                    index.record_integrity(rows)
+                    rows = []
+            if report is not None and (error is not None or result[1] not in (OK, UNCHANGED, RESUMED)):
+                report(file, None if error is not None else result[1], error)
+    finally:
+        index.record_integrity(rows)  # an interrupted run keeps what it verified
+    clear_checkpoint(checkpoint_path)  # only reached when every file was seen
+    return counts
@@ -0,0 +1,354 @@
+#! /usr/bin/env python
+# vim:fileencoding=utf-8
+# -*- coding: utf-8 -*-
+"""
+vlc_check_audio
+writeback.py
+Author: Danyal Ahsanullah
+Date: 10/19/2026
+Copyright (c):  2026 Danyal Ahsanullah
+License: N/A
+Description:
+    Journaled, crash-safe tag write-back.
+    submit() appends the change to a journal (fsynced) and returns; a background worker
+    coalesces all edits queued for a file into one write and applies them in batches.
+    When the new tags of an mp3/flac fit into the file's tag region (padding included),
+    only that region is rewritten, after a synced backup of it is put next to the file.
+    Otherwise the write goes to a temporary copy of the whole file which then atomically
+    replaces it. Either way a killed process never leaves a torn file behind: recover()
+    puts a backed up region back before it replays (or discards) the journaled edits.
+"""
+import io as _io
+import os as _os
+import json as _json
+import shutil as _shutil
+import threading as _threading
+
+from . import utils
+from mutagen.easyid3 import EasyID3 as _EasyID3
+from mutagen.flac import FLAC as _FLAC
+
+from .metadata import Metadata, file_type, load_metadata, read_fast
+
+JOURNAL_FILENAME = 'vlc_analyze_journal.jsonl'
+JOURNAL_FILE = _os.path.join(utils.BOOKMARK_PATH, JOURNAL_FILENAME)
+TEMP_SUFFIX = '.vlc_analyze.tmp'
+BACKUP_SUFFIX = '.vlc_analyze.tags'
+_REGION_TYPES = {'mp3': _EasyID3,  # the ID3v2 tag at the start of the file
+                 'flac': _FLAC,  # the metadata blocks in front of the frames
+                 }
+_SENTINEL = bytes(128)  # stands in for the audio behind the region; mutagen must leave it alone
+
+
+def temp_path(path):
+    """hidden sibling the new version of path is written to before it replaces path."""
+    head, tail = _os.path.split(path)
+    return _os.path.join(head, '.' + tail + TEMP_SUFFIX)
+
+
+def backup_path(path):
+    """hidden sibling holding the old tag region of path while it is rewritten in place."""
+    head, tail = _os.path.split(path)
+    return _os.path.join(head, '.' + tail + BACKUP_SUFFIX)
+
+
+def _apply(audio, changes):
+    for field in [k for k, v in changes.items() if not v]:
+        if field in audio:
+            del audio[field]
+    audio.update({k: v for k, v in changes.items() if v and k in Metadata.possible_tags})
+
+
+def _keep_size(info):
+    """mutagen padding function: reuse the old padding as long as the tags fit into it."""
+    return info.padding if info.padding >= 0 else info.get_default_padding()
+
+
+def _new_tag_region(path, changes):
+    """
+    (old, new) bytes of the tag region of path with changes applied, or None when that cannot be
+    done in place: another format, no tag region yet, an ID3v1 tag to update at the end of the file,
+    or new tags that do not fit into the old region.
+    """
+    fast = read_fast(path, file_type(path))
+    if (fast is None or fast.f_type not in _REGION_TYPES or not fast.audio_start
+            or fast.audio_end != _os.path.getsize(path)):
+        return None
+    with open(path, 'rb') as f:
+        old = f.read(fast.audio_start)
+    buf = _io.BytesIO(old + _SENTINEL)
+    audio = _REGION_TYPES[fast.f_type](buf)
+    if getattr(audio, 'tags', audio) is None:  # a flac without a comment block yet
+        return None
+    _apply(audio, changes)
+    buf.seek(0)
+    audio.save(buf, padding=_keep_size)
+    new = buf.getvalue()
+    if len(new) != len(old) + len(_SENTINEL) or not new.endswith(_SENTINEL):
+        return None
+    return old, new[:len(old)]
+
+
+def _write_synced(path, data, mode='wb'):
+    with open(path, mode) as f:
+        f.write(data)
+        f.flush()
+        _os.fsync(f.fileno())
+
+
+def _restore_region(path):
+    """put back the tag region backed up before an interrupted in-place write, if any."""
+    backup = backup_path(path)
+    try:
+        with open(backup, 'rb') as f:
+            old = f.read()
+    except FileNotFoundError:
+        return
+    _write_synced(path, old, 'rb+')
+    _os.remove(backup)
+
+
+def write_file(path, changes):
+    """
+    apply {field: [values]} to path atomically; an empty list deletes the field.
+    mp3/flac tags that fit into the existing padding are rewritten in place, which costs about the
+    size of the tags: the old region is first saved to a synced backup (see backup_path) that
+    recover() restores if the write is interrupted.
+    anything else (tags outgrowing the padding, ID3v1, other formats) is saved into a full copy of
+    the file, which is synced and renamed over the original: that costs a read and write of the
+    whole file and needs as much free space.
+    """
+    region = _new_tag_region(path, changes)
+    if region is not None:
+        old, new = region
+        if new != old:
+            tmp = temp_path(path)
+            _write_synced(tmp, old)
+            _os.replace(tmp, backup_path(path))  # a backup only ever exists complete
+            _write_synced(path, new, 'rb+')
+            _os.remove(backup_path(path))
+        return
+    tmp = temp_path(path)
+    _shutil.copy2(path, tmp)
+    try:
+        meta = Metadata(tmp, file_type(path))
+        _apply(meta.audio, changes)
+        meta.audio.save()
+        with open(tmp, 'rb+') as f:
+            _os.fsync(f.fileno())
+        _os.replace(tmp, path)
+    except BaseException:
+        try:
+            _os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBack:
+    """
+    Background tag writer.
+
+    :param index: MetadataIndex refreshed after every write (optional).
+    :param batch_delay: seconds to wait for more edits before writing a batch.
+    """
+
+    def __init__(self, journal_path=JOURNAL_FILE, index=None, batch_delay=0.5):
+        self.journal_path = journal_path
+        self.index = index
+        self.batch_delay = batch_delay
+        self.errors = []  # (path, exception) of failed writes
+        self._cond = _threading.Condition()
+        self._pending = {}  # path -> (journal ids, coalesced changes), in submission order
+        self._writing = {}  # batch currently being written by the worker
+        self._next_id = 0
+        self._closed = False
+        self._leftover = read_journal(journal_path)  # edits recover() could not replay, kept journaled
+        self._journal = open(journal_path, 'a', encoding='utf-8')
+        self._worker = _threading.Thread(target=self._run, name='writeback', daemon=True)
+        self._worker.start()
+
+    def _log(self, record):
+        """append one record to the journal and make it durable. call with the lock held."""
+        self._journal.write(_json.dumps(record) + '\n')
+        self._journal.flush()
+        _os.fsync(self._journal.fileno())
+
+    def submit(self, path, changes):
+        """queue {field: [values]} for path (empty list deletes the field) and return immediately."""
+        path = _os.path.abspath(path)
+        changes = {k: list(v) for k, v in changes.items()}
+        with self._cond:
+            if self._closed:
+                raise ValueError('WriteBack is closed')
+            self._next_id += 1
+            self._log({'id': self._next_id, 'path': path, 'changes': changes})
+            ids, queued = self._pending.setdefault(path, ([], {}))
+            ids.append(self._next_id)
+            queued.update(changes)
+            self._cond.notify()
+
+    def pending(self, path=None):
+        """coalesced changes not yet on disk: for path, or {path: changes} of every file."""
+        with self._cond:
+            if path is not None:
+                path = _os.path.abspath(path)
+                merged = dict(self._writing.get(path, ((), {}))[1])
+                merged.update(self._pending.get(path, ((), {}))[1])
+                return merged
+            return {p: dict(changes) for p, (_, changes) in list(self._writing.items()) + list(self._pending.items())}
+
+    def discard(self, path):
+        """
+        drop every edit queued or left over for path, e.g. because the file is being deleted.
+        waits for a write of path already under way, so nothing touches the file afterwards.
+        """
+        path = _os.path.abspath(path)
+        with self._cond:
+            while path in self._writing:
+                self._cond.wait()
+            self._pending.pop(path, None)
+            self._leftover.pop(path, None)
+            if not self._journal.closed:
+                self._log({'drop': path})
+
+    def flush(self):
+        """block until every submitted edit has been written (or has failed)."""
+        with self._cond:
+            self._cond.notify()
+            while self._pending or self._writing:
+                self._cond.wait()
+
+    def close(self):
+        """write everything still queued and stop the worker. safe to call more than once."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+        with self._cond:
+            self._journal.close()
+
+    # worker side
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # let a burst of edits to the same files coalesce
+                if not self._closed:
+                    self._cond.wait(self.batch_delay)
+                self._writing, self._pending = self._pending, {}
+            try:
+                self._write_batch(self._writing)
+            finally:
+                with self._cond:
+                    self._writing = {}
+                    if not self._pending:
+                        self._compact()
+                    self._cond.notify_all()
+
+    def _compact(self):
+        """everything this session journaled is on disk: restart the journal. call with the lock held."""
+        self._journal.truncate(0)
+        _write_records(self._journal, self._leftover)
+
+    def _write_batch(self, batch):
+        """write a batch; failed edits are not marked done but kept as leftover, so recover() retries them."""
+        done = []
+        for path, (ids, changes) in batch.items():
+            try:
+                write_file(path, changes)
+            except Exception as e:
+                self.errors.append((path, e))
+                with self._cond:
+                    self._leftover.setdefault(path, {}).update(changes)
+                continue
+            done.extend(ids)
+            with self._cond:
+                leftover = self._leftover.get(path)
+                if leftover is not None:  # fields written now supersede older failed edits
+                    for field in changes:
+                        leftover.pop(field, None)
+                    if not leftover:
+                        del self._leftover[path]
+            if self.index is not None:
+                try:
+                    self.index.record(load_metadata(path))
+                except Exception as e:
+                    self.errors.append((path, e))
+        with self._cond:
+            self._log({'done': done})
+
+
+def _write_records(journal, pending):
+    """journal {path: changes} as records with negative ids, which never clash with a session's own."""
+    for idx, (path, changes) in enumerate(pending.items(), 1):
+        journal.write(_json.dumps({'id': -idx, 'path': path, 'changes': changes}) + '\n')
+    journal.flush()
+    _os.fsync(journal.fileno())
+
+
+def read_journal(journal_path=JOURNAL_FILE):
+    """{path: coalesced changes} journaled but never marked done, in journal order."""
+    try:
+        journal = open(journal_path, encoding='utf-8')
+    except FileNotFoundError:
+        return {}
+    entries, done = [], set()
+    with journal:
+        for line in journal:
+            try:
+                record = _json.loads(line)
+            except ValueError:  # torn last line of a crashed append: that edit never returned
+                continue
+            if 'done' in record:
+                done.update(record['done'])
+            elif 'drop' in record:  # the file was deleted: its earlier edits are void
+                entries = [entry for entry in entries if entry['path'] != record['drop']]
+            else:
+                entries.append(record)
+    pending = {}
+    for record in entries:
+        if record['id'] not in done:
+            pending.setdefault(record['path'], {}).update(record['changes'])
+    return pending
+
+
+def recover(journal_path=JOURNAL_FILE, replay=True, index=None):
+    """
+    finish or drop edits left in the journal by a session that did not shut down cleanly.
+    half written temporary copies are removed and tag regions interrupted mid-write are restored
+    from their backup either way, so each file is back to its state before the edit.
+    edits that fail to replay (e.g. the file's share is not mounted) stay in the journal.
+
+    :param replay: write the pending edits (True) or roll them back by discarding them (False).
+    returns ({path: changes} found, [(path, exception)] of failed replays).
+    """
+    pending = read_journal(journal_path)
+    failed = []
+    for path, changes in pending.items():
+        try:
+            _os.remove(temp_path(path))
+        except OSError:
+            pass
+        try:
+            _restore_region(path)
+        except OSError as e:
+            failed.append((path, e))
+            continue
+        if not replay:
+            continue
+        try:
+            write_file(path, changes)
+            if index is not None:
+                index.record(load_metadata(path))
+        except Exception as e:
+            failed.append((path, e))
+    if _os.path.exists(journal_path):
+        with open(journal_path, 'w', encoding='utf-8') as journal:
+            _write_records(journal, {path: pending[path] for path, _ in failed})
+    return pending, failed